@@ -0,0 +1,335 @@
+"""Baseline schema
+
+Everything the app used to create/patch at import time (metadata.create_all plus
+the idempotent column/constraint fixes from main._ensure_postgres_schema), so
+that existing databases and empty ones both end up at the same revision.
+
+The tables are a frozen snapshot of the models as of this revision, not
+imported from models.py: later migrations apply on top of exactly this schema.
+Tables are created only where missing (databases from before migrations keep
+theirs and get the column fixes below).
+
+Revision ID: 20261016_0900
+Revises:
+Create Date: 2026-10-16 09:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from config import settings
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016_0900'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'organizations',
+        sa.Column('id', sa.String(), primary_key=True),
+        sa.Column('name', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True, server_default=sa.func.now()),
+        if_not_exists=True,
+    )
+    op.create_table(
+        'projects',
+        sa.Column('id', sa.String(), primary_key=True),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('tags', sa.JSON(), nullable=True),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('start_date', sa.Date(), nullable=True),
+        sa.Column('end_date', sa.Date(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True, server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('organization_id', sa.String(), sa.ForeignKey('organizations.id'), nullable=True),
+        if_not_exists=True,
+    )
+    op.create_table(
+        'users',
+        sa.Column('id', sa.String(), primary_key=True),
+        sa.Column('email', sa.String(), nullable=False),
+        sa.Column('name', sa.String(), nullable=True),
+        sa.Column('role', sa.String(), nullable=False),
+        sa.Column('password_salt', sa.String(), nullable=False),
+        sa.Column('password_hash', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True, server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('organization_id', sa.String(), sa.ForeignKey('organizations.id'), nullable=True),
+        if_not_exists=True,
+    )
+    op.create_index('ix_users_email', 'users', ['email'], unique=True, if_not_exists=True)
+    op.create_table(
+        'chat_sessions',
+        sa.Column('id', sa.String(), primary_key=True),
+        sa.Column('user_id', sa.String(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('title', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True, server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True, server_default=sa.func.now()),
+        if_not_exists=True,
+    )
+    op.create_index('ix_chat_sessions_user_id', 'chat_sessions', ['user_id'], if_not_exists=True)
+    op.create_table(
+        'employees',
+        sa.Column('id', sa.String(), primary_key=True),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('position', sa.String(), nullable=False),
+        sa.Column('email', sa.String(), nullable=True),
+        sa.Column('telegram_chat_id', sa.String(), nullable=True),
+        sa.Column('salary', sa.Float(), nullable=True),
+        sa.Column('revenue', sa.Float(), nullable=True),
+        sa.Column('current_status', sa.String(), nullable=False),
+        sa.Column('status_tag', sa.String(), nullable=True),
+        sa.Column('status_date', sa.Date(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True, server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('hourly_rate', sa.Integer(), nullable=True),
+        sa.Column('cost_hourly_rate', sa.Integer(), nullable=True),
+        sa.Column('bill_hourly_rate', sa.Integer(), nullable=True),
+        sa.Column('planned_monthly_hours', sa.Integer(), nullable=True),
+        sa.Column('user_id', sa.String(), sa.ForeignKey('users.id'), nullable=True, unique=True),
+        sa.Column('organization_id', sa.String(), sa.ForeignKey('organizations.id'), nullable=True),
+        if_not_exists=True,
+    )
+    op.create_table(
+        'goals',
+        sa.Column('id', sa.String(), primary_key=True),
+        sa.Column('title', sa.String(), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('period', sa.String(), nullable=False),
+        sa.Column('start_date', sa.Date(), nullable=False),
+        sa.Column('end_date', sa.Date(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('progress', sa.Integer(), nullable=False),
+        sa.Column('tags', sa.JSON(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True, server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('user_id', sa.String(), sa.ForeignKey('users.id'), nullable=True),
+        if_not_exists=True,
+    )
+    op.create_table(
+        'notes',
+        sa.Column('id', sa.String(), primary_key=True),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('title', sa.String(), nullable=True),
+        sa.Column('content', sa.Text(), nullable=False),
+        sa.Column('tags', sa.JSON(), nullable=True),
+        sa.Column('shared', sa.Boolean(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True, server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('user_id', sa.String(), sa.ForeignKey('users.id'), nullable=True),
+        if_not_exists=True,
+    )
+    op.create_table(
+        'project_links',
+        sa.Column('id', sa.String(), primary_key=True),
+        sa.Column('project_id', sa.String(), sa.ForeignKey('projects.id'), nullable=False),
+        sa.Column('title', sa.String(), nullable=False),
+        sa.Column('url', sa.String(), nullable=False),
+        sa.Column('link_type', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True, server_default=sa.func.now()),
+        if_not_exists=True,
+    )
+    op.create_table(
+        'reading_items',
+        sa.Column('id', sa.String(), primary_key=True),
+        sa.Column('title', sa.String(), nullable=False),
+        sa.Column('url', sa.String(), nullable=True),
+        sa.Column('content', sa.Text(), nullable=True),
+        sa.Column('item_type', sa.String(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('priority', sa.String(), nullable=False),
+        sa.Column('tags', sa.JSON(), nullable=True),
+        sa.Column('added_date', sa.Date(), nullable=False),
+        sa.Column('completed_date', sa.Date(), nullable=True),
+        sa.Column('notes', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True, server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('user_id', sa.String(), sa.ForeignKey('users.id'), nullable=True),
+        if_not_exists=True,
+    )
+    op.create_table(
+        'registration_codes',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('code', sa.String(), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=False),
+        sa.Column('created_by_user_id', sa.String(), sa.ForeignKey('users.id'), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True, server_default=sa.func.now()),
+        if_not_exists=True,
+    )
+    op.create_index('ix_registration_codes_code', 'registration_codes', ['code'], unique=True, if_not_exists=True)
+    op.create_table(
+        'sessions',
+        sa.Column('token', sa.String(), primary_key=True),
+        sa.Column('user_id', sa.String(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True, server_default=sa.func.now()),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_seen_at', sa.DateTime(timezone=True), nullable=True),
+        if_not_exists=True,
+    )
+    op.create_index('ix_sessions_expires_at', 'sessions', ['expires_at'], if_not_exists=True)
+    op.create_index('ix_sessions_user_id', 'sessions', ['user_id'], if_not_exists=True)
+    op.create_table(
+        'user_profiles',
+        sa.Column('user_id', sa.String(), sa.ForeignKey('users.id'), primary_key=True),
+        sa.Column('avatar_url', sa.String(), nullable=True),
+        sa.Column('bio', sa.Text(), nullable=True),
+        sa.Column('phone', sa.String(), nullable=True),
+        sa.Column('position', sa.String(), nullable=True),
+        sa.Column('company', sa.String(), nullable=True),
+        sa.Column('website', sa.String(), nullable=True),
+        sa.Column('telegram', sa.String(), nullable=True),
+        sa.Column('github', sa.String(), nullable=True),
+        sa.Column('twitter', sa.String(), nullable=True),
+        sa.Column('timezone', sa.String(), nullable=True),
+        sa.Column('locale', sa.String(), nullable=True),
+        sa.Column('openrouter_api_key', sa.String(), nullable=True),
+        if_not_exists=True,
+    )
+    op.create_table(
+        'user_tags',
+        sa.Column('id', sa.String(), primary_key=True),
+        sa.Column('user_id', sa.String(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('tag_value', sa.String(), nullable=False),
+        sa.Column('tag_type', sa.String(), nullable=False),
+        sa.Column('usage_count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True, server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.UniqueConstraint('user_id', 'tag_value', 'tag_type', name='uq_user_tags_value_type'),
+        if_not_exists=True,
+    )
+    op.create_index('ix_user_tags_user_id', 'user_tags', ['user_id'], if_not_exists=True)
+    op.create_table(
+        'chat_messages',
+        sa.Column('id', sa.String(), primary_key=True),
+        sa.Column('session_id', sa.String(), sa.ForeignKey('chat_sessions.id'), nullable=False),
+        sa.Column('role', sa.String(), nullable=False),
+        sa.Column('content', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True, server_default=sa.func.now()),
+        if_not_exists=True,
+    )
+    op.create_index('ix_chat_messages_session_id', 'chat_messages', ['session_id'], if_not_exists=True)
+    op.create_table(
+        'project_members',
+        sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column('project_id', sa.String(), sa.ForeignKey('projects.id'), nullable=False),
+        sa.Column('employee_id', sa.String(), sa.ForeignKey('employees.id'), nullable=False),
+        sa.Column('joined_at', sa.DateTime(timezone=True), nullable=True, server_default=sa.func.now()),
+        sa.Column('hourly_rate', sa.Integer(), nullable=True),
+        sa.Column('cost_hourly_rate', sa.Integer(), nullable=True),
+        sa.Column('bill_hourly_rate', sa.Integer(), nullable=True),
+        sa.UniqueConstraint('project_id', 'employee_id', name='uq_project_members_pair'),
+        if_not_exists=True,
+    )
+    op.create_table(
+        'tasks',
+        sa.Column('id', sa.String(), primary_key=True),
+        sa.Column('content', sa.String(), nullable=False),
+        sa.Column('priority', sa.String(), nullable=False),
+        sa.Column('due_date', sa.Date(), nullable=True),
+        sa.Column('done', sa.Boolean(), nullable=False),
+        sa.Column('assigned_to', sa.String(), sa.ForeignKey('employees.id'), nullable=True),
+        sa.Column('project_id', sa.String(), sa.ForeignKey('projects.id'), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True, server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('hours_spent', sa.Float(), nullable=False),
+        sa.Column('billable', sa.Boolean(), nullable=False),
+        sa.Column('hourly_rate_override', sa.Integer(), nullable=True),
+        sa.Column('cost_rate_override', sa.Integer(), nullable=True),
+        sa.Column('bill_rate_override', sa.Integer(), nullable=True),
+        sa.Column('applied_hourly_rate', sa.Integer(), nullable=True),
+        sa.Column('applied_cost_rate', sa.Integer(), nullable=True),
+        sa.Column('applied_bill_rate', sa.Integer(), nullable=True),
+        sa.Column('approved', sa.Boolean(), nullable=False),
+        sa.Column('approved_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('work_status', sa.String(), nullable=True),
+        sa.Column('income_tx_id', sa.String(), nullable=True),
+        sa.Column('expense_tx_id', sa.String(), nullable=True),
+        sa.Column('organization_id', sa.String(), sa.ForeignKey('organizations.id'), nullable=True),
+        if_not_exists=True,
+    )
+    op.create_table(
+        'transactions',
+        sa.Column('id', sa.String(), primary_key=True),
+        sa.Column('transaction_type', sa.String(), nullable=False),
+        sa.Column('amount', sa.Float(), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('category', sa.String(), nullable=True),
+        sa.Column('description', sa.String(), nullable=True),
+        sa.Column('tags', sa.JSON(), nullable=True),
+        sa.Column('employee_id', sa.String(), sa.ForeignKey('employees.id'), nullable=True),
+        sa.Column('project_id', sa.String(), sa.ForeignKey('projects.id'), nullable=True),
+        sa.Column('task_id', sa.String(), sa.ForeignKey('tasks.id'), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True, server_default=sa.func.now()),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('organization_id', sa.String(), sa.ForeignKey('organizations.id'), nullable=True),
+        if_not_exists=True,
+    )
+
+
+    # employees.user_id unique FK
+    op.execute("ALTER TABLE IF EXISTS employees ADD COLUMN IF NOT EXISTS user_id TEXT UNIQUE")
+    op.execute("DO $$ BEGIN IF NOT EXISTS (SELECT 1 FROM information_schema.table_constraints WHERE table_name='employees' AND constraint_name='employees_user_fk') THEN ALTER TABLE employees ADD CONSTRAINT employees_user_fk FOREIGN KEY (user_id) REFERENCES users(id); END IF; END $$;")
+    # employees new rate columns (robust IF NOT EXISTS)
+    op.execute("DO $$ BEGIN IF NOT EXISTS (SELECT 1 FROM information_schema.columns WHERE table_name='employees' AND column_name='hourly_rate') THEN ALTER TABLE employees ADD COLUMN hourly_rate INTEGER; END IF; END $$;")
+    op.execute("DO $$ BEGIN IF NOT EXISTS (SELECT 1 FROM information_schema.columns WHERE table_name='employees' AND column_name='cost_hourly_rate') THEN ALTER TABLE employees ADD COLUMN cost_hourly_rate INTEGER; END IF; END $$;")
+    op.execute("DO $$ BEGIN IF NOT EXISTS (SELECT 1 FROM information_schema.columns WHERE table_name='employees' AND column_name='bill_hourly_rate') THEN ALTER TABLE employees ADD COLUMN bill_hourly_rate INTEGER; END IF; END $$;")
+    op.execute("DO $$ BEGIN IF NOT EXISTS (SELECT 1 FROM information_schema.columns WHERE table_name='employees' AND column_name='telegram_chat_id') THEN ALTER TABLE employees ADD COLUMN telegram_chat_id TEXT; END IF; END $$;")
+    op.execute("DO $$ BEGIN IF NOT EXISTS (SELECT 1 FROM information_schema.columns WHERE table_name='employees' AND column_name='planned_monthly_hours') THEN ALTER TABLE employees ADD COLUMN planned_monthly_hours INTEGER; END IF; END $$;")
+    # notes/reading_items/goals.user_id
+    op.execute("ALTER TABLE IF EXISTS notes ADD COLUMN IF NOT EXISTS user_id TEXT")
+    op.execute("DO $$ BEGIN IF NOT EXISTS (SELECT 1 FROM information_schema.table_constraints WHERE table_name='notes' AND constraint_name='notes_user_fk') THEN ALTER TABLE notes ADD CONSTRAINT notes_user_fk FOREIGN KEY (user_id) REFERENCES users(id); END IF; END $$;")
+    op.execute("DO $$ BEGIN IF NOT EXISTS (SELECT 1 FROM information_schema.columns WHERE table_name='notes' AND column_name='shared') THEN ALTER TABLE notes ADD COLUMN shared BOOLEAN NOT NULL DEFAULT FALSE; END IF; END $$;")
+    op.execute("ALTER TABLE IF EXISTS reading_items ADD COLUMN IF NOT EXISTS user_id TEXT")
+    op.execute("DO $$ BEGIN IF NOT EXISTS (SELECT 1 FROM information_schema.table_constraints WHERE table_name='reading_items' AND constraint_name='reading_items_user_fk') THEN ALTER TABLE reading_items ADD CONSTRAINT reading_items_user_fk FOREIGN KEY (user_id) REFERENCES users(id); END IF; END $$;")
+    op.execute("ALTER TABLE IF EXISTS goals ADD COLUMN IF NOT EXISTS user_id TEXT")
+    op.execute("DO $$ BEGIN IF NOT EXISTS (SELECT 1 FROM information_schema.table_constraints WHERE table_name='goals' AND constraint_name='goals_user_fk') THEN ALTER TABLE goals ADD CONSTRAINT goals_user_fk FOREIGN KEY (user_id) REFERENCES users(id); END IF; END $$;")
+    # unique membership
+    op.execute("CREATE UNIQUE INDEX IF NOT EXISTS uq_project_members_pair ON project_members(project_id, employee_id)")
+    # project_members additional rates
+    op.execute("DO $$ BEGIN IF NOT EXISTS (SELECT 1 FROM information_schema.columns WHERE table_name='project_members' AND column_name='hourly_rate') THEN ALTER TABLE project_members ADD COLUMN hourly_rate INTEGER; END IF; END $$;")
+    op.execute("DO $$ BEGIN IF NOT EXISTS (SELECT 1 FROM information_schema.columns WHERE table_name='project_members' AND column_name='cost_hourly_rate') THEN ALTER TABLE project_members ADD COLUMN cost_hourly_rate INTEGER; END IF; END $$;")
+    op.execute("DO $$ BEGIN IF NOT EXISTS (SELECT 1 FROM information_schema.columns WHERE table_name='project_members' AND column_name='bill_hourly_rate') THEN ALTER TABLE project_members ADD COLUMN bill_hourly_rate INTEGER; END IF; END $$;")
+    # task approval columns
+    op.execute("DO $$ BEGIN IF NOT EXISTS (SELECT 1 FROM information_schema.columns WHERE table_name='tasks' AND column_name='approved') THEN ALTER TABLE tasks ADD COLUMN approved BOOLEAN NOT NULL DEFAULT FALSE; END IF; END $$;")
+    op.execute("DO $$ BEGIN IF NOT EXISTS (SELECT 1 FROM information_schema.columns WHERE table_name='tasks' AND column_name='approved_at') THEN ALTER TABLE tasks ADD COLUMN approved_at TIMESTAMPTZ; END IF; END $$;")
+    # task rate audit and tx links
+    op.execute("DO $$ BEGIN IF NOT EXISTS (SELECT 1 FROM information_schema.columns WHERE table_name='tasks' AND column_name='hourly_rate_override') THEN ALTER TABLE tasks ADD COLUMN hourly_rate_override INTEGER; END IF; END $$;")
+    op.execute("DO $$ BEGIN IF NOT EXISTS (SELECT 1 FROM information_schema.columns WHERE table_name='tasks' AND column_name='cost_rate_override') THEN ALTER TABLE tasks ADD COLUMN cost_rate_override INTEGER; END IF; END $$;")
+    op.execute("DO $$ BEGIN IF NOT EXISTS (SELECT 1 FROM information_schema.columns WHERE table_name='tasks' AND column_name='bill_rate_override') THEN ALTER TABLE tasks ADD COLUMN bill_rate_override INTEGER; END IF; END $$;")
+    op.execute("DO $$ BEGIN IF NOT EXISTS (SELECT 1 FROM information_schema.columns WHERE table_name='tasks' AND column_name='applied_hourly_rate') THEN ALTER TABLE tasks ADD COLUMN applied_hourly_rate INTEGER; END IF; END $$;")
+    op.execute("DO $$ BEGIN IF NOT EXISTS (SELECT 1 FROM information_schema.columns WHERE table_name='tasks' AND column_name='applied_cost_rate') THEN ALTER TABLE tasks ADD COLUMN applied_cost_rate INTEGER; END IF; END $$;")
+    op.execute("DO $$ BEGIN IF NOT EXISTS (SELECT 1 FROM information_schema.columns WHERE table_name='tasks' AND column_name='applied_bill_rate') THEN ALTER TABLE tasks ADD COLUMN applied_bill_rate INTEGER; END IF; END $$;")
+    op.execute("DO $$ BEGIN IF NOT EXISTS (SELECT 1 FROM information_schema.columns WHERE table_name='tasks' AND column_name='income_tx_id') THEN ALTER TABLE tasks ADD COLUMN income_tx_id TEXT; END IF; END $$;")
+    op.execute("DO $$ BEGIN IF NOT EXISTS (SELECT 1 FROM information_schema.columns WHERE table_name='tasks' AND column_name='expense_tx_id') THEN ALTER TABLE tasks ADD COLUMN expense_tx_id TEXT; END IF; END $$;")
+    # transactions.task_id
+    op.execute("DO $$ BEGIN IF NOT EXISTS (SELECT 1 FROM information_schema.columns WHERE table_name='transactions' AND column_name='task_id') THEN ALTER TABLE transactions ADD COLUMN task_id TEXT; END IF; END $$;")
+    # user_profiles.openrouter_api_key
+    op.execute("DO $$ BEGIN IF NOT EXISTS (SELECT 1 FROM information_schema.columns WHERE table_name='user_profiles' AND column_name='openrouter_api_key') THEN ALTER TABLE user_profiles ADD COLUMN openrouter_api_key TEXT; END IF; END $$;")
+    # registration_codes.created_by_user_id
+    op.execute("DO $$ BEGIN IF NOT EXISTS (SELECT 1 FROM information_schema.columns WHERE table_name='registration_codes' AND column_name='created_by_user_id') THEN ALTER TABLE registration_codes ADD COLUMN created_by_user_id TEXT; END IF; END $$;")
+    # users.invited_by_user_id (free-form link; no FK to avoid cross-bootstrap issues)
+    op.execute("DO $$ BEGIN IF NOT EXISTS (SELECT 1 FROM information_schema.columns WHERE table_name='users' AND column_name='invited_by_user_id') THEN ALTER TABLE users ADD COLUMN invited_by_user_id TEXT; END IF; END $$;")
+    # Multitenancy: organizations and organization_id columns
+    op.execute("CREATE TABLE IF NOT EXISTS organizations (id TEXT PRIMARY KEY, name TEXT, created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP)")
+    for tbl in ('users','employees','projects','tasks','transactions'):
+        op.execute(f"DO $$ BEGIN IF NOT EXISTS (SELECT 1 FROM information_schema.columns WHERE table_name='{tbl}' AND column_name='organization_id') THEN ALTER TABLE {tbl} ADD COLUMN organization_id TEXT; END IF; END $$;")
+    # sessions: sliding expiry + index for "log out everywhere"
+    op.execute("ALTER TABLE IF EXISTS sessions ADD COLUMN IF NOT EXISTS expires_at TIMESTAMPTZ")
+    op.execute("ALTER TABLE IF EXISTS sessions ADD COLUMN IF NOT EXISTS last_seen_at TIMESTAMPTZ")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_sessions_user_id ON sessions(user_id)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_sessions_expires_at ON sessions(expires_at)")
+    # legacy sessions without expiry get a full TTL from now instead of being dropped at once
+    op.execute(
+        sa.text("UPDATE sessions SET expires_at = NOW() + make_interval(hours => :h) WHERE expires_at IS NULL")
+        .bindparams(h=int(settings.SESSION_TTL_HOURS))
+    )
+
+
+def downgrade() -> None:
+    # Baseline: nothing to go back to
+    pass
@@ -0,0 +1,35 @@
+"""backfill_progress table for resumable data backfills
+
+Revision ID: 20261016_1000
+Revises: 20261016_0900
+Create Date: 2026-10-16 10:00:00
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016_1000'
+down_revision = '20261016_0900'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS backfill_progress (
+            name TEXT PRIMARY KEY,
+            last_key TEXT,
+            rows_scanned INTEGER NOT NULL DEFAULT 0,
+            rows_updated INTEGER NOT NULL DEFAULT 0,
+            started_at TIMESTAMPTZ DEFAULT NOW(),
+            updated_at TIMESTAMPTZ DEFAULT NOW(),
+            finished_at TIMESTAMPTZ
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS backfill_progress")
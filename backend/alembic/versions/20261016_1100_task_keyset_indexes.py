@@ -0,0 +1,27 @@
+"""indexes for keyset pagination of tasks
+
+Revision ID: 20261016_1100
+Revises: 20261016_1000
+Create Date: 2026-10-16 11:00:00
+
+"""
+from alembic import op
+
+from schema import create_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016_1100'
+down_revision = '20261016_1000'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    create_index_concurrently(op, "ix_tasks_org_created", "tasks (organization_id, created_at DESC, id DESC)")
+    create_index_concurrently(op, "ix_tasks_assignee_created", "tasks (assigned_to, created_at DESC, id DESC)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_tasks_assignee_created")
+    op.execute("DROP INDEX IF EXISTS ix_tasks_org_created")
@@ -0,0 +1,25 @@
+"""index for keyset pagination of transactions
+
+Revision ID: 20261016_1200
+Revises: 20261016_1100
+Create Date: 2026-10-16 12:00:00
+
+"""
+from alembic import op
+
+from schema import create_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016_1200'
+down_revision = '20261016_1100'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    create_index_concurrently(op, "ix_transactions_org_date", "transactions (organization_id, date DESC, id DESC)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_transactions_org_date")
@@ -0,0 +1,44 @@
+"""tenant-scoping, foreign-key and open-task indexes
+
+Revision ID: 20261016_1300
+Revises: 20261016_1200
+Create Date: 2026-10-16 13:00:00
+
+"""
+from alembic import op
+
+from schema import create_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016_1300'
+down_revision = '20261016_1200'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = (
+    # списки организации
+    ("ix_employees_organization_id", "employees (organization_id)"),
+    ("ix_projects_organization_id", "projects (organization_id)"),
+    # внешние ключи: выборки по ним и проверки FK при удалении родителя
+    ("ix_tasks_project_id", "tasks (project_id)"),
+    ("ix_transactions_employee_id", "transactions (employee_id)"),
+    ("ix_transactions_project_id", "transactions (project_id)"),
+    ("ix_transactions_task_id", "transactions (task_id)"),
+    ("ix_project_members_employee_id", "project_members (employee_id)"),
+    ("ix_project_links_project_id", "project_links (project_id)"),
+    # открытые задачи по сроку (частичные: закрытые задачи в индекс не попадают)
+    ("ix_tasks_org_open_due", "tasks (organization_id, due_date) WHERE done = false"),
+    ("ix_tasks_open_due", "tasks (due_date) WHERE done = false"),
+)
+
+
+def upgrade() -> None:
+    for name, definition in INDEXES:
+        create_index_concurrently(op, name, definition)
+
+
+def downgrade() -> None:
+    for name, _ in reversed(INDEXES):
+        op.execute(f"DROP INDEX IF EXISTS {name}")
@@ -0,0 +1,32 @@
+"""collection_versions table for ETag / conditional GET of list endpoints
+
+Revision ID: 20261016_1400
+Revises: 20261016_1300
+Create Date: 2026-10-16 14:00:00
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016_1400'
+down_revision = '20261016_1300'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS collection_versions (
+            organization_id TEXT NOT NULL,
+            collection TEXT NOT NULL,
+            version BIGINT NOT NULL DEFAULT 1,
+            PRIMARY KEY (organization_id, collection)
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS collection_versions")
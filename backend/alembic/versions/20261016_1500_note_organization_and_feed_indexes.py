@@ -0,0 +1,33 @@
+"""notes.organization_id and partial indexes for the notes feed
+
+Revision ID: 20261016_1500
+Revises: 20261016_1400
+Create Date: 2026-10-16 15:00:00
+
+"""
+from alembic import op
+
+from schema import create_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016_1500'
+down_revision = '20261016_1400'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # existing rows are filled by `python backfill.py run note_org_ids`;
+    # until then the feed finds them through the owner (crud_async._note_visibility)
+    op.execute("ALTER TABLE notes ADD COLUMN IF NOT EXISTS organization_id VARCHAR REFERENCES organizations (id)")
+    create_index_concurrently(op, "ix_notes_user_date", "notes (user_id, date DESC, id DESC) WHERE user_id IS NOT NULL")
+    create_index_concurrently(
+        op, "ix_notes_org_shared_date", "notes (organization_id, date DESC, id DESC) WHERE shared = true"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_notes_org_shared_date")
+    op.execute("DROP INDEX IF EXISTS ix_notes_user_date")
+    op.execute("ALTER TABLE notes DROP COLUMN IF EXISTS organization_id")
@@ -0,0 +1,27 @@
+"""reading_items (user_id, status, added_date) index for the filtered reading list
+
+Revision ID: 20261016_1600
+Revises: 20261016_1500
+Create Date: 2026-10-16 16:00:00
+
+"""
+from alembic import op
+
+from schema import create_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016_1600'
+down_revision = '20261016_1500'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    create_index_concurrently(
+        op, "ix_reading_items_user_status_added", "reading_items (user_id, status, added_date DESC, id DESC)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_reading_items_user_status_added")
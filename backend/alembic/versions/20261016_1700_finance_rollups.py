@@ -0,0 +1,48 @@
+"""finance_rollups: monthly sums of transactions per organization, type, category and project
+
+Revision ID: 20261016_1700
+Revises: 20261016_1600
+Create Date: 2026-10-16 17:00:00
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016_1700'
+down_revision = '20261016_1600'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS finance_rollups (
+            organization_id TEXT NOT NULL,
+            month DATE NOT NULL,
+            transaction_type TEXT NOT NULL,
+            category TEXT NOT NULL,
+            project_id TEXT NOT NULL,
+            amount DOUBLE PRECISION NOT NULL DEFAULT 0,
+            tx_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (organization_id, month, transaction_type, category, project_id)
+        )
+        """
+    )
+    # начальное заполнение (одна агрегирующая выборка); дальше таблицу ведёт приложение,
+    # а расхождения чинит scripts/rebuild_finance_rollups.py
+    op.execute(
+        """
+        INSERT INTO finance_rollups (organization_id, month, transaction_type, category, project_id, amount, tx_count)
+        SELECT COALESCE(organization_id, ''), date_trunc('month', date)::date, COALESCE(transaction_type, ''),
+               COALESCE(category, ''), COALESCE(project_id, ''), SUM(amount), COUNT(*)
+        FROM transactions
+        GROUP BY 1, 2, 3, 4, 5
+        ON CONFLICT DO NOTHING
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS finance_rollups")
@@ -0,0 +1,23 @@
+"""projects.budget for project economics (budget remaining)
+
+Revision ID: 20261016_1800
+Revises: 20261016_1700
+Create Date: 2026-10-16 18:00:00
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016_1800'
+down_revision = '20261016_1700'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE projects ADD COLUMN IF NOT EXISTS budget DOUBLE PRECISION")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE projects DROP COLUMN IF EXISTS budget")
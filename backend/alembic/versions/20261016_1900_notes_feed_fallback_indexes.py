@@ -0,0 +1,32 @@
+"""indexes for the notes feed fallback: shared notes still without organization_id, users by organization
+
+Revision ID: 20261016_1900
+Revises: 20261016_1800
+Create Date: 2026-10-16 19:00:00
+
+"""
+from alembic import op
+
+from schema import create_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016_1900'
+down_revision = '20261016_1800'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # после бэкфилла note_org_ids индекс пуст, и запасная часть ленты ничего не стоит
+    create_index_concurrently(
+        op,
+        "ix_notes_legacy_shared_date",
+        "notes (date DESC, id DESC) WHERE organization_id IS NULL AND shared = true",
+    )
+    create_index_concurrently(op, "ix_users_organization_id", "users (organization_id)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_users_organization_id")
+    op.execute("DROP INDEX IF EXISTS ix_notes_legacy_shared_date")
@@ -0,0 +1,30 @@
+"""job_runs: last run of periodic jobs, so one run per interval per deployment
+
+Revision ID: 20261016_2000
+Revises: 20261016_1900
+Create Date: 2026-10-16 20:00:00
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '20261016_2000'
+down_revision = '20261016_1900'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE IF NOT EXISTS job_runs (
+            name TEXT PRIMARY KEY,
+            last_run_at TIMESTAMPTZ NOT NULL
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS job_runs")
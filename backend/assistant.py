@@ -0,0 +1,1197 @@
+"""AI assistant: LLM calls and the natural-language command engine.
+
+Imported on the first /api/ai/* request rather than at application start
+(routers/ai.py), so workers and tests that never touch the assistant do not
+pay for it.
+"""
+import os
+import re
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+
+import requests
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+import crud
+import models
+import schemas
+import stats
+from auth import Principal
+from pagination import PageParams
+from telegram_notifier import send_message
+
+OPENROUTER_BASE = "https://openrouter.ai/api/v1"
+DEFAULT_OPENROUTER_MODEL = os.environ.get("OPENROUTER_MODEL", "openai/gpt-5-nano")
+
+# Centralized OpenRouter-only LLM call (used across endpoints)
+def _llm_only_openrouter(prompt: str, key: str) -> str:
+    r = requests.post(
+        f"{OPENROUTER_BASE}/chat/completions",
+        headers={
+            "Authorization": f"Bearer {key}",
+            "HTTP-Referer": "http://localhost:8000",
+            "X-Title": "AI Life Dashboard",
+            "Content-Type": "application/json",
+        },
+        json={
+            "model": DEFAULT_OPENROUTER_MODEL,
+            "messages": [
+                {"role": "system", "content": "You are a helpful assistant."},
+                {"role": "user", "content": prompt},
+            ],
+        },
+        timeout=120,
+    )
+    if r.ok:
+        j = r.json()
+        if isinstance(j, dict) and j.get("choices"):
+            return j["choices"][0]["message"]["content"]
+    try:
+        detail = r.text[:200]
+    except Exception:
+        detail = ""
+    raise HTTPException(status_code=502, detail=f"OpenRouter error {r.status_code}: {detail}")
+
+def _call_ollama(prompt: str) -> str:
+    errors: list[str] = []
+    # 1) Ollama generate
+    try:
+        r = requests.post(
+            f"{OLLAMA_URL}/api/generate",
+            json={"model": OLLAMA_MODEL, "prompt": prompt, "stream": False},
+            timeout=120,
+        )
+        if r.ok:
+            j = r.json()
+            if isinstance(j, dict) and j.get("response"):
+                return j["response"]
+        else:
+            errors.append(f"generate {r.status_code}")
+    except Exception as e:
+        errors.append(f"generate {e}")
+
+    # 2) Ollama chat
+    try:
+        r = requests.post(
+            f"{OLLAMA_URL}/api/chat",
+            json={
+                "model": OLLAMA_MODEL,
+                "messages": [
+                    {"role": "system", "content": "You are a helpful assistant."},
+                    {"role": "user", "content": prompt},
+                ],
+                "stream": False,
+            },
+            timeout=120,
+        )
+        if r.ok:
+            j = r.json()
+            if isinstance(j, dict):
+                if j.get("message") and j["message"].get("content"):
+                    return j["message"]["content"]
+                if j.get("response"):
+                    return j["response"]
+        else:
+            errors.append(f"chat {r.status_code}")
+    except Exception as e:
+        errors.append(f"chat {e}")
+
+    # 3) OpenAI-compatible chat (LM Studio): /v1/chat/completions
+    try:
+        r = requests.post(
+            f"{OLLAMA_URL}/v1/chat/completions",
+            json={
+                "model": OLLAMA_MODEL,
+                "messages": [
+                    {"role": "system", "content": "You are a helpful assistant."},
+                    {"role": "user", "content": prompt},
+                ],
+                "stream": False,
+            },
+            timeout=120,
+        )
+        if r.ok:
+            j = r.json()
+            if isinstance(j, dict) and j.get("choices"):
+                content = j["choices"][0]["message"]["content"]
+                return content
+        else:
+            errors.append(f"v1/chat {r.status_code}")
+    except Exception as e:
+        errors.append(f"v1/chat {e}")
+
+    # 4) OpenAI-compatible completions: /v1/completions (если модель текстовая)
+    try:
+        r = requests.post(
+            f"{OLLAMA_URL}/v1/completions",
+            json={"model": OLLAMA_MODEL, "prompt": prompt, "stream": False},
+            timeout=120,
+        )
+        if r.ok:
+            j = r.json()
+            if isinstance(j, dict) and j.get("choices"):
+                return j["choices"][0]["text"]
+        else:
+            errors.append(f"v1/compl {r.status_code}")
+    except Exception as e:
+        errors.append(f"v1/compl {e}")
+
+    raise HTTPException(status_code=500, detail=f"LLM error: {'; '.join(errors) or 'unknown'}")
+
+def llm_call_for_user(prompt: str, principal: Optional[Principal]) -> str:
+    """Route strictly to OpenRouter; require per-user key."""
+    key: Optional[str] = None
+    try:
+        if principal is not None:
+            user = principal.user
+            if user and user.profile and getattr(user.profile, "openrouter_api_key", None):
+                key = user.profile.openrouter_api_key
+    except Exception:
+        key = None
+    if not key:
+        raise HTTPException(status_code=400, detail="OpenRouter API key not configured in your profile")
+    return _llm_only_openrouter(prompt, key)
+
+def _nlg(facts) -> str:
+    """Generate a human-friendly short answer from structured facts using the same LLM backend.
+    The model is instructed to use ONLY provided facts (no hallucinations). Returns plain text.
+    """
+    try:
+        import json
+        if isinstance(facts, str):
+            facts_text = facts
+        else:
+            facts_text = json.dumps(facts, ensure_ascii=False)
+        system = (
+            "Ты ассистент дашборда. Сформируй короткий, человеко‑понятный ответ на русском "
+            "по приведённым ФАКТАМ. Не выдумывай, не добавляй внешние знания."
+        )
+        prompt = f"{system}\nФАКТЫ:\n{facts_text}\nОТВЕТ:"
+        # Reuse OpenRouter for NLG when available; otherwise return facts as plain text
+        try:
+            token = auth_header.split(" ", 1)[1] if auth_header and auth_header.startswith("Bearer ") else None
+            user = crud.get_user_by_token(db, token) if (db and token) else None
+            key = user.profile.openrouter_api_key if (user and user.profile and getattr(user.profile, 'openrouter_api_key', None)) else None
+            if key:
+                out = _llm_only_openrouter(prompt, key)
+            else:
+                out = facts_text
+        except Exception:
+            out = facts_text
+        return (out or "").strip()
+    except Exception:
+        return ""
+
+def _parse_date(text: str) -> Optional[date]:
+    """Parse common Russian/ISO date expressions without LLM.
+    Supports: сегодня/завтра/послезавтра, "через N дней", dd.mm.yyyy, dd/mm/yyyy,
+    ISO yyyy-mm-dd, yyyy-mm (-> first day), yyyy.
+    """
+    t = (text or "").strip().lower()
+    if not t:
+        return None
+    today = date.today()
+    if t in ("сегодня", "today"):
+        return today
+    if t in ("завтра", "tomorrow"):
+        return today + timedelta(days=1)
+    if t in ("послезавтра",):
+        return today + timedelta(days=2)
+
+    # через N дней
+    m = re.search(r"через\s+(\d+)\s+дн", t)
+    if m:
+        try:
+            return today + timedelta(days=int(m.group(1)))
+        except Exception:
+            pass
+
+    # dd.mm.yyyy or dd/mm/yyyy
+    for sep in (".", "/"):
+        parts = t.split(sep)
+        if len(parts) == 3 and all(parts):
+            try:
+                d, mm, y = int(parts[0]), int(parts[1]), int(parts[2])
+                return date(y, mm, d)
+            except Exception:
+                pass
+
+    # ISO yyyy-mm-dd
+    try:
+        if re.match(r"^\d{4}-\d{2}-\d{2}$", t):
+            return datetime.fromisoformat(t).date()
+    except Exception:
+        pass
+
+    # yyyy-mm -> first day of month
+    m2 = re.match(r"^(\d{4})-(\d{1,2})$", t)
+    if m2:
+        try:
+            y, mm = int(m2.group(1)), int(m2.group(2))
+            return date(y, mm, 1)
+        except Exception:
+            pass
+
+    # yyyy (year only) -> Jan 1st
+    if re.match(r"^\d{4}$", t):
+        try:
+            return date(int(t), 1, 1)
+        except Exception:
+            pass
+
+    return None
+
+# Simple per-user context (in-memory)
+USER_CTX: dict[str, dict] = {}
+
+def _get_user_ctx(uid: Optional[str]) -> dict:
+    if not uid:
+        uid = "anon"
+    if uid not in USER_CTX:
+        USER_CTX[uid] = {}
+    return USER_CTX[uid]
+
+# Intents that never write; served from the read replica when available
+_AI_READ_INTENTS = {
+    "summary", "overdue", "finance",
+    "employee_info", "employee_stats", "employee_profit",
+    "project_info", "reading_list",
+}
+
+def run_command(
+    payload: schemas.AICommandRequest,
+    db: Session,
+    read_db: Session,
+    principal: Optional[Principal],
+) -> dict:
+    """Turn a free-text request into an intent via the LLM and execute it."""
+    system = (
+        "Ты помощник-оператор. Преобразуй текст пользователя в JSON с полями: "
+        "intent (add_task|update_task|toggle_task|delete_task|summary|overdue|finance|"
+        "employee_add|employee_update|employee_status|employee_delete|employee_info|employee_stats|employee_profit|"
+        "project_add|project_info|project_update|project_delete|project_add_member|project_remove_member|project_set_member_rate|project_add_link|project_remove_link|"
+        "transaction_add|transaction_update|transaction_delete|"
+        "note_add|note_update|note_delete|"
+        "reading_add|reading_update|reading_delete|reading_mark_reading|reading_mark_completed|reading_list|"
+        "goal_add|goal_update|goal_progress|goal_delete), "
+        "content, assignee, priority (L|M|H), due, project, done (true|false), name. "
+        "Для finance добавь month ('2025-08'). Для employee_* используй поля name, position, email, salary, revenue, hourly_rate (ставка/почасовка), status, status_tag, status_date. "
+        "Для project_* используй name, description, tags (list), status, start_date, end_date, employee (для member), hourly_rate (ставка). "
+        "Для transaction_* используй transaction_type, amount, date, category, description, employee, project. "
+        "Для note_* используй title, date, content, tags. Для reading_* используй title, url, item_type, status, priority, tags, notes. "
+        "Для goal_* используй title, description, period, start_date, end_date, status, progress, tags. "
+        "Для employee_profit добавь поля name и опционально month (YYYY-MM) или year (YYYY) для периода. Только JSON."
+    )
+    user = payload.query
+    uid = payload.user_id or None
+    prompt = f"{system}\nUSER: {user}\nJSON:"
+    raw = llm_call_for_user(prompt, principal)
+    # Persist user prompt if chat_id provided and user resolved
+    try:
+        uid = payload.user_id or (principal.id if principal else None)
+        if uid and payload.chat_id:
+            # ensure session belongs to user
+            s = crud.get_chat_session(db, uid, payload.chat_id)
+            if s:
+                crud.add_chat_message(db, s.id, "user", user)
+    except Exception:
+        pass
+    # «Обрезать» возможный текст до JSON
+    import json, re
+    match = re.search(r"\{[\s\S]*\}", raw)
+    data = {}
+    if match:
+        try:
+            data = json.loads(match.group(0))
+        except Exception:
+            data = {}
+    intent = (data.get("intent") or "").lower()
+    # отчёты/справки только читают — их обслуживает реплика (rdb); история чата
+    # и все записи всегда идут в основную БД (db)
+    rdb = read_db if intent in _AI_READ_INTENTS else db
+    actions: List[str] = []
+    created: List[str] = []
+    # Handle clear/cleanup and greetings early
+    low = user.strip().lower()
+    if re.match(r"^(привет|здравств|hi|hello|hey)\b", low):
+        # Let free-chat answer handle greetings: return empty actions so UI prefers chat
+        return {"result": {"summary": "", "actions": [], "created_task_ids": []}}
+    if re.search(r"\b(clear|очисти(ть)?\s+чат|очисти(ть)?\s+контекст)\b", low):
+        # Очистить in-memory контекст
+        if payload.user_id:
+            USER_CTX.pop(payload.user_id, None)
+        # При наличии chat_id — очистить историю сообщений текущей сессии на сервере
+        try:
+            uid_clear = payload.user_id or (principal.id if principal else None)
+            if uid_clear and payload.chat_id:
+                s = crud.get_chat_session(db, uid_clear, payload.chat_id)
+                if s:
+                    crud.clear_chat_messages(db, uid_clear, s.id)
+        except Exception:
+            pass
+        return {"result": {"summary": "Чат и контекст очищены", "actions": ["Очистка"], "created_task_ids": []}}
+
+    # Heuristics
+    def _extract_rate(text: str) -> Optional[int]:
+        try:
+            m = re.search(r"(?:ставк[а-я]*|почасовк[а-я]*|часов[а-я]*|руб)\s*[:\-]?\s*(\d+)", text, re.IGNORECASE)
+            if m: return int(m.group(1))
+        except Exception: pass
+        try:
+            m = re.search(r"(\d{2,5})\s*(?:руб|р\b)", text, re.IGNORECASE)
+            if m: return int(m.group(1))
+        except Exception: pass
+        return None
+
+    def _extract_priority(text: str) -> Optional[str]:
+        t = text.lower()
+        if re.search(r"высок|high|высш", t): return "H"
+        if re.search(r"средн|medium|ср", t): return "M"
+        if re.search(r"низк|low", t): return "L"
+        return None
+
+    def _extract_done(text: str) -> Optional[bool]:
+        t = text.lower()
+        if re.search(r"(выполн|заверш|сделан|готов|закрой\s+задачу)", t): return True
+        if re.search(r"(отмен[аы]\s+выполн|сними\s+галоч|не\s+выполн)", t): return False
+        return None
+
+    def _extract_month_yyyy_mm(text: str) -> Optional[str]:
+        t = text.lower()
+        months = {
+            "январ": 1, "феврал": 2, "март": 3, "апрел": 4, "ма": 5, "июн": 6, "июл": 7,
+            "август": 8, "сентябр": 9, "октябр": 10, "ноябр": 11, "декабр": 12
+        }
+        for stem, num in months.items():
+            if stem in t:
+                y = date.today().year
+                m = num
+                # try explicit year
+                my = re.search(r"(20\d{2})", t)
+                if my:
+                    y = int(my.group(1))
+                return f"{y}-{m:02d}"
+        return None
+
+    def _extract_year(text: str) -> Optional[int]:
+        try:
+            m = re.search(r"\b(20\d{2})\b", (text or ""))
+            if m:
+                return int(m.group(1))
+        except Exception:
+            pass
+        return None
+
+    def _period_from_query(text: str) -> tuple[Optional[date], Optional[date], Optional[str]]:
+        """Return (start_date, end_date, label) parsed from text by month or year. None means all time."""
+        month = _extract_month_yyyy_mm(text)
+        if month:
+            y, m = month.split("-")
+            y, m = int(y), int(m)
+            start = date(y, m, 1)
+            if m == 12:
+                end = date(y, 12, 31)
+            else:
+                end = date(y, m + 1, 1) - timedelta(days=1)
+            return start, end, f"{y}-{m:02d}"
+        yr = _extract_year(text)
+        if yr:
+            return date(yr, 1, 1), date(yr, 12, 31), str(yr)
+        return None, None, None
+
+    def _extract_item_type(text: str) -> Optional[str]:
+        t = text.lower()
+        if re.search(r"стать|article", t): return "article"
+        if re.search(r"книг|book", t): return "book"
+        if re.search(r"видео|video", t): return "video"
+        if re.search(r"подкаст|podcast", t): return "podcast"
+        if re.search(r"курс|course", t): return "course"
+        return None
+
+    def _extract_goal_period(text: str) -> Optional[str]:
+        t = text.lower()
+        if re.search(r"кварт|quarter", t): return "quarterly"
+        if re.search(r"месяц|month", t): return "monthly"
+        if re.search(r"год|year", t): return "yearly"
+        return None
+
+    def _extract_project_status(text: str) -> Optional[str]:
+        t = text.lower()
+        if re.search(r"заверш|законч|close|complete", t): return "completed"
+        if re.search(r"пауза|pause", t): return "paused"
+        if re.search(r"отмен|cancel", t): return "cancelled"
+        if re.search(r"актив|resume|start", t): return "active"
+        return None
+
+    # --- Employee info / stats ---
+    if intent in ("employee_info", "employee_stats"):
+        # resolve name or last context
+        name = data.get("name") or data.get("assignee")
+        if not name:
+            m = re.search(r"кто\s+такой\s+([^\n,]+)", user, re.IGNORECASE)
+            if m:
+                name = m.group(1).strip()
+        emp = crud.find_employee_by_name(rdb, name or "") if name else None
+        if not emp and uid:
+            ctx = _get_user_ctx(uid)
+            last_emp_id = ctx.get("last_employee_id")
+            if last_emp_id:
+                emp = rdb.query(models.Employee).filter(models.Employee.id == last_emp_id).first()
+        if not emp:
+            return {"result": {"summary": "Сотрудник не найден", "actions": [], "created_task_ids": []}}
+        # update context
+        if uid:
+            _get_user_ctx(uid)["last_employee_id"] = emp.id
+        totals = stats.employee_totals(rdb, emp)
+        if intent == "employee_info":
+            done, hours = totals["done_tasks"], totals["done_hours"]
+            facts = {
+                "action": "employee_info",
+                "name": emp.name,
+                "position": emp.position,
+                "email": emp.email or None,
+                "hourly_rate": emp.hourly_rate,
+                "salary": emp.salary,
+                "revenue": emp.revenue,
+                "status": emp.current_status,
+                "status_tag": emp.status_tag,
+                "status_date": emp.status_date.isoformat() if emp.status_date else None,
+                "done_tasks": done,
+                "done_hours": int(hours),
+            }
+            return {"result": {"summary": _nlg(facts) or f"Имя: {emp.name}\nДолжность: {emp.position}", "actions": ["Показана карточка сотрудника"], "created_task_ids": []}}
+        if intent == "employee_stats":
+            done_count, active_count = totals["done_tasks"], totals["active_tasks"]
+            hours_done, hours_active = totals["done_hours"], totals["active_hours"]
+            total_paid = totals["expense"]
+            facts = {
+                "action": "employee_stats",
+                "name": emp.name,
+                "done_tasks": done_count,
+                "active_tasks": active_count,
+                "done_hours": int(hours_done),
+                "active_hours": int(hours_active),
+                "paid_total": round(total_paid, 2),
+            }
+            return {"result": {"summary": _nlg(facts) or (f"{emp.name}: выполнено задач {done_count} (часы {hours_done:.0f}), в работе {active_count} (часы {hours_active:.0f}), начислено {total_paid:.2f} руб."), "actions": ["Показана статистика сотрудника"], "created_task_ids": []}}
+
+    if intent == "employee_profit":
+        # Resolve employee
+        name = data.get("name") or data.get("assignee")
+        emp = crud.find_employee_by_name(rdb, name or "") if name else None
+        if not emp and uid:
+            ctx = _get_user_ctx(uid)
+            last_emp_id = ctx.get("last_employee_id")
+            if last_emp_id:
+                emp = rdb.query(models.Employee).filter(models.Employee.id == last_emp_id).first()
+        if not emp:
+            return {"result": {"summary": "Сотрудник не найден", "actions": [], "created_task_ids": []}}
+        # Period
+        start, end, label = _period_from_query(user)
+        totals = stats.employee_totals(rdb, emp, start, end)
+        income, expense = totals["income"], totals["expense"]
+        profit = income - expense
+        lbl = f" за {label}" if label else ""
+        facts = {"action":"employee_profit","name":emp.name,"income":round(income,2),"expense":round(expense,2),"profit":round(profit,2),"period":label}
+        return {"result": {"summary": _nlg(facts) or f"Прибыль{lbl} по {emp.name}: {profit:.2f} руб. (выручка {income:.2f}, затраты {expense:.2f})", "actions": ["Аналитика прибыли сотрудника"], "created_task_ids": []}}
+
+    if intent == "add_task":
+        content = data.get("content") or payload.query
+        priority = (data.get("priority") or _extract_priority(user) or "M").upper()
+        if priority not in ("L","M","H"): priority = "M"
+        due = _parse_date(str(data.get("due") or "")) or _parse_date(user)
+        assignee_name = data.get("assignee")
+        assignee_id = None
+        if assignee_name:
+            emp = crud.find_employee_by_name(db, assignee_name)
+            assignee_id = emp.id if emp else None
+        project_id = None
+        # простая привязка проекта по названию
+        proj_name = data.get("project")
+        if proj_name:
+            projects = crud.get_projects(db)
+            for p in projects:
+                if proj_name.lower() in p.name.lower():
+                    project_id = p.id
+                    break
+        task = crud.create_task_simple(db, content=content, priority=priority, due_date=due, assigned_to=assignee_id, project_id=project_id)
+        # Telegram notify if assignee has linked chat
+        try:
+            if task.assigned_to:
+                emp = db.query(models.Employee).filter(models.Employee.id == task.assigned_to).first()
+                if emp and getattr(emp, 'telegram_chat_id', None):
+                    parts = [f"Новая задача: <b>{task.content}</b>"]
+                    if task.due_date:
+                        parts.append(f"Срок: {task.due_date.isoformat()}")
+                    if task.priority:
+                        parts.append(f"Приоритет: {task.priority}")
+                    if task.project_id:
+                        proj = db.query(models.Project).filter(models.Project.id == task.project_id).first()
+                        if proj:
+                            parts.append(f"Проект: {proj.name}")
+                    send_message(emp.telegram_chat_id, "\n".join(parts))
+        except Exception:
+            pass
+        actions.append(f"Создана задача: {task.content}")
+        created.append(task.id)
+        facts = {
+            "action": "task_created",
+            "content": task.content,
+            "priority": priority,
+            "due_date": task.due_date.isoformat() if task.due_date else None,
+            "assignee": assignee_name or None,
+            "project": proj_name or None,
+        }
+        summary = _nlg(facts) or f"Создана задача '{task.content}' (приоритет {priority}{', срок ' + task.due_date.isoformat() if task.due_date else ''})."
+        return {"result": {"summary": summary, "actions": actions, "created_task_ids": created}}
+
+    if intent == "summary":
+        # Guard against false positives (e.g., greeting)
+        if not re.search(r"итог|сводк|summary|за\s+сегодня|за\s+неделю|за\s+месяц", low):
+            return {"result": {"summary": "", "actions": [], "created_task_ids": []}}
+        period = (data.get("period") or "today").lower()
+        tasks = crud.get_tasks(rdb)
+        today_s = date.today().isoformat()
+        if period == "today":
+            tasks = [t for t in tasks if (t.due_date and t.due_date.isoformat()==today_s) or (t.created_at and t.created_at.date().isoformat()==today_s)]
+        facts = {"action": "tasks_summary", "count": len(tasks), "examples": [t.content for t in tasks[:10]]}
+        summary = _nlg(facts) or (f"Найдено задач: {len(tasks)}. " + "; ".join([t.content for t in tasks[:10]]))
+        return {"result": {"summary": summary, "actions": ["Сводка задач"], "created_task_ids": []}}
+
+    if intent == "overdue":
+        over = crud.list_overdue_tasks(rdb)
+        if not over:
+            return {"result": {"summary": _nlg({"action":"overdue","count":0}) or "Просроченных задач нет", "actions": ["Сводка задач"], "created_task_ids": []}}
+        lines = [f"{t.content} (срок {t.due_date.isoformat()})" for t in over[:10]]
+        facts = {"action": "overdue", "count": len(over), "items": lines}
+        summary = _nlg(facts) or ("Просроченные задачи: " + "; ".join(lines))
+        return {"result": {"summary": summary, "actions": ["Сводка задач"], "created_task_ids": []}}
+
+    if intent == "update_task":
+        # Простое обновление по содержимому
+        target = crud.find_task_by_text(db, data.get("content") or "")
+        if not target:
+            return {"result": {"summary": "Задача не найдена", "actions": [], "created_task_ids": []}}
+        # done toggle or set
+        done_hint = _extract_done(user)
+        if data.get("done") is True or done_hint is True:
+            target.done = True
+        elif data.get("done") is False or done_hint is False:
+            target.done = False
+        # update due/priority
+        d = _parse_date(str(data.get("due") or "")) or _parse_date(user)
+        if d: target.due_date = d
+        pr = (data.get("priority") or _extract_priority(user) or "").upper()
+        if pr in ("L","M","H"): target.priority = pr
+        db.commit(); db.refresh(target)
+        facts = {
+            "action": "task_updated",
+            "content": target.content,
+            "done": target.done,
+            "priority": target.priority,
+            "due_date": target.due_date.isoformat() if target.due_date else None,
+        }
+        return {"result": {"summary": _nlg(facts) or f"Обновлена задача '{target.content}'", "actions": ["Обновлена задача"], "created_task_ids": []}}
+
+    if intent == "toggle_task":
+        target = crud.find_task_by_text(db, data.get("content") or "")
+        if not target:
+            return {"result": {"summary": "Задача не найдена", "actions": [], "created_task_ids": []}}
+        crud.toggle_task(db, target.id)
+        return {"result": {"summary": f"Переключен статус задачи '{target.content}'", "actions": ["Переключен статус"], "created_task_ids": []}}
+
+    if intent == "delete_task":
+        target = crud.find_task_by_text(db, data.get("content") or "")
+        if not target:
+            return {"result": {"summary": "Задача не найдена", "actions": [], "created_task_ids": []}}
+        crud.delete_task(db, target.id)
+        return {"result": {"summary": f"Удалена задача '{target.content}'", "actions": ["Удалена задача"], "created_task_ids": []}}
+
+    if intent == "finance":
+        # month like YYYY-MM
+        month = (data.get("month") or "").strip() or (_extract_month_yyyy_mm(user) or "")
+        try:
+            y, m = month.split("-")
+            y, m = int(y), int(m)
+        except Exception:
+            today_d = date.today()
+            y, m = today_d.year, today_d.month
+        s = crud.finance_summary_month(rdb, y, m, principal.organization_id if principal else None)
+        facts = {"action": "finance_summary", "year": y, "month": m, **s}
+        summary = _nlg(facts) or f"Финансы {y}-{m:02d}: доход {s['income']:.2f}, расход {s['expense']:.2f}, баланс {s['balance']:.2f}."
+        return {"result": {"summary": summary, "actions": ["Сводка финансов"], "created_task_ids": []}}
+
+    # --- Employees ---
+    if intent == "employee_add":
+        name = data.get("name")
+        position = data.get("position") or "Specialist"
+        # Heuristic extraction from raw query
+        if isinstance(name, dict):
+            name = name.get("name") or name.get("full_name") or ""
+        if isinstance(name, list):
+            name = " ".join([str(x) for x in name])
+        if not isinstance(name, str):
+            name = str(name or "")
+        if not name.strip():
+            m = re.search(r"(?:сотрудник[а-я]*:?|имя:?|name:?|Добавь\s+сотрудника:?)\s*([A-ZА-ЯЁ][^,\n]+)", user, re.IGNORECASE)
+            if m:
+                name = m.group(1).strip().split(";")[0]
+        if not position and re.search(r"позици|должност", user, re.IGNORECASE):
+            mp = re.search(r"(?:позиция|должность)\s*[:\-]?\s*([^,\n]+)", user, re.IGNORECASE)
+            if mp:
+                position = mp.group(1).strip()
+        hr = data.get("hourly_rate")
+        if hr is None:
+            mh = re.search(r"ставк[а-я]*\s*[:\-]?\s*(\d+)", user, re.IGNORECASE)
+            if mh:
+                try: hr = int(mh.group(1))
+                except Exception: hr = None
+        if not name.strip():
+            return {"result": {"summary": "Не указано имя сотрудника", "actions": [], "created_task_ids": []}}
+        # idempotency: if employee with same name exists -> update basic fields instead of creating
+        existing_emp = crud.find_employee_by_name(db, name)
+        if existing_emp:
+            from schemas import EmployeeUpdate
+            crud.update_employee(db, existing_emp.id, EmployeeUpdate(position=position, hourly_rate=hr))
+            return {"result": {"summary": f"Сотрудник уже существует: {existing_emp.name}", "actions": ["Обновлен сотрудник"], "created_task_ids": []}}
+        from schemas import EmployeeCreate
+        status_date = _parse_date(str(data.get("status_date") or "")) or date.today()
+        emp = crud.create_employee(db, EmployeeCreate(
+            name=name.strip(),
+            position=position,
+            email=data.get("email"),
+            salary=data.get("salary"),
+            revenue=data.get("revenue"),
+            current_status=data.get("status") or "",
+            status_tag=data.get("status_tag"),
+            status_date=status_date,
+            hourly_rate=hr,
+        ))
+        return {"result": {"summary": f"Создан сотрудник {emp.name}", "actions": ["Создан сотрудник"], "created_task_ids": []}}
+
+    if intent == "employee_update":
+        target_name = data.get("name") or data.get("assignee")
+        if not target_name:
+            m = re.search(r"(?:сотрудник[а-я]*:?|имя:?|name:?|Обнови\s+сотрудника:?)\s*([A-ZА-ЯЁ][^,\n]+)", user, re.IGNORECASE)
+            if m:
+                target_name = m.group(1).strip()
+        emp = crud.find_employee_by_name(db, target_name or "") if target_name else None
+        if not emp:
+            return {"result": {"summary": "Сотрудник не найден", "actions": [], "created_task_ids": []}}
+        from schemas import EmployeeUpdate
+        hr = data.get("hourly_rate")
+        if hr is None:
+            hr = _extract_rate(user)
+        patch = EmployeeUpdate(
+            name=data.get("name"),
+            position=data.get("position"),
+            email=data.get("email"),
+            salary=data.get("salary"),
+            revenue=data.get("revenue"),
+            current_status=data.get("status"),
+            status_tag=data.get("status_tag"),
+            status_date=_parse_date(str(data.get("status_date") or "")),
+            hourly_rate=hr,
+        )
+        crud.update_employee(db, emp.id, patch)
+        return {"result": {"summary": f"Обновлен сотрудник {emp.name}", "actions": ["Обновлен сотрудник"], "created_task_ids": []}}
+
+    if intent == "employee_status":
+        target_name = data.get("name") or data.get("assignee")
+        emp = crud.find_employee_by_name(db, target_name or "") if target_name else None
+        if not emp:
+            return {"result": {"summary": "Сотрудник не найден", "actions": [], "created_task_ids": []}}
+        from schemas import EmployeeStatusUpdate
+        crud.update_employee_status(db, emp.id, EmployeeStatusUpdate(current_status=data.get("status") or "", status_tag=data.get("status_tag")))
+        return {"result": {"summary": f"Статус обновлен для {emp.name}", "actions": ["Обновлен статус"], "created_task_ids": []}}
+
+    if intent == "employee_delete":
+        target_name = data.get("name") or data.get("assignee")
+        emp = crud.find_employee_by_name(db, target_name or "") if target_name else None
+        if not emp:
+            return {"result": {"summary": "Сотрудник не найден", "actions": [], "created_task_ids": []}}
+        crud.delete_employee(db, emp.id)
+        return {"result": {"summary": f"Удален сотрудник {emp.name}", "actions": ["Удален сотрудник"], "created_task_ids": []}}
+
+    # --- Projects ---
+    if intent == "project_add":
+        from schemas import ProjectCreate
+        name = data.get("name") or data.get("project")
+        # if model returned structured object for name, coerce to string
+        if isinstance(name, dict):
+            # common cases: {"name":"..."} or {"title":"..."}
+            name = name.get("name") or name.get("title") or ""
+        if isinstance(name, list):
+            name = " ".join([str(x) for x in name])
+        if not isinstance(name, str):
+            name = str(name or "")
+        # normalize
+        def _norm(s: str) -> str:
+            return " ".join((s or "").split()).strip().lower()
+        if not _norm(name):
+            mp = re.search(r"(?:проект)\s*:?\s*([^,\n]+)", user, re.IGNORECASE)
+            if mp:
+                name = mp.group(1).strip()
+        if not _norm(name):
+            return {"result": {"summary": "Не указан проект", "actions": [], "created_task_ids": []}}
+        # idempotency: reuse existing project with the same name (case-insensitive, normalized spaces)
+        nname = _norm(name)
+        for p in crud.get_projects(db):
+            if _norm(p.name) == nname:
+                return {"result": {"summary": f"Проект уже существует: {p.name}", "actions": [], "created_task_ids": []}}
+        tags = data.get("tags") or []
+        proj = crud.create_project(db, ProjectCreate(
+            name=name.strip(),
+            description=data.get("description"),
+            tags=tags,
+            status=data.get("status") or "active",
+            start_date=_parse_date(str(data.get("start_date") or "")),
+            end_date=_parse_date(str(data.get("end_date") or "")),
+        ))
+        return {"result": {"summary": f"Создан проект {proj.name}", "actions": ["Создан проект"], "created_task_ids": []}}
+
+    if intent == "project_info":
+        # find by content/name like
+        query_name = data.get("name") or data.get("content") or data.get("project") or ""
+        pid = None; project = None
+        if query_name:
+            for p in crud.get_projects(rdb):
+                if query_name.lower() in p.name.lower():
+                    project = p; pid = p.id; break
+        if not project:
+            mp = re.search(r"(?:проект)\s*:?\s*([^,\n]+)", user, re.IGNORECASE)
+            if mp:
+                qn = mp.group(1).strip()
+                for p in crud.get_projects(rdb):
+                    if qn.lower() in p.name.lower():
+                        project = p; pid = p.id; break
+        if not project:
+            return {"result": {"summary": "Проект не найден", "actions": [], "created_task_ids": []}}
+        # gather details
+        tasks = rdb.query(models.Task).filter(models.Task.project_id == pid).all()
+        done = sum(1 for t in tasks if t.done)
+        open_t = sum(1 for t in tasks if not t.done)
+        links = [l.title for l in (project.links or []) if getattr(l, 'title', None)]
+        facts = {
+            "action": "project_info",
+            "name": project.name,
+            "status": project.status,
+            "start_date": project.start_date.isoformat() if project.start_date else None,
+            "end_date": project.end_date.isoformat() if project.end_date else None,
+            "tags": list(getattr(project, 'tags', []) or []),
+            "members": len(getattr(project, 'member_ids', []) or []),
+            "tasks_open": open_t,
+            "tasks_done": done,
+            "links": links[:5],
+        }
+        return {"result": {"summary": _nlg(facts) or f"Проект {project.name}: статус {project.status}, задач в работе {open_t}, завершено {done}.", "actions": ["Информация о проекте"], "created_task_ids": []}}
+
+    if intent in ("project_update", "project_delete", "project_add_member", "project_remove_member", "project_set_member_rate", "project_add_link", "project_remove_link"):
+        # helper find project by name contains
+        proj_name = data.get("name") or data.get("project") or ""
+        project_id = None
+        if proj_name:
+            for p in crud.get_projects(db):
+                if proj_name.lower() in p.name.lower():
+                    project_id = p.id
+                    break
+        if not project_id:
+            # try phrase like "в проекте {Name}"
+            mp = re.search(r"в\s+проекте\s+([^,\n]+)", user, re.IGNORECASE)
+            if mp:
+                pn = mp.group(1).strip()
+                for p in crud.get_projects(db):
+                    if pn.lower() in p.name.lower():
+                        project_id = p.id
+                        break
+        if not project_id:
+            return {"result": {"summary": "Проект не найден", "actions": [], "created_task_ids": []}}
+
+        if intent == "project_update":
+            from schemas import ProjectUpdate
+            tags = data.get("tags")
+            crud.update_project(db, project_id, ProjectUpdate(
+                name=data.get("name"),
+                description=data.get("description"),
+                tags=tags,
+                status=data.get("status"),
+                start_date=_parse_date(str(data.get("start_date") or "")),
+                end_date=_parse_date(str(data.get("end_date") or "")),
+            ))
+            return {"result": {"summary": "Проект обновлен", "actions": ["Обновлен проект"], "created_task_ids": []}}
+
+        if intent == "project_delete":
+            crud.delete_project(db, project_id)
+            return {"result": {"summary": "Проект удален", "actions": ["Удален проект"], "created_task_ids": []}}
+
+        if intent == "project_add_member":
+            emp_name = data.get("employee") or data.get("assignee")
+            emp = crud.find_employee_by_name(db, emp_name or "") if emp_name else None
+            if not emp:
+                return {"result": {"summary": "Сотрудник не найден", "actions": [], "created_task_ids": []}}
+            crud.add_project_member(db, project_id, emp.id)
+            return {"result": {"summary": "Участник добавлен в проект", "actions": ["Добавлен участник"], "created_task_ids": []}}
+
+        if intent == "project_remove_member":
+            emp_name = data.get("employee") or data.get("assignee")
+            emp = crud.find_employee_by_name(db, emp_name or "") if emp_name else None
+            if not emp:
+                return {"result": {"summary": "Сотрудник не найден", "actions": [], "created_task_ids": []}}
+            crud.remove_project_member(db, project_id, emp.id)
+            return {"result": {"summary": "Участник удален из проекта", "actions": ["Удален участник"], "created_task_ids": []}}
+
+        if intent == "project_set_member_rate":
+            emp_name = data.get("employee") or data.get("assignee")
+            emp = crud.find_employee_by_name(db, emp_name or "") if emp_name else None
+            if not emp:
+                return {"result": {"summary": "Сотрудник не найден", "actions": [], "created_task_ids": []}}
+            rate = data.get("hourly_rate")
+            if rate is None:
+                rate = _extract_rate(user)
+            crud.set_project_member_rate(db, project_id, emp.id, int(rate) if rate is not None else None)
+            return {"result": {"summary": "Ставка участника обновлена", "actions": ["Обновлена ставка"], "created_task_ids": []}}
+
+        if intent == "project_add_link":
+            from schemas import ProjectLinkAdd
+            title = data.get("title") or (data.get("link") or "")
+            url = data.get("url")
+            link_type = data.get("link_type") or "other"
+            if not (title and url):
+                return {"result": {"summary": "Нужны title и url для ссылки", "actions": [], "created_task_ids": []}}
+            crud.add_project_link(db, project_id, ProjectLinkAdd(title=title, url=url, link_type=link_type))
+            return {"result": {"summary": "Ссылка добавлена к проекту", "actions": ["Добавлена ссылка"], "created_task_ids": []}}
+
+        if intent == "project_remove_link":
+            # По заголовку находим ссылку
+            title = data.get("title") or (data.get("link") or "")
+            if not title:
+                return {"result": {"summary": "Укажите title ссылки", "actions": [], "created_task_ids": []}}
+            # прямой поиск через ORM
+            link = (
+                db.query(models.ProjectLink)
+                .filter(models.ProjectLink.project_id == project_id)
+                .filter(models.ProjectLink.title.ilike(f"%{title}%"))
+                .first()
+            )
+            if not link:
+                return {"result": {"summary": "Ссылка не найдена", "actions": [], "created_task_ids": []}}
+            crud.remove_project_link(db, project_id, link.id)
+            return {"result": {"summary": "Ссылка удалена", "actions": ["Удалена ссылка"], "created_task_ids": []}}
+
+    # --- Transactions ---
+    if intent in ("transaction_add", "transaction_update", "transaction_delete"):
+        # helper: resolve employee/project by name
+        emp_id = None
+        proj_id = None
+        if data.get("employee"):
+            emp = crud.find_employee_by_name(db, data.get("employee"))
+            emp_id = emp.id if emp else None
+        if data.get("project"):
+            for p in crud.get_projects(db):
+                if data.get("project").lower() in p.name.lower():
+                    proj_id = p.id
+                    break
+        if intent == "transaction_add":
+            from schemas import TransactionCreate
+            tx_type = data.get("transaction_type")
+            if not tx_type:
+                if re.search(r"доход|прибыл|выручк", user, re.IGNORECASE): tx_type = "income"
+                elif re.search(r"расход|убыт|трат", user, re.IGNORECASE): tx_type = "expense"
+            amount = data.get("amount")
+            if amount is None:
+                ma = re.search(r"([0-9]+(?:[\.,][0-9]+)?)", user)
+                if ma:
+                    try: amount = float(ma.group(1).replace(',', '.'))
+                    except Exception: amount = 0.0
+            tx_date = _parse_date(str(data.get("date") or "")) or _parse_date(user) or date.today()
+            tx = crud.create_transaction(db, TransactionCreate(
+                transaction_type=tx_type or "expense",
+                amount=float(amount or 0),
+                date=tx_date,
+                category=data.get("category") or ("Выручка" if (tx_type or "") == "income" else None),
+                description=data.get("description") or user,
+                tags=data.get("tags") or [],
+                employee_id=emp_id,
+                project_id=proj_id,
+            ), organization_id=principal.organization_id if principal else None)
+            return {"result": {"summary": f"Транзакция добавлена ({tx.transaction_type} {tx.amount:.2f})", "actions": ["Добавлена транзакция"], "created_task_ids": []}}
+        # find transaction by description contains (fallback)
+        target = None
+        if data.get("description"):
+            target = (
+                db.query(models.Transaction)
+                .filter(models.Transaction.description.ilike(f"%{data.get('description')}%"))
+                .first()
+            )
+        if not target:
+            return {"result": {"summary": "Транзакция не найдена", "actions": [], "created_task_ids": []}}
+        if intent == "transaction_update":
+            from schemas import TransactionUpdate
+            crud.update_transaction(db, target.id, TransactionUpdate(
+                transaction_type=data.get("transaction_type"),
+                amount=float(data.get("amount")) if data.get("amount") is not None else None,
+                date=_parse_date(str(data.get("date") or "")) or _parse_date(user),
+                category=data.get("category"),
+                description=data.get("description"),
+                tags=data.get("tags"),
+                employee_id=emp_id,
+                project_id=proj_id,
+            ))
+            return {"result": {"summary": "Транзакция обновлена", "actions": ["Обновлена транзакция"], "created_task_ids": []}}
+        if intent == "transaction_delete":
+            crud.delete_transaction(db, target.id)
+            return {"result": {"summary": "Транзакция удалена", "actions": ["Удалена транзакция"], "created_task_ids": []}}
+
+    # --- Notes ---
+    if intent in ("note_add", "note_update", "note_delete"):
+        from schemas import NoteCreate, NoteUpdate
+        if intent == "note_add":
+            # Heuristic: title after first colon in phrase containing 'замет'
+            title = data.get("title")
+            if not title and re.search(r"замет", user, re.IGNORECASE):
+                m = re.search(r"замет[^:]*:\s*([^\n]+)", user, re.IGNORECASE)
+                if m: title = m.group(1).strip()
+            n = crud.create_note(db, NoteCreate(
+                date=_parse_date(str(data.get("date") or "")) or _parse_date(user) or date.today(),
+                title=title,
+                content=data.get("content") or "",
+                tags=data.get("tags") or [],
+            ), user_id=principal.id if principal else None,
+               organization_id=principal.organization_id if principal else None)
+            return {"result": {"summary": f"Заметка добавлена{': ' + (n.title or '')}", "actions": ["Добавлена заметка"], "created_task_ids": []}}
+        # find by title contains
+        target = None
+        if data.get("title"):
+            target = (
+                db.query(models.Note)
+                .filter(models.Note.title.isnot(None))
+                .filter(models.Note.title.ilike(f"%{data.get('title')}%"))
+                .first()
+            )
+        if not target:
+            return {"result": {"summary": "Заметка не найдена", "actions": [], "created_task_ids": []}}
+        if intent == "note_update":
+            crud.update_note(db, target.id, NoteUpdate(
+                date=_parse_date(str(data.get("date") or "")) or _parse_date(user),
+                title=data.get("title"),
+                content=data.get("content"),
+                tags=data.get("tags"),
+            ))
+            return {"result": {"summary": "Заметка обновлена", "actions": ["Обновлена заметка"], "created_task_ids": []}}
+        if intent == "note_delete":
+            crud.delete_note(db, target.id)
+            return {"result": {"summary": "Заметка удалена", "actions": ["Удалена заметка"], "created_task_ids": []}}
+
+    # --- Reading ---
+    if intent in ("reading_list", "reading_add", "reading_update", "reading_delete", "reading_mark_reading", "reading_mark_completed"):
+        if intent == "reading_list":
+            # optional status filter from content (to_read/reading/completed)
+            status = None
+            m = re.search(r"\b(to_read|reading|completed|archived|читаю|просьба|прочитан)\b", user, re.IGNORECASE)
+            if m:
+                st = m.group(1).lower()
+                mapru = {"читаю": "reading", "прочитан": "completed"}
+                status = mapru.get(st, st)
+            # тот же запрос, что GET /api/reading: фильтр и первые 10 — в SQL
+            filters = schemas.ReadingFilters(status=status)
+            reader = principal.id if principal else uid
+            items, _ = crud.list_reading_items(rdb, reader, filters, PageParams(limit=10), fields=("title",))
+            count = crud.count_reading_items(rdb, reader, filters)
+            examples = [i.title for i in items if i.title]
+            facts = {"action": "reading_list", "count": count, "examples": examples, "status": status}
+            return {"result": {"summary": _nlg(facts) or (f"В списке чтения {count} элементов: " + "; ".join(examples)), "actions": ["Список чтения"], "created_task_ids": []}}
+        from schemas import ReadingItemCreate, ReadingItemUpdate
+        if intent == "reading_add":
+            item_type = data.get("item_type") or _extract_item_type(user) or "article"
+            pr = (data.get("priority") or _extract_priority(user) or "M").upper()
+            it = crud.create_reading_item(db, ReadingItemCreate(
+                title=data.get("title") or (data.get("content") or "Элемент чтения"),
+                url=data.get("url"),
+                content=data.get("content"),
+                item_type=item_type,
+                status=data.get("status") or "to_read",
+                priority=pr,
+                tags=data.get("tags") or [],
+                added_date=_parse_date(str(data.get("added_date") or "")) or _parse_date(user) or date.today(),
+                completed_date=_parse_date(str(data.get("completed_date") or "")),
+                notes=data.get("notes"),
+            ))
+            return {"result": {"summary": _nlg({"action":"reading_add","title":it.title}) or f"Добавлено в чтение: {it.title}", "actions": ["Добавлен элемент чтения"], "created_task_ids": []}}
+        # find by title contains
+        items = crud.get_reading_items(db)
+        target = None
+        title = data.get("title") or data.get("content")
+        if title:
+            for it in items:
+                if it.title and title.lower() in it.title.lower():
+                    target = it
+                    break
+        if not target:
+            return {"result": {"summary": "Элемент чтения не найден", "actions": [], "created_task_ids": []}}
+        if intent == "reading_update":
+            crud.update_reading_item(db, target.id, ReadingItemUpdate(
+                title=data.get("title"),
+                url=data.get("url"),
+                content=data.get("content"),
+                item_type=data.get("item_type") or _extract_item_type(user),
+                status=data.get("status"),
+                priority=data.get("priority") or _extract_priority(user),
+                tags=data.get("tags"),
+                added_date=_parse_date(str(data.get("added_date") or "")) or _parse_date(user),
+                completed_date=_parse_date(str(data.get("completed_date") or "")),
+                notes=data.get("notes"),
+            ))
+            return {"result": {"summary": "Элемент чтения обновлен", "actions": ["Обновлен элемент чтения"], "created_task_ids": []}}
+        if intent == "reading_mark_reading":
+            crud.mark_reading_item_as_reading(db, target.id)
+            return {"result": {"summary": "Отмечено как читается", "actions": ["Изменен статус чтения"], "created_task_ids": []}}
+        if intent == "reading_mark_completed":
+            crud.mark_reading_item_as_completed(db, target.id, data.get("notes"))
+            return {"result": {"summary": "Отмечено как прочитано", "actions": ["Завершено чтение"], "created_task_ids": []}}
+        if intent == "reading_delete":
+            crud.delete_reading_item(db, target.id)
+            return {"result": {"summary": "Элемент чтения удален", "actions": ["Удален элемент чтения"], "created_task_ids": []}}
+
+    # --- Goals ---
+    if intent in ("goal_add", "goal_update", "goal_progress", "goal_delete"):
+        from schemas import GoalCreate, GoalUpdate
+        # helpers to sanitize LLM outputs
+        def _as_str(v) -> Optional[str]:
+            if v is None:
+                return None
+            if isinstance(v, str):
+                return v
+            if isinstance(v, (int, float)):
+                return str(v)
+            if isinstance(v, list):
+                # join first few scalar parts
+                parts = [str(x) for x in v if isinstance(x, (str, int, float))]
+                return " ".join(parts) if parts else None
+            if isinstance(v, dict):
+                for key in ("title", "name", "text", "value"):
+                    if key in v and isinstance(v[key], (str, int, float)):
+                        return str(v[key])
+                # fallback: first scalar value
+                for x in v.values():
+                    if isinstance(x, (str, int, float)):
+                        return str(x)
+            return None
+        def _as_list_str(v) -> list[str]:
+            if v is None:
+                return []
+            if isinstance(v, list):
+                out = []
+                for x in v:
+                    s = _as_str(x)
+                    if s:
+                        out.append(s)
+                return out
+            s = _as_str(v)
+            return [s] if s else []
+        if intent == "goal_add":
+            period = data.get("period") or _extract_goal_period(user) or "quarterly"
+            title = _as_str(data.get("title")) or _as_str(data.get("content")) or "Цель"
+            description = _as_str(data.get("description"))
+            tags = _as_list_str(data.get("tags"))
+            prog_raw = data.get("progress")
+            try:
+                progress_val = int(prog_raw) if prog_raw not in (None, "", []) else 0
+            except Exception:
+                progress_val = 0
+            try:
+                g = crud.create_goal(db, GoalCreate(
+                    title=title,
+                    description=description,
+                    period=period,
+                    start_date=_parse_date(str(data.get("start_date") or "")) or _parse_date(user) or date.today(),
+                    end_date=_parse_date(str(data.get("end_date") or "")) or date.today(),
+                    status=_as_str(data.get("status")) or "active",
+                    progress=progress_val,
+                    tags=tags,
+                ))
+            except Exception as e:
+                return {"result": {"summary": f"Не удалось создать цель: {e}", "actions": [], "created_task_ids": []}}
+            return {"result": {"summary": f"Добавлена цель: {g.title}", "actions": ["Добавлена цель"], "created_task_ids": []}}
+        # find by title
+        goals = crud.get_goals(db)
+        target = None
+        title = data.get("title") or data.get("content")
+        if title:
+            for g in goals:
+                if g.title and title.lower() in g.title.lower():
+                    target = g
+                    break
+        if not target:
+            return {"result": {"summary": "Цель не найдена", "actions": [], "created_task_ids": []}}
+        if intent == "goal_update":
+            try:
+                crud.update_goal(db, target.id, GoalUpdate(
+                    title=_as_str(data.get("title")),
+                    description=_as_str(data.get("description")),
+                    period=data.get("period") or _extract_goal_period(user),
+                    start_date=_parse_date(str(data.get("start_date") or "")) or _parse_date(user),
+                    end_date=_parse_date(str(data.get("end_date") or "")) or _parse_date(user),
+                    status=_as_str(data.get("status")),
+                    progress=(int(data.get("progress")) if isinstance(data.get("progress"), (int, str)) and str(data.get("progress")).strip() != "" else None),
+                    tags=_as_list_str(data.get("tags")),
+                ))
+            except Exception as e:
+                return {"result": {"summary": f"Не удалось обновить цель: {e}", "actions": [], "created_task_ids": []}}
+            return {"result": {"summary": "Цель обновлена", "actions": ["Обновлена цель"], "created_task_ids": []}}
+        if intent == "goal_progress":
+            try:
+                prog = int(data.get("progress"))
+            except Exception:
+                prog = None
+            if prog is None:
+                return {"result": {"summary": "Укажите прогресс (0-100)", "actions": [], "created_task_ids": []}}
+            crud.update_goal_progress(db, target.id, prog)
+            return {"result": {"summary": f"Прогресс цели обновлен до {prog}%", "actions": ["Обновлен прогресс"], "created_task_ids": []}}
+        if intent == "goal_delete":
+            crud.delete_goal(db, target.id)
+            return {"result": {"summary": "Цель удалена", "actions": ["Удалена цель"], "created_task_ids": []}}
+
+    # Heuristic: employee stats/profit questions without explicit intent (last referenced employee)
+    try:
+        t = user.lower()
+        if re.search(r"сколько\s+задач|итоги\s+задач", t) or re.search(r"сколько\s+час", t) or re.search(r"сколько\s+(денег|получил|начислено)", t):
+            ctx = _get_user_ctx(payload.user_id) if payload.user_id else {}
+            emp_id = ctx.get("last_employee_id")
+            if emp_id:
+                emp = db.query(models.Employee).filter(models.Employee.id == emp_id).first()
+                if emp:
+                    totals = stats.employee_totals(db, emp)
+                    summary = (
+                        f"{emp.name}: выполнено задач {totals['done_tasks']} (часы {totals['done_hours']:.0f}), "
+                        f"в работе {totals['active_tasks']} (часы {totals['active_hours']:.0f}), "
+                        f"начислено {totals['expense']:.2f} руб."
+                    )
+                    return {"result": {"summary": summary, "actions": ["Показана статистика сотрудника (эвристика)"] , "created_task_ids": []}}
+        # Profit heuristic
+        if re.search(r"прибыл|маржин|выручк", t):
+            ctx = _get_user_ctx(payload.user_id) if payload.user_id else {}
+            emp_id = ctx.get("last_employee_id")
+            if emp_id:
+                emp = db.query(models.Employee).filter(models.Employee.id == emp_id).first()
+                if emp:
+                    start, end, label = _period_from_query(user)
+                    totals = stats.employee_totals(db, emp, start, end)
+                    income, expense = totals["income"], totals["expense"]
+                    profit = income - expense
+                    lbl = f" за {label}" if label else ""
+                    return {"result": {"summary": f"Прибыль{lbl} по {emp.name}: {profit:.2f} руб. (выручка {income:.2f}, затраты {expense:.2f})", "actions": ["Аналитика прибыли сотрудника (эвристика)"] , "created_task_ids": []}}
+    except Exception:
+        pass
+
+    # fallback: просто эхо-ответ
+    # Save assistant summary to chat if available
+    try:
+        uid = payload.user_id or (principal.id if principal else None)
+        if uid and payload.chat_id:
+            s = crud.get_chat_session(db, uid, payload.chat_id)
+            if s:
+                crud.add_chat_message(db, s.id, "assistant", (raw or "").strip()[:4000])
+    except Exception:
+        pass
+    return {"result": {"summary": raw.strip()[:800], "actions": [], "created_task_ids": []}}
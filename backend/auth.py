@@ -0,0 +1,138 @@
+from typing import Optional
+
+from fastapi import Depends, Header, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+import crud
+import crud_async
+import models
+from database import get_async_db, get_db
+
+ADMIN_ROLES = ("owner", "admin")
+
+
+class Principal:
+    """Authenticated caller, resolved once per request.
+
+    id/role/organization_id/employee_id come from the token snapshot and never
+    touch the database; `user` and `employee` are loaded on first access when
+    the snapshot was served from cache. Async handlers get a principal without
+    a sync session and load those rows through crud_async instead.
+    """
+
+    def __init__(
+        self,
+        db: Optional[Session],
+        token: str,
+        snapshot: crud.TokenSnapshot,
+        user: Optional[models.User] = None,
+        employee: Optional[models.Employee] = None,
+    ):
+        self._db = db
+        self.token = token
+        self.id = snapshot.user_id
+        self.role = snapshot.role
+        self.organization_id = snapshot.organization_id
+        self.employee_id = snapshot.employee_id
+        self._user = user
+        self._employee = employee
+
+    @property
+    def is_admin(self) -> bool:
+        return self.role in ADMIN_ROLES
+
+    def _session(self, attr: str) -> Session:
+        if self._db is None:
+            raise RuntimeError(
+                f"Principal.{attr} needs a sync session: async handlers load it through crud_async"
+            )
+        return self._db
+
+    @property
+    def user(self) -> models.User:
+        if self._user is None:
+            self._user = self._session("user").get(models.User, self.id)
+        return self._user
+
+    @property
+    def employee(self) -> Optional[models.Employee]:
+        if self._employee is None and self.employee_id:
+            self._employee = self._session("employee").get(models.Employee, self.employee_id)
+        return self._employee
+
+
+def bearer_token(authorization: Optional[str]) -> Optional[str]:
+    if not authorization or not authorization.startswith("Bearer "):
+        return None
+    return authorization.split(" ", 1)[1]
+
+
+def resolve_principal(db: Session, token: Optional[str]) -> Optional[Principal]:
+    if not token:
+        return None
+    snap = crud.cached_token_snapshot(token)
+    if snap is not None:
+        return Principal(db, token, snap)
+    row = crud.load_token_owner(db, token)
+    if not row:
+        return None
+    user, employee, sess = row
+    snap = crud.remember_token(token, user, employee, sess)
+    return Principal(db, token, snap, user=user, employee=employee)
+
+
+def get_optional_principal(authorization: Optional[str] = Header(None), db: Session = Depends(get_db)) -> Optional[Principal]:
+    """Caller if a valid Bearer token was sent, otherwise None (for endpoints that degrade to empty results)."""
+    return resolve_principal(db, bearer_token(authorization))
+
+
+def get_principal(principal: Optional[Principal] = Depends(get_optional_principal)) -> Principal:
+    if principal is None:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    return principal
+
+
+def require_admin(principal: Principal = Depends(get_principal)) -> Principal:
+    """Owner or admin of the organization."""
+    if not principal.is_admin:
+        raise HTTPException(status_code=403, detail="Forbidden")
+    return principal
+
+
+def require_member(principal: Principal = Depends(get_principal)) -> Principal:
+    """Owner/admin, or a regular user linked to an employee card."""
+    if not principal.is_admin and not principal.employee_id:
+        raise HTTPException(status_code=403, detail="Forbidden")
+    return principal
+
+
+# --- async (asyncpg) variants for `async def` endpoints ---
+async def resolve_principal_async(db: AsyncSession, token: Optional[str]) -> Optional[Principal]:
+    if not token:
+        return None
+    snap = crud.cached_token_snapshot(token)
+    if snap is not None:
+        return Principal(None, token, snap)
+    row = await crud_async.load_token_owner(db, token)
+    if not row:
+        return None
+    user, employee, sess = row
+    snap = crud.remember_token(token, user, employee, sess)
+    return Principal(None, token, snap, user=user, employee=employee)
+
+
+async def get_optional_principal_async(authorization: Optional[str] = Header(None), db: AsyncSession = Depends(get_async_db)) -> Optional[Principal]:
+    return await resolve_principal_async(db, bearer_token(authorization))
+
+
+async def get_principal_async(principal: Optional[Principal] = Depends(get_optional_principal_async)) -> Principal:
+    if principal is None:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    return principal
+
+
+async def require_admin_async(principal: Principal = Depends(get_principal_async)) -> Principal:
+    if not principal.is_admin:
+        raise HTTPException(status_code=403, detail="Forbidden")
+    return principal
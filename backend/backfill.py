@@ -0,0 +1,233 @@
+"""Resumable, batched data backfills.
+
+Each backfill walks its table in primary-key order (keyset pagination on id),
+updating at most `batch_size` rows per short transaction and recording the
+last processed id in backfill_progress, so a run can be interrupted and
+resumed, and a finished backfill is never repeated. Runs outside the web
+workers:
+
+    python backfill.py status
+    python backfill.py run [name ...] [--batch-size 1000] [--sleep 0.05]
+    python backfill.py reset name
+"""
+import argparse
+import time
+from typing import Callable, Optional
+
+from sqlalchemy import text
+
+import crud
+from database import engine
+
+
+class Backfill:
+    def __init__(
+        self,
+        name: str,
+        table: str,
+        update_sql: str,
+        description: str = "",
+        after_batch: Optional[Callable] = None,
+    ):
+        # update_sql receives :ids (the batch) and must only touch rows still needing the fix;
+        # after_batch(conn, result) runs in the batch transaction (e.g. for what ORM hooks would do)
+        self.name = name
+        self.table = table
+        self.update_sql = text(update_sql)
+        self.description = description
+        self.after_batch = after_batch
+        self.scan_sql = text(
+            f"SELECT id FROM {table} WHERE (CAST(:after AS TEXT) IS NULL OR id > :after) ORDER BY id LIMIT :n"
+        )
+
+
+BACKFILLS: dict[str, Backfill] = {}
+
+
+def register(backfill: Backfill) -> Backfill:
+    BACKFILLS[backfill.name] = backfill
+    return backfill
+
+
+register(Backfill(
+    "task_approvals",
+    "tasks",
+    """
+    UPDATE tasks SET approved = TRUE, approved_at = COALESCE(approved_at, CURRENT_TIMESTAMP)
+    WHERE id = ANY(:ids) AND done = TRUE AND approved IS NULL
+    """,
+    "Legacy completed tasks count as approved",
+))
+
+def _move_transaction_rollups(conn, result) -> None:
+    # raw UPDATE bypasses crud's after_flush hooks: move the sums from organization ''
+    # to the real one and bump the organizations' transactions version (ETag, economics cache)
+    deltas: dict = {}
+    orgs = set()
+    for tx in result:
+        if not tx.organization_id:
+            continue
+        values = (tx.date, tx.transaction_type, tx.category, tx.project_id, tx.amount)
+        crud.add_rollup_delta(deltas, (None, *values), -1)
+        crud.add_rollup_delta(deltas, (tx.organization_id, *values), 1)
+        orgs.add(tx.organization_id)
+    crud.apply_rollup_deltas(conn, deltas)
+    for org in sorted(orgs):
+        crud.bump_collection_versions(conn, org, "transactions")
+
+
+register(Backfill(
+    "transaction_org_ids",
+    "transactions",
+    """
+    UPDATE transactions SET organization_id = COALESCE(
+        (SELECT organization_id FROM tasks WHERE tasks.id = transactions.task_id),
+        (SELECT organization_id FROM employees WHERE employees.id = transactions.employee_id)
+    )
+    WHERE id = ANY(:ids) AND organization_id IS NULL
+    RETURNING organization_id, date, transaction_type, category, project_id, amount
+    """,
+    "transactions.organization_id from the linked task, else from the employee",
+    after_batch=_move_transaction_rollups,
+))
+
+register(Backfill(
+    "note_org_ids",
+    "notes",
+    """
+    UPDATE notes SET organization_id = (SELECT organization_id FROM users WHERE users.id = notes.user_id)
+    WHERE id = ANY(:ids) AND organization_id IS NULL AND user_id IS NOT NULL
+    """,
+    "notes.organization_id from the owner (shared notes are visible within that organization)",
+))
+
+
+def _progress(conn, name: str):
+    conn.execute(
+        text("INSERT INTO backfill_progress (name) VALUES (:name) ON CONFLICT (name) DO NOTHING"),
+        {"name": name},
+    )
+    return conn.execute(
+        text("SELECT last_key, finished_at FROM backfill_progress WHERE name = :name"),
+        {"name": name},
+    ).first()
+
+
+def run(
+    name: str,
+    batch_size: int = 1000,
+    sleep: float = 0.0,
+    max_batches: Optional[int] = None,
+    log: Callable[[str], None] = print,
+) -> bool:
+    """Run (or resume) one backfill. Returns True when it is finished."""
+    bf = BACKFILLS[name]
+    # session-level advisory lock on a dedicated connection: one runner per backfill
+    with engine.connect() as lock_conn:
+        got = lock_conn.execute(text("SELECT pg_try_advisory_lock(hashtext(:k))"), {"k": f"backfill:{name}"}).scalar()
+        lock_conn.commit()
+        if not got:
+            log(f"{name}: already running elsewhere, skipped")
+            return False
+        try:
+            with engine.begin() as conn:
+                last_key, finished_at = _progress(conn, name)
+            if finished_at:
+                log(f"{name}: already finished")
+                return True
+            batches = 0
+            while max_batches is None or batches < max_batches:
+                with engine.begin() as conn:
+                    ids = [r[0] for r in conn.execute(bf.scan_sql, {"after": last_key, "n": batch_size})]
+                    if not ids:
+                        conn.execute(
+                            text("UPDATE backfill_progress SET finished_at = NOW(), updated_at = NOW() WHERE name = :name"),
+                            {"name": name},
+                        )
+                        log(f"{name}: finished")
+                        return True
+                    result = conn.execute(bf.update_sql, {"ids": ids})
+                    updated = result.rowcount or 0
+                    if bf.after_batch:
+                        bf.after_batch(conn, result)
+                    last_key = ids[-1]
+                    conn.execute(
+                        text(
+                            "UPDATE backfill_progress SET last_key = :k, rows_scanned = rows_scanned + :s, "
+                            "rows_updated = rows_updated + :u, updated_at = NOW() WHERE name = :name"
+                        ),
+                        {"k": last_key, "s": len(ids), "u": updated, "name": name},
+                    )
+                batches += 1
+                log(f"{name}: batch {batches}, {len(ids)} scanned, {updated} updated")
+                if sleep:
+                    time.sleep(sleep)
+            return False
+        finally:
+            lock_conn.execute(text("SELECT pg_advisory_unlock(hashtext(:k))"), {"k": f"backfill:{name}"})
+            lock_conn.commit()
+
+
+def run_pending(batch_size: int = 1000, sleep: float = 0.0, log: Callable[[str], None] = print) -> None:
+    for name in BACKFILLS:
+        run(name, batch_size=batch_size, sleep=sleep, log=log)
+
+
+def status() -> list[dict]:
+    with engine.connect() as conn:
+        rows = {
+            r.name: r
+            for r in conn.execute(text(
+                "SELECT name, last_key, rows_scanned, rows_updated, updated_at, finished_at FROM backfill_progress"
+            ))
+        }
+    out = []
+    for name, bf in BACKFILLS.items():
+        r = rows.get(name)
+        out.append({
+            "name": name,
+            "description": bf.description,
+            "state": "finished" if r and r.finished_at else ("in progress" if r else "pending"),
+            "rows_scanned": r.rows_scanned if r else 0,
+            "rows_updated": r.rows_updated if r else 0,
+            "last_key": r.last_key if r else None,
+            "updated_at": r.updated_at if r else None,
+        })
+    return out
+
+
+def reset(name: str) -> None:
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM backfill_progress WHERE name = :name"), {"name": name})
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Resumable data backfills")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_run = sub.add_parser("run", help="run pending backfills (all, or the named ones)")
+    p_run.add_argument("names", nargs="*", metavar="name")
+    p_run.add_argument("--batch-size", type=int, default=1000)
+    p_run.add_argument("--sleep", type=float, default=0.0, help="pause between batches, seconds")
+    sub.add_parser("status", help="show progress")
+    p_reset = sub.add_parser("reset", help="forget progress so the backfill runs again")
+    p_reset.add_argument("name", choices=list(BACKFILLS))
+    args = parser.parse_args(argv)
+
+    if args.cmd == "run":
+        unknown = [n for n in args.names if n not in BACKFILLS]
+        if unknown:
+            parser.error(f"unknown backfill: {', '.join(unknown)} (known: {', '.join(BACKFILLS)})")
+        if not args.names:
+            run_pending(batch_size=args.batch_size, sleep=args.sleep)
+        for name in args.names:
+            run(name, batch_size=args.batch_size, sleep=args.sleep)
+    elif args.cmd == "status":
+        for row in status():
+            print(f"{row['name']:<24} {row['state']:<12} scanned={row['rows_scanned']} updated={row['rows_updated']}")
+    elif args.cmd == "reset":
+        reset(args.name)
+        print(f"{args.name}: reset")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Conditional GET for organization collections (ETag / If-None-Match -> 304).
+
+The ETag of a list response is derived from the organization's collection
+version (collection_versions, bumped by every write, see crud.py), the caller
+and the query string, so checking it is one primary-key lookup: on a match the
+endpoint answers 304 before loading any rows. Responses are marked
+`private, no-cache`, i.e. the browser keeps them but revalidates every time.
+"""
+import hashlib
+from typing import Optional
+
+from fastapi import Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import crud_async
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def collection_etag(collection: str, version: Optional[int], request: Request, principal) -> Optional[str]:
+    """Strong ETag for `collection` as seen by `principal` with this query string (None: no caching)."""
+    if version is None:
+        return None
+    # одна и та же версия даёт разные тела для разных пользователей/фильтров
+    vary = f"{principal.id}|{principal.role}|{principal.employee_id}|{request.url.query}"
+    digest = hashlib.sha1(vary.encode("utf-8")).hexdigest()[:16]
+    return f'"{collection}.{version}.{digest}"'
+
+
+def is_not_modified(request: Request, etag: Optional[str]) -> bool:
+    if not etag:
+        return False
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    # If-None-Match uses weak comparison: W/"x" matches "x"
+    candidates = {t.strip().removeprefix("W/") for t in header.split(",")}
+    return etag in candidates or "*" in candidates
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+
+def set_etag(response: Response, etag: Optional[str]) -> None:
+    if etag:
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = CACHE_CONTROL
+
+
+async def check_collection(
+    db: AsyncSession, collection: str, request: Request, response: Response, principal
+) -> Optional[Response]:
+    """304 response if the client's copy is current; otherwise sets the ETag on `response` and returns None."""
+    version = await crud_async.collection_version(db, principal.organization_id, collection)
+    etag = collection_etag(collection, version, request, principal)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+    return None
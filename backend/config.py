@@ -13,13 +13,57 @@ class Settings:
     POSTGRES_DB: str = os.getenv("POSTGRES_DB", "dashboard_db")
     POSTGRES_HOST: str = os.getenv("POSTGRES_HOST", "localhost")
     POSTGRES_PORT: str = os.getenv("POSTGRES_PORT", "5432")
+    # Пул соединений (на каждый воркер uvicorn): всего до DB_POOL_SIZE + DB_MAX_OVERFLOW соединений
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    # 0 — без ограничения
+    DB_STATEMENT_TIMEOUT_MS: int = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+    # "session" — прямое подключение / PgBouncer session pooling; "transaction" — PgBouncer transaction pooling
+    DB_POOL_MODE: str = os.getenv("DB_POOL_MODE", "session").strip().lower()
+    # Реплика только для чтения (списки/отчёты); пусто — всё читается с основной БД
+    DATABASE_REPLICA_URL: str | None = os.getenv("DATABASE_REPLICA_URL") or None
+    REPLICA_MAX_LAG_SECONDS: float = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+    REPLICA_CHECK_INTERVAL_SECONDS: float = float(os.getenv("REPLICA_CHECK_INTERVAL_SECONDS", "5"))
+    # После записи клиент столько секунд читает с основной БД (read-your-writes)
+    READ_YOUR_WRITES_SECONDS: float = float(os.getenv("READ_YOUR_WRITES_SECONDS", "10"))
     # Плановые рабочие часы в месяц для авторасчёта себестоимости часа из зарплаты
     PLANNED_MONTHLY_HOURS: int = int(os.getenv("PLANNED_MONTHLY_HOURS", "160"))
+    # GET /api/dashboard/bootstrap: включённые модули (через запятую), размер первых страниц
+    # и сколько модулей грузится параллельно (каждый — своё соединение из пула)
+    DASHBOARD_MODULES: list[str] = [
+        m.strip()
+        for m in os.getenv(
+            "DASHBOARD_MODULES", "me,employees,projects,tasks,transactions,finance,goals,notes,reading"
+        ).split(",")
+        if m.strip()
+    ]
+    DASHBOARD_PAGE_SIZE: int = int(os.getenv("DASHBOARD_PAGE_SIZE", "20"))
+    DASHBOARD_CONCURRENCY: int = int(os.getenv("DASHBOARD_CONCURRENCY", "4"))
     # Telegram bot
     TELEGRAM_BOT_TOKEN: str | None = os.getenv("TELEGRAM_BOT_TOKEN")
     TELEGRAM_WEBHOOK_SECRET: str = os.getenv("TELEGRAM_WEBHOOK_SECRET", "changeme-secret")
     TELEGRAM_WEBHOOK_URL: str | None = os.getenv("TELEGRAM_WEBHOOK_URL")
-    
+    # Кэш токен -> пользователь (в памяти процесса, отдельно на каждый воркер)
+    AUTH_CACHE_TTL_SECONDS: float = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "30"))
+    AUTH_CACHE_MAX_SIZE: int = int(os.getenv("AUTH_CACHE_MAX_SIZE", "10000"))
+    # Кэш экономики проектов (в памяти процесса); сбрасывается версиями коллекций при любой записи
+    ECONOMICS_CACHE_TTL_SECONDS: float = float(os.getenv("ECONOMICS_CACHE_TTL_SECONDS", "300"))
+    ECONOMICS_CACHE_MAX_SIZE: int = int(os.getenv("ECONOMICS_CACHE_MAX_SIZE", "1000"))
+    # Сессии: срок жизни (скользящий), как часто продлевать и чистить просроченные
+    SESSION_TTL_HOURS: float = float(os.getenv("SESSION_TTL_HOURS", "720"))
+    SESSION_TOUCH_INTERVAL_MINUTES: float = float(os.getenv("SESSION_TOUCH_INTERVAL_MINUTES", "15"))
+    SESSION_PURGE_INTERVAL_MINUTES: float = float(os.getenv("SESSION_PURGE_INTERVAL_MINUTES", "60"))
+    SESSION_PURGE_BATCH_SIZE: int = int(os.getenv("SESSION_PURGE_BATCH_SIZE", "1000"))
+    # 0 — не запускать поток очистки в этом процессе (её выполнит другой воркер или cron)
+    SESSION_PURGE_ENABLED: bool = os.getenv("SESSION_PURGE_ENABLED", "1").strip().lower() not in ("0", "false", "no", "off")
+    # Режим авторизации: "session" (токен = строка в sessions) или "signed"
+    # (короткоживущий подписанный access-токен + refresh-токен = сессия в БД)
+    AUTH_MODE: str = os.getenv("AUTH_MODE", "session").strip().lower()
+    AUTH_TOKEN_SECRET: str | None = os.getenv("AUTH_TOKEN_SECRET")
+    ACCESS_TOKEN_TTL_MINUTES: float = float(os.getenv("ACCESS_TOKEN_TTL_MINUTES", "15"))
+
     # Альтернативная конструкция URL если отдельные параметры
     @property
     def db_url(self) -> str:
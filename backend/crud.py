@@ -1,15 +1,26 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, func
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy import and_, cast, event, func, or_, select, text, update
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm.attributes import set_committed_value
 from typing import List, Optional
+from dataclasses import dataclass
 import uuid
-from datetime import date, datetime
+from datetime import date, datetime, timedelta, timezone
 import hashlib
 import os
 import math
 
 import models
 import schemas
+import tokens
+from cache import TTLCache
 from config import settings
+from pagination import PageParams, keyset, split_page
+from serialization import schema_columns
+
+if settings.AUTH_MODE == "signed" and not settings.AUTH_TOKEN_SECRET:
+    raise RuntimeError("AUTH_MODE=signed requires AUTH_TOKEN_SECRET")
 
 def generate_id() -> str:
     """Generate unique ID for entities"""
@@ -157,18 +168,185 @@ def create_user(db: Session, email: str, password: str, role: str = "user", name
 def verify_password(user: models.User, password: str) -> bool:
     return user.password_hash == hash_password(password, user.password_salt)
 
+def _session_ttl() -> timedelta:
+    return timedelta(hours=settings.SESSION_TTL_HOURS)
+
 def create_session(db: Session, user_id: str) -> str:
     token = uuid.uuid4().hex + uuid.uuid4().hex
-    db_sess = models.Session(token=token, user_id=user_id)
+    now = datetime.now(timezone.utc)
+    db_sess = models.Session(token=token, user_id=user_id, last_seen_at=now, expires_at=now + _session_ttl())
     db.add(db_sess)
     db.commit()
     return token
 
+def touch_session(db: Session, sess: models.Session) -> None:
+    """Slide the session expiry forward; writes at most once per SESSION_TOUCH_INTERVAL_MINUTES."""
+    now = datetime.now(timezone.utc)
+    if sess.last_seen_at and now - sess.last_seen_at < timedelta(minutes=settings.SESSION_TOUCH_INTERVAL_MINUTES):
+        return
+    expires_at = now + _session_ttl()
+    # separate short transaction: committing the request session would expire the freshly loaded user
+    with db.get_bind().begin() as conn:
+        conn.execute(
+            update(models.Session)
+            .where(models.Session.token == sess.token)
+            .values(last_seen_at=now, expires_at=expires_at)
+        )
+    set_committed_value(sess, "last_seen_at", now)
+    set_committed_value(sess, "expires_at", expires_at)
+
+def delete_user_sessions(db: Session, user_id: str) -> int:
+    """Log a user out everywhere."""
+    invalidate_user_tokens(user_id)
+    n = db.query(models.Session).filter(models.Session.user_id == user_id).delete(synchronize_session=False)
+    db.commit()
+    return n
+
+def purge_expired_sessions(db: Session, batch_size: Optional[int] = None) -> int:
+    """Delete expired sessions in small batches so the purge never holds long locks."""
+    batch_size = batch_size or settings.SESSION_PURGE_BATCH_SIZE
+    stmt = text(
+        "DELETE FROM sessions WHERE token IN ("
+        "SELECT token FROM sessions WHERE expires_at < :now LIMIT :n)"
+    )
+    total = 0
+    while True:
+        deleted = db.execute(stmt, {"now": datetime.now(timezone.utc), "n": batch_size}).rowcount or 0
+        db.commit()
+        total += deleted
+        if deleted < batch_size:
+            return total
+
+# --- Token -> user snapshot cache ---
+@dataclass(frozen=True)
+class TokenSnapshot:
+    user_id: str
+    role: str
+    organization_id: Optional[str]
+    employee_id: Optional[str]
+    expires_at: Optional[datetime] = None
+
+_token_cache = TTLCache(maxsize=settings.AUTH_CACHE_MAX_SIZE, ttl=settings.AUTH_CACHE_TTL_SECONDS)
+
+def load_token_owner(db: Session, token: str) -> Optional[tuple[models.User, Optional[models.Employee], models.Session]]:
+    """Session -> User (+ profile) -> Employee in a single joined query; expired sessions are ignored."""
+    if tokens.is_signed_token(token):
+        return None
+    row = (
+        db.query(models.User, models.Employee, models.Session)
+        .join(models.Session, models.Session.user_id == models.User.id)
+        .outerjoin(models.Employee, models.Employee.user_id == models.User.id)
+        .options(joinedload(models.User.profile))
+        .filter(models.Session.token == token, models.Session.expires_at > datetime.now(timezone.utc))
+        .first()
+    )
+    if row:
+        touch_session(db, row[2])
+    return row
+
+def cached_token_snapshot(token: str) -> Optional[TokenSnapshot]:
+    """Snapshot available without a query: the in-process cache, or the claims of a signed access token."""
+    if not token:
+        return None
+    if tokens.is_signed_token(token):
+        return signed_token_snapshot(token)
+    return _token_cache.get(token)
+
+def _make_snapshot(user: models.User, employee: Optional[models.Employee], sess: Optional[models.Session] = None) -> TokenSnapshot:
+    return TokenSnapshot(
+        user_id=user.id,
+        role=user.role,
+        organization_id=user.organization_id,
+        employee_id=employee.id if employee else None,
+        expires_at=sess.expires_at if sess else None,
+    )
+
+def remember_token(token: str, user: models.User, employee: Optional[models.Employee], sess: Optional[models.Session] = None) -> TokenSnapshot:
+    snap = _make_snapshot(user, employee, sess)
+    ttl = None
+    if snap.expires_at is not None:
+        # never serve a token from cache past its session expiry
+        ttl = min(_token_cache.ttl, (snap.expires_at - datetime.now(timezone.utc)).total_seconds())
+    _token_cache.set(token, snap, ttl=ttl)
+    return snap
+
+def get_token_snapshot(db: Session, token: str) -> Optional[TokenSnapshot]:
+    """Resolve a session token to (user id, role, organization, employee id).
+    Served from the in-process cache when possible; otherwise one joined query.
+    """
+    if not token:
+        return None
+    snap = cached_token_snapshot(token)
+    if snap is not None:
+        return snap
+    row = load_token_owner(db, token)
+    if not row:
+        return None
+    return remember_token(token, *row)
+
+# --- Signed access tokens (AUTH_MODE=signed) ---
+# Claims are trusted until `exp`: role/organization changes, logout and password
+# changes reach signed tokens only after ACCESS_TOKEN_TTL_MINUTES.
+def issue_access_token(snap: TokenSnapshot) -> str:
+    claims = {
+        "sub": snap.user_id,
+        "role": snap.role,
+        "org": snap.organization_id,
+        "emp": snap.employee_id,
+    }
+    return tokens.sign_token(claims, settings.AUTH_TOKEN_SECRET, settings.ACCESS_TOKEN_TTL_MINUTES * 60)
+
+def signed_token_snapshot(token: str) -> Optional[TokenSnapshot]:
+    if settings.AUTH_MODE != "signed":
+        return None
+    claims = tokens.verify_token(token, settings.AUTH_TOKEN_SECRET)
+    if not claims or not claims.get("sub"):
+        return None
+    return TokenSnapshot(
+        user_id=claims["sub"],
+        role=claims.get("role"),
+        organization_id=claims.get("org"),
+        employee_id=claims.get("emp"),
+        expires_at=datetime.fromtimestamp(claims["exp"], timezone.utc),
+    )
+
+def issue_auth_tokens(db: Session, user: models.User) -> dict:
+    """Token fields of AuthResponse: a session token, or in signed mode an access token plus the session as refresh token."""
+    session_token = create_session(db, user.id)
+    if settings.AUTH_MODE != "signed":
+        return {"token": session_token}
+    employee = db.query(models.Employee).filter(models.Employee.user_id == user.id).first()
+    return {
+        "token": issue_access_token(_make_snapshot(user, employee)),
+        "refresh_token": session_token,
+        "expires_in": int(settings.ACCESS_TOKEN_TTL_MINUTES * 60),
+    }
+
+def refresh_auth_tokens(db: Session, refresh_token: str) -> Optional[dict]:
+    """New access token for a live session (also slides the session expiry)."""
+    row = load_token_owner(db, refresh_token) if refresh_token else None
+    if not row:
+        return None
+    return {
+        "token": issue_access_token(_make_snapshot(*row)),
+        "refresh_token": refresh_token,
+        "expires_in": int(settings.ACCESS_TOKEN_TTL_MINUTES * 60),
+    }
+
+def invalidate_token(token: str) -> None:
+    _token_cache.pop(token)
+
+def invalidate_user_tokens(user_id: Optional[str]) -> None:
+    """Forget cached snapshots of every token of a user (after role/profile/password/employee changes)."""
+    if user_id:
+        _token_cache.discard_where(lambda _token, snap: snap.user_id == user_id)
+
 def get_user_by_token(db: Session, token: str) -> Optional[models.User]:
-    sess = db.query(models.Session).filter(models.Session.token == token).first()
-    if not sess:
+    snap = get_token_snapshot(db, token)
+    if not snap:
         return None
-    return db.query(models.User).filter(models.User.id == sess.user_id).first()
+    # Session.get() hits the identity map when the same request resolves the token twice
+    return db.get(models.User, snap.user_id)
 
 # Link user to employee (create if missing)
 def ensure_employee_for_user(db: Session, user: models.User, first_name: Optional[str], last_name: Optional[str]) -> models.Employee:
@@ -191,6 +369,7 @@ def ensure_employee_for_user(db: Session, user: models.User, first_name: Optiona
     )
     db.add(emp)
     db.commit()
+    invalidate_user_tokens(user.id)
     return emp
 
 # --- Chat sessions/messages ---
@@ -259,6 +438,186 @@ def clear_chat_messages(db: Session, user_id: str, session_id: str) -> bool:
     db.commit()
     return True
 
+# --- Per-organization collection versions (ETag of list endpoints) ---
+# Every flush that inserts/updates/deletes a row of a listed collection bumps
+# (organization_id, collection) in collection_versions, in the same transaction.
+# Bulk query.update()/delete() and raw SQL bypass the ORM: call
+# bump_collection_versions() next to them.
+VERSIONED_COLLECTIONS = {
+    models.Task: "tasks",
+    models.Transaction: "transactions",
+    models.Employee: "employees",
+    models.Project: "projects",
+}
+# дочерние строки, попадающие в выдачу родительской коллекции
+_PROJECT_CHILDREN = (models.ProjectMember, models.ProjectLink)
+
+_BUMP_VERSION_SQL = text(
+    "INSERT INTO collection_versions (organization_id, collection, version) VALUES (:org, :collection, 1) "
+    "ON CONFLICT (organization_id, collection) DO UPDATE SET version = collection_versions.version + 1"
+)
+
+def _bump(conn, pairs) -> None:
+    # sorted: concurrent writers lock the version rows in the same order
+    for org, collection in sorted(p for p in pairs if p[0]):
+        conn.execute(_BUMP_VERSION_SQL, {"org": org, "collection": collection})
+
+def bump_collection_versions(db, organization_id: Optional[str], *collections: str) -> None:
+    """db: Session, or the Connection a raw UPDATE ran on (same transaction)."""
+    conn = db.connection() if isinstance(db, Session) else db
+    _bump(conn, {(organization_id, c) for c in collections})
+
+def _bump_flushed_collections(session: Session, flush_context) -> None:
+    # after_flush: new/dirty/deleted and attribute history still describe this flush
+    pairs: set = set()
+    project_ids: set = set()
+    avatar_user_ids: set = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if obj in session.dirty and not session.is_modified(obj, include_collections=False):
+            continue
+        collection = VERSIONED_COLLECTIONS.get(type(obj))
+        if collection:
+            history = sa_inspect(obj).attrs.organization_id.history
+            for org in (*history.unchanged, *history.added, *history.deleted):
+                pairs.add((org, collection))
+        elif isinstance(obj, _PROJECT_CHILDREN):
+            project_ids.add(obj.project_id)
+        elif isinstance(obj, models.UserProfile):
+            avatar_user_ids.add(obj.user_id)  # avatar_url is part of the employee list
+    if not (pairs or project_ids or avatar_user_ids):
+        return
+    conn = session.connection()
+    if project_ids:
+        orgs = conn.execute(text("SELECT organization_id FROM projects WHERE id = ANY(:ids)"), {"ids": list(project_ids)})
+        pairs.update((org, "projects") for (org,) in orgs)
+    if avatar_user_ids:
+        orgs = conn.execute(text("SELECT organization_id FROM users WHERE id = ANY(:ids)"), {"ids": list(avatar_user_ids)})
+        pairs.update((org, "employees") for (org,) in orgs)
+    _bump(conn, pairs)
+
+event.listen(Session, "after_flush", _bump_flushed_collections)
+
+# --- Monthly finance rollups (finance_rollups) ---
+# Sums and counts of transactions per (organization, month, type, category,
+# project), changed in the same transaction as the transactions themselves:
+# every flush turns inserted/updated/deleted Transaction rows into deltas.
+# Bulk query.update()/delete() and raw SQL bypass the ORM: adjust the rollups
+# next to them (see delete_project) or repair with
+# scripts/rebuild_finance_rollups.py.
+_ROLLUP_FIELDS = ("organization_id", "date", "transaction_type", "category", "project_id", "amount")
+_ROLLUP_KEY = "organization_id, month, transaction_type, category, project_id"
+
+_ADD_ROLLUP_SQL = text(
+    f"INSERT INTO finance_rollups ({_ROLLUP_KEY}, amount, tx_count) "
+    "VALUES (:org, :month, :type, :category, :project, :amount, :n) "
+    f"ON CONFLICT ({_ROLLUP_KEY}) DO UPDATE SET amount = finance_rollups.amount + EXCLUDED.amount, "
+    "tx_count = finance_rollups.tx_count + EXCLUDED.tx_count"
+)
+# deleted project: its transactions keep their sums under project ''
+_DETACH_PROJECT_ROLLUPS_SQL = text(
+    f"""
+    WITH moved AS (
+        DELETE FROM finance_rollups WHERE project_id = :project
+        RETURNING organization_id, month, transaction_type, category, amount, tx_count
+    )
+    INSERT INTO finance_rollups ({_ROLLUP_KEY}, amount, tx_count)
+    SELECT organization_id, month, transaction_type, category, '', amount, tx_count FROM moved
+    ON CONFLICT ({_ROLLUP_KEY}) DO UPDATE SET amount = finance_rollups.amount + EXCLUDED.amount,
+        tx_count = finance_rollups.tx_count + EXCLUDED.tx_count
+    """
+)
+_REBUILD_ROLLUPS_SQL = (
+    f"INSERT INTO finance_rollups ({_ROLLUP_KEY}, amount, tx_count) "
+    "SELECT COALESCE(organization_id, ''), date_trunc('month', date)::date, COALESCE(transaction_type, ''), "
+    "COALESCE(category, ''), COALESCE(project_id, ''), SUM(amount), COUNT(*) FROM transactions {where} "
+    "GROUP BY 1, 2, 3, 4, 5"
+)
+
+def _rollup_values(state, old: bool) -> tuple:
+    # attribute history of this flush: committed values (old) or the ones just written
+    values = []
+    for field in _ROLLUP_FIELDS:
+        history = state.attrs[field].history
+        current = (history.deleted or history.unchanged) if old else (history.added or history.unchanged)
+        values.append(current[0] if current else None)
+    return tuple(values)
+
+def add_rollup_delta(deltas: dict, values: tuple, sign: int) -> None:
+    """Accumulate one transaction, values in _ROLLUP_FIELDS order, into `deltas` (+1 added, -1 removed)."""
+    org, day, tx_type, category, project_id, amount = values
+    if day is None:
+        return
+    key = (org or "", day.replace(day=1), tx_type or "", category or "", project_id or "")
+    total, n = deltas.get(key, (0.0, 0))
+    deltas[key] = (total + sign * float(amount or 0), n + sign)
+
+def apply_rollup_deltas(conn, deltas: dict) -> None:
+    """Add accumulated deltas to finance_rollups on `conn` (the transaction of the change itself)."""
+    changes = [(key, d) for key, d in deltas.items() if d != (0.0, 0)]
+    # sorted: concurrent writers lock the rollup rows in the same order
+    for (org, month, tx_type, category, project_id), (amount, n) in sorted(changes):
+        conn.execute(_ADD_ROLLUP_SQL, {
+            "org": org, "month": month, "type": tx_type, "category": category,
+            "project": project_id, "amount": amount, "n": n,
+        })
+
+def _roll_up_flushed_transactions(session: Session, flush_context) -> None:
+    deltas: dict = {}
+    for obj in session.new:
+        if isinstance(obj, models.Transaction):
+            add_rollup_delta(deltas, _rollup_values(sa_inspect(obj), old=False), 1)
+    for obj in session.deleted:
+        if isinstance(obj, models.Transaction):
+            add_rollup_delta(deltas, _rollup_values(sa_inspect(obj), old=True), -1)
+    for obj in session.dirty:
+        if isinstance(obj, models.Transaction) and session.is_modified(obj, include_collections=False):
+            state = sa_inspect(obj)
+            before, after = _rollup_values(state, old=True), _rollup_values(state, old=False)
+            if before != after:
+                add_rollup_delta(deltas, before, -1)
+                add_rollup_delta(deltas, after, 1)
+    if any(d != (0.0, 0) for d in deltas.values()):
+        apply_rollup_deltas(session.connection(), deltas)
+
+event.listen(Session, "after_flush", _roll_up_flushed_transactions)
+
+def rebuild_finance_rollups(db: Session, organization_id: Optional[str] = None) -> int:
+    """Recompute finance_rollups from transactions (all, or one organization); returns the row count.
+
+    Runs in the caller's transaction and locks finance_rollups against writers
+    until it commits, so rollup deltas of concurrent writes are not lost.
+    """
+    conn = db.connection()
+    conn.execute(text("LOCK TABLE finance_rollups IN EXCLUSIVE MODE"))
+    if organization_id is None:
+        conn.execute(text("DELETE FROM finance_rollups"))
+        result = conn.execute(text(_REBUILD_ROLLUPS_SQL.format(where="")))
+    else:
+        params = {"org": organization_id}
+        conn.execute(text("DELETE FROM finance_rollups WHERE organization_id = :org"), params)
+        result = conn.execute(text(_REBUILD_ROLLUPS_SQL.format(where="WHERE COALESCE(organization_id, '') = :org")), params)
+    return result.rowcount
+
+def finance_month_statement(organization_id: Optional[str], year: int, month: int):
+    """Per-type sums of one month from finance_rollups (a few rows of one primary-key range)."""
+    R = models.FinanceRollup
+    return (
+        select(R.transaction_type, func.sum(R.amount), func.sum(R.tx_count))
+        .where(R.organization_id == (organization_id or ""), R.month == date(year, month, 1))
+        .group_by(R.transaction_type)
+    )
+
+def finance_month_totals(rows) -> dict:
+    """finance_month_statement rows -> income/expense/balance/count."""
+    sums = {tx_type: (float(amount or 0), int(n or 0)) for tx_type, amount, n in rows}
+    income, expense = sums.get("income", (0.0, 0))[0], sums.get("expense", (0.0, 0))[0]
+    return {
+        "income": round(income, 2),
+        "expense": round(expense, 2),
+        "balance": round(income - expense, 2),
+        "count": sum(n for _, n in sums.values()),
+    }
+
 # Employee CRUD
 def get_employees(db: Session) -> List[models.Employee]:
     return db.query(models.Employee).order_by(models.Employee.created_at.desc()).all()
@@ -316,32 +675,44 @@ def delete_employee(db: Session, employee_id: str) -> bool:
         # 2) Nullify references in tasks and transactions
         db.query(models.Task).filter(models.Task.assigned_to == employee_id).update({models.Task.assigned_to: None}, synchronize_session=False)
         db.query(models.Transaction).filter(models.Transaction.employee_id == employee_id).update({models.Transaction.employee_id: None}, synchronize_session=False)
+        bump_collection_versions(db, db_employee.organization_id, "projects", "tasks", "transactions")
         db.flush()
 
         # 3) Finally delete the employee
+        linked_user_id = db_employee.user_id
         db.delete(db_employee)
         db.commit()
+        invalidate_user_tokens(linked_user_id)
         return True
     except Exception:
         db.rollback()
         raise
 
 # Project CRUD
-def get_projects(db: Session) -> List[models.Project]:
-    projects = db.query(models.Project).all()
-    # Add member_ids and member_rates to each project
+def project_load_options():
+    """Eager loads for everything schemas.Project serializes: 3 queries for any number of projects."""
+    return (selectinload(models.Project.links), selectinload(models.Project.members))
+
+def fill_member_maps(projects: List[models.Project]) -> List[models.Project]:
+    """member_ids and the rate maps the Project schema exposes, in one pass over members."""
     for project in projects:
-        project.member_ids = [m.employee_id for m in project.members]
+        member_ids = []
         # legacy single-rate map (treated as bill rate in old UI)
-        project.member_rates = {m.employee_id: m.hourly_rate for m in project.members}
-        # new detailed maps
-        project.member_cost_rates = {m.employee_id: m.cost_hourly_rate for m in project.members}
-        project.member_bill_rates = {
-            m.employee_id: (m.bill_hourly_rate if m.bill_hourly_rate is not None else m.hourly_rate)
-            for m in project.members
-        }
+        rates, cost_rates, bill_rates = {}, {}, {}
+        for m in project.members:
+            member_ids.append(m.employee_id)
+            rates[m.employee_id] = m.hourly_rate
+            cost_rates[m.employee_id] = m.cost_hourly_rate
+            bill_rates[m.employee_id] = m.bill_hourly_rate if m.bill_hourly_rate is not None else m.hourly_rate
+        project.member_ids = member_ids
+        project.member_rates = rates
+        project.member_cost_rates = cost_rates
+        project.member_bill_rates = bill_rates
     return projects
 
+def get_projects(db: Session) -> List[models.Project]:
+    return fill_member_maps(db.query(models.Project).options(*project_load_options()).all())
+
 # Scoping helpers
 def list_projects_for_user(db: Session, user: models.User) -> List[models.Project]:
     if user.role in ("owner", "admin"):
@@ -352,19 +723,12 @@ def list_projects_for_user(db: Session, user: models.User) -> List[models.Projec
         return []
     projects = (
         db.query(models.Project)
+        .options(*project_load_options())
         .join(models.ProjectMember, models.ProjectMember.project_id == models.Project.id)
         .filter(models.ProjectMember.employee_id == emp.id)
         .all()
     )
-    for project in projects:
-        project.member_ids = [m.employee_id for m in project.members]
-        project.member_rates = {m.employee_id: m.hourly_rate for m in project.members}
-        project.member_cost_rates = {m.employee_id: m.cost_hourly_rate for m in project.members}
-        project.member_bill_rates = {
-            m.employee_id: (m.bill_hourly_rate if m.bill_hourly_rate is not None else m.hourly_rate)
-            for m in project.members
-        }
-    return projects
+    return fill_member_maps(projects)
 
 def list_tasks_for_user(db: Session, user: models.User) -> List[models.Task]:
     if user.role in ("owner", "admin"):
@@ -381,15 +745,14 @@ def list_tasks_for_user(db: Session, user: models.User) -> List[models.Task]:
     )
 
 def get_project(db: Session, project_id: str) -> Optional[models.Project]:
-    project = db.query(models.Project).filter(models.Project.id == project_id).first()
+    project = (
+        db.query(models.Project)
+        .options(*project_load_options())
+        .filter(models.Project.id == project_id)
+        .first()
+    )
     if project:
-        project.member_ids = [m.employee_id for m in project.members]
-        project.member_rates = {m.employee_id: m.hourly_rate for m in project.members}
-        project.member_cost_rates = {m.employee_id: m.cost_hourly_rate for m in project.members}
-        project.member_bill_rates = {
-            m.employee_id: (m.bill_hourly_rate if m.bill_hourly_rate is not None else m.hourly_rate)
-            for m in project.members
-        }
+        fill_member_maps([project])
     return project
 
 def create_project(db: Session, project: schemas.ProjectCreate) -> models.Project:
@@ -411,7 +774,7 @@ def update_project(db: Session, project_id: str, project: schemas.ProjectUpdate)
             setattr(db_project, field, value)
         db.commit()
         db.refresh(db_project)
-        db_project.member_ids = [m.employee_id for m in db_project.members]
+        fill_member_maps([db_project])
     return db_project
 
 def delete_project(db: Session, project_id: str) -> bool:
@@ -420,7 +783,9 @@ def delete_project(db: Session, project_id: str) -> bool:
         try:
             # Nullify references in dependent tables to satisfy FK constraints (PostgreSQL)
             db.query(models.Transaction).filter(models.Transaction.project_id == project_id).update({models.Transaction.project_id: None}, synchronize_session=False)
+            db.execute(_DETACH_PROJECT_ROLLUPS_SQL, {"project": project_id})
             db.query(models.Task).filter(models.Task.project_id == project_id).update({models.Task.project_id: None}, synchronize_session=False)
+            bump_collection_versions(db, db_project.organization_id, "tasks", "transactions")
             db.flush()
 
             # Delete the project itself; links/members are configured with cascade delete-orphan
@@ -512,36 +877,17 @@ def remove_project_link(db: Session, project_id: str, link_id: str) -> bool:
 def get_transactions(db: Session) -> List[models.Transaction]:
     return db.query(models.Transaction).order_by(models.Transaction.date.desc()).all()
 
-def finance_summary_month(db: Session, year: int, month: int) -> dict:
-    # DB-agnostic filter by date range
-    from datetime import date as _date, timedelta as _timedelta
-    start = _date(year, month, 1)
-    if month == 12:
-        end = _date(year + 1, 1, 1)
-    else:
-        end = _date(year, month + 1, 1)
-    inc = (
-        db.query(func.coalesce(func.sum(models.Transaction.amount), 0.0))
-        .filter(models.Transaction.transaction_type == "income")
-        .filter(models.Transaction.date >= start)
-        .filter(models.Transaction.date < end)
-        .scalar()
-    )
-    exp = (
-        db.query(func.coalesce(func.sum(models.Transaction.amount), 0.0))
-        .filter(models.Transaction.transaction_type == "expense")
-        .filter(models.Transaction.date >= start)
-        .filter(models.Transaction.date < end)
-        .scalar()
-    )
-    return {"income": float(inc or 0), "expense": float(exp or 0), "balance": float((inc or 0) - (exp or 0))}
+def finance_summary_month(db: Session, year: int, month: int, organization_id: Optional[str] = None) -> dict:
+    """Income/expense/balance of an organization's month, read from finance_rollups."""
+    return finance_month_totals(db.execute(finance_month_statement(organization_id, year, month)).all())
 
 def get_transaction(db: Session, transaction_id: str) -> Optional[models.Transaction]:
     return db.query(models.Transaction).filter(models.Transaction.id == transaction_id).first()
 
-def create_transaction(db: Session, transaction: schemas.TransactionCreate) -> models.Transaction:
+def create_transaction(db: Session, transaction: schemas.TransactionCreate, organization_id: Optional[str] = None) -> models.Transaction:
     db_transaction = models.Transaction(
         id=generate_id(),
+        organization_id=organization_id,
         **transaction.model_dump()
     )
     db.add(db_transaction)
@@ -576,17 +922,17 @@ def find_task_by_text(db: Session, text: str) -> Optional[models.Task]:
         return None
     return db.query(models.Task).filter(models.Task.content.ilike(f"%{text}%")).first()
 
-def list_overdue_tasks(db: Session) -> List[models.Task]:
-    today = date.today()
+def overdue_tasks_statement():
+    T = models.Task
     return (
-        db.query(models.Task)
-        .filter(models.Task.due_date.isnot(None))
-        .filter(models.Task.due_date < today)
-        .filter(models.Task.done == False)
-        .order_by(models.Task.due_date.asc())
-        .all()
+        select(T)
+        .where(T.due_date.isnot(None), T.due_date < date.today(), T.done == False)
+        .order_by(T.due_date.asc())
     )
 
+def list_overdue_tasks(db: Session) -> List[models.Task]:
+    return list(db.execute(overdue_tasks_statement()).scalars().all())
+
 def create_task_simple(db: Session, content: str, priority: str = "M", due_date: Optional[date] = None, assigned_to: Optional[str] = None, project_id: Optional[str] = None) -> models.Task:
     db_task = models.Task(
         id=generate_id(),
@@ -716,14 +1062,15 @@ def rollback_task_finance_if_any(db: Session, task_id: str) -> Optional[models.T
         return None
     changed = False
     try:
-        if getattr(db_task, "income_tx_id", None):
-            db.query(models.Transaction).filter(models.Transaction.id == db_task.income_tx_id).delete(synchronize_session=False)
-            db_task.income_tx_id = None
-            changed = True
-        if getattr(db_task, "expense_tx_id", None):
-            db.query(models.Transaction).filter(models.Transaction.id == db_task.expense_tx_id).delete(synchronize_session=False)
-            db_task.expense_tx_id = None
-            changed = True
+        # ORM deletes (not query.delete): the flush hooks update collection versions and rollups
+        for attr in ("income_tx_id", "expense_tx_id"):
+            tx_id = getattr(db_task, attr, None)
+            if tx_id:
+                tx = db.get(models.Transaction, tx_id)
+                if tx is not None:
+                    db.delete(tx)
+                setattr(db_task, attr, None)
+                changed = True
         if changed:
             db.commit()
             db.refresh(db_task)
@@ -788,6 +1135,51 @@ def delete_goal(db: Session, goal_id: str) -> bool:
 def get_reading_items(db: Session) -> List[models.ReadingItem]:
     return db.query(models.ReadingItem).order_by(models.ReadingItem.added_date.desc()).all()
 
+def has_tag(column, tag: str):
+    # tags are stored as a JSON array; @> on jsonb matches one element
+    return cast(column, JSONB).contains([tag])
+
+def _filter_reading_items(stmt, filters: Optional[schemas.ReadingFilters]):
+    if filters is None:
+        return stmt
+    R = models.ReadingItem
+    if filters.status:
+        stmt = stmt.where(R.status == filters.status)
+    if filters.item_type:
+        stmt = stmt.where(R.item_type == filters.item_type)
+    if filters.priority:
+        stmt = stmt.where(R.priority == filters.priority)
+    if filters.tag:
+        stmt = stmt.where(has_tag(R.tags, filters.tag))
+    if filters.search:
+        stmt = stmt.where(or_(
+            R.title.icontains(filters.search, autoescape=True),
+            R.notes.icontains(filters.search, autoescape=True),
+        ))
+    return stmt
+
+def reading_items_statement(user_id: Optional[str], filters: Optional[schemas.ReadingFilters], page: PageParams, fields=None):
+    """One page of a user's reading list (newest first) as rows of schemas.ReadingItem columns.
+
+    Shared by GET /api/reading (crud_async) and the assistant's reading_list intent.
+    """
+    R = models.ReadingItem
+    stmt = select(*schema_columns(R, schemas.ReadingItem, fields, always=("id", "added_date"))).where(R.user_id == user_id)
+    return keyset(_filter_reading_items(stmt, filters), R.added_date, R.id, page)
+
+def reading_items_count_statement(user_id: Optional[str], filters: Optional[schemas.ReadingFilters]):
+    R = models.ReadingItem
+    return _filter_reading_items(select(func.count()).select_from(R).where(R.user_id == user_id), filters)
+
+def list_reading_items(db: Session, user_id: Optional[str], filters: Optional[schemas.ReadingFilters] = None, page: Optional[PageParams] = None, fields=None):
+    """(page of rows, next cursor); see reading_items_statement."""
+    page = page or PageParams(limit=None)
+    rows = db.execute(reading_items_statement(user_id, filters, page, fields)).all()
+    return split_page(rows, page, lambda r: (r.added_date, r.id))
+
+def count_reading_items(db: Session, user_id: Optional[str], filters: Optional[schemas.ReadingFilters] = None) -> int:
+    return db.execute(reading_items_count_statement(user_id, filters)).scalar_one()
+
 def get_reading_item(db: Session, item_id: str) -> Optional[models.ReadingItem]:
     return db.query(models.ReadingItem).filter(models.ReadingItem.id == item_id).first()
 
@@ -846,10 +1238,11 @@ def get_notes(db: Session) -> List[models.Note]:
 def get_note(db: Session, note_id: str) -> Optional[models.Note]:
     return db.query(models.Note).filter(models.Note.id == note_id).first()
 
-def create_note(db: Session, note: schemas.NoteCreate, user_id: Optional[str] = None) -> models.Note:
+def create_note(db: Session, note: schemas.NoteCreate, user_id: Optional[str] = None, organization_id: Optional[str] = None) -> models.Note:
     db_note = models.Note(
         id=generate_id(),
         user_id=user_id,
+        organization_id=organization_id,
         **note.model_dump()
     )
     db.add(db_note)
@@ -897,6 +1290,7 @@ def update_user_profile(db: Session, user_id: str, name: Optional[str], profile_
             setattr(profile, k, v)
     db.commit()
     db.refresh(user)
+    invalidate_user_tokens(user.id)
     return user
 
 def change_user_password(db: Session, user_id: str, current_password: str, new_password: str) -> bool:
@@ -909,9 +1303,11 @@ def change_user_password(db: Session, user_id: str, current_password: str, new_p
     user.password_salt = new_salt
     user.password_hash = hash_password(new_password, new_salt)
     db.commit()
+    invalidate_user_tokens(user.id)
     return True
 
 def delete_session(db: Session, token: str) -> None:
+    invalidate_token(token)
     sess = db.query(models.Session).filter(models.Session.token == token).first()
     if sess:
         db.delete(sess)
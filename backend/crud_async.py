@@ -0,0 +1,474 @@
+"""Async (asyncpg) counterparts of the hottest read paths in crud.py.
+
+Relationships are never lazy-loaded under AsyncSession, so every query here
+eager-loads what the response schema serializes.
+"""
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional, Sequence
+
+from sqlalchemy import Date, DateTime, and_, cast, func, literal_column, select, union_all, update
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+
+import crud
+import models
+import schemas
+import stats
+import tokens
+from config import settings
+from pagination import PageParams, keyset, split_page
+from serialization import schema_columns
+
+
+async def load_token_owner(db: AsyncSession, token: str) -> Optional[tuple[models.User, Optional[models.Employee], models.Session]]:
+    """Async twin of crud.load_token_owner."""
+    if tokens.is_signed_token(token):
+        return None
+    result = await db.execute(
+        select(models.User, models.Employee, models.Session)
+        .join(models.Session, models.Session.user_id == models.User.id)
+        .outerjoin(models.Employee, models.Employee.user_id == models.User.id)
+        .options(joinedload(models.User.profile))
+        .where(models.Session.token == token, models.Session.expires_at > datetime.now(timezone.utc))
+        .limit(1)
+    )
+    row = result.first()
+    if row:
+        await touch_session(db, row[2])
+    return row
+
+
+async def touch_session(db: AsyncSession, sess: models.Session) -> None:
+    now = datetime.now(timezone.utc)
+    if sess.last_seen_at and now - sess.last_seen_at < timedelta(minutes=settings.SESSION_TOUCH_INTERVAL_MINUTES):
+        return
+    expires_at = now + timedelta(hours=settings.SESSION_TTL_HOURS)
+    await db.execute(
+        update(models.Session)
+        .where(models.Session.token == sess.token)
+        .values(last_seen_at=now, expires_at=expires_at)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    set_committed_value(sess, "last_seen_at", now)
+    set_committed_value(sess, "expires_at", expires_at)
+
+
+async def get_user(db: AsyncSession, user_id: str) -> Optional[models.User]:
+    # already in the identity map when the token was just resolved from the database
+    return await db.get(models.User, user_id, options=[selectinload(models.User.profile)])
+
+
+async def get_employee(db: AsyncSession, employee_id: Optional[str]) -> Optional[models.Employee]:
+    return await db.get(models.Employee, employee_id) if employee_id else None
+
+
+async def attach_avatars(db: AsyncSession, employees: List[models.Employee]) -> List[models.Employee]:
+    user_ids = [e.user_id for e in employees if e.user_id]
+    if not user_ids:
+        return employees
+    result = await db.execute(
+        select(models.UserProfile.user_id, models.UserProfile.avatar_url).where(models.UserProfile.user_id.in_(user_ids))
+    )
+    avatar_by_user = dict(result.all())
+    for e in employees:
+        if e.user_id:
+            e.__dict__["avatar_url"] = avatar_by_user.get(e.user_id)
+    return employees
+
+
+def org_employees_statement(organization_id: Optional[str]):
+    return (
+        select(models.Employee)
+        .where(models.Employee.organization_id == organization_id)
+        .order_by(models.Employee.created_at.desc())
+    )
+
+
+async def list_org_employees(db: AsyncSession, organization_id: Optional[str]) -> List[models.Employee]:
+    result = await db.execute(org_employees_statement(organization_id))
+    return list(result.scalars().all())
+
+
+async def count_rows(db: AsyncSession, model, *where) -> int:
+    """COUNT(*) of `model` rows matching `where`."""
+    return (await db.execute(select(func.count()).select_from(model).where(*where))).scalar_one()
+
+
+async def collection_version(db: AsyncSession, organization_id: Optional[str], collection: str) -> Optional[int]:
+    """Version of an organization's collection (0 before the first write); None without an organization."""
+    if not organization_id:
+        return None
+    result = await db.execute(
+        select(models.CollectionVersion.version).where(
+            models.CollectionVersion.organization_id == organization_id,
+            models.CollectionVersion.collection == collection,
+        )
+    )
+    return result.scalar() or 0
+
+
+async def collection_versions(db: AsyncSession, organization_id: Optional[str], *collections: str) -> Optional[tuple]:
+    """collection_version of each of `collections` in one query; None without an organization."""
+    if not organization_id:
+        return None
+    CV = models.CollectionVersion
+    result = await db.execute(
+        select(CV.collection, CV.version).where(CV.organization_id == organization_id, CV.collection.in_(collections))
+    )
+    versions = dict(result.all())
+    return tuple(versions.get(c, 0) for c in collections)
+
+
+def _project_query():
+    return select(models.Project).options(*crud.project_load_options())
+
+
+def org_projects_statement(organization_id: Optional[str]):
+    return (
+        _project_query()
+        .where(models.Project.organization_id == organization_id)
+        .order_by(models.Project.created_at.desc())
+    )
+
+
+def member_projects_statement(employee_id: str):
+    return (
+        _project_query()
+        .join(models.ProjectMember, models.ProjectMember.project_id == models.Project.id)
+        .where(models.ProjectMember.employee_id == employee_id)
+    )
+
+
+async def list_org_projects(db: AsyncSession, organization_id: Optional[str]) -> List[models.Project]:
+    result = await db.execute(org_projects_statement(organization_id))
+    return crud.fill_member_maps(list(result.scalars().all()))
+
+
+async def list_member_projects(db: AsyncSession, employee_id: Optional[str]) -> List[models.Project]:
+    """Projects where the employee is a member (same scope as crud.list_projects_for_user)."""
+    if not employee_id:
+        return []
+    result = await db.execute(member_projects_statement(employee_id))
+    return crud.fill_member_maps(list(result.scalars().all()))
+
+
+def _filter_tasks(stmt, filters: Optional[schemas.TaskFilters]):
+    if filters is None:
+        return stmt
+    T = models.Task
+    if filters.project_id:
+        stmt = stmt.where(T.project_id == filters.project_id)
+    if filters.assigned_to:
+        stmt = stmt.where(T.assigned_to == filters.assigned_to)
+    if filters.done is not None:
+        stmt = stmt.where(T.done == filters.done)
+    if filters.approved is not None:
+        stmt = stmt.where(T.approved == filters.approved)
+    if filters.work_status:
+        stmt = stmt.where(T.work_status == filters.work_status)
+    if filters.due_from:
+        stmt = stmt.where(T.due_date >= filters.due_from)
+    if filters.due_to:
+        stmt = stmt.where(T.due_date <= filters.due_to)
+    if filters.search:
+        stmt = stmt.where(T.content.icontains(filters.search, autoescape=True))
+    return stmt
+
+
+def task_page_statement(
+    where,
+    filters: Optional[schemas.TaskFilters] = None,
+    page: Optional[PageParams] = None,
+    fields: Optional[Sequence[str]] = None,
+):
+    """Page of tasks matching `where`, newest first: schemas.Task (or `fields`) columns."""
+    # Core rows with just the schema's (or the requested) columns: no ORM instances to build
+    T = models.Task
+    stmt = select(*schema_columns(T, schemas.Task, fields, always=("id", "created_at"))).where(where)
+    return keyset(_filter_tasks(stmt, filters), T.created_at, T.id, page or PageParams(limit=None))
+
+
+async def _task_page(db: AsyncSession, where, filters, page, fields) -> tuple[List[Row], Optional[str]]:
+    page = page or PageParams(limit=None)
+    result = await db.execute(task_page_statement(where, filters, page, fields))
+    return split_page(result.all(), page, lambda t: (t.created_at, t.id))
+
+
+async def list_org_tasks(
+    db: AsyncSession,
+    organization_id: Optional[str],
+    filters: Optional[schemas.TaskFilters] = None,
+    page: Optional[PageParams] = None,
+    fields: Optional[Sequence[str]] = None,
+) -> tuple[List[Row], Optional[str]]:
+    """Organization tasks, newest first, as rows of schemas.Task columns: (page, next cursor).
+
+    `fields` limits the selected columns.
+    """
+    return await _task_page(db, models.Task.organization_id == organization_id, filters, page, fields)
+
+
+async def list_employee_tasks(
+    db: AsyncSession,
+    employee_id: Optional[str],
+    filters: Optional[schemas.TaskFilters] = None,
+    page: Optional[PageParams] = None,
+    fields: Optional[Sequence[str]] = None,
+) -> tuple[List[Row], Optional[str]]:
+    if not employee_id:
+        return [], None
+    return await _task_page(db, models.Task.assigned_to == employee_id, filters, page, fields)
+
+
+def _filter_transactions(stmt, filters: Optional[schemas.TransactionFilters]):
+    if filters is None:
+        return stmt
+    T = models.Transaction
+    if filters.date_from:
+        stmt = stmt.where(T.date >= filters.date_from)
+    if filters.date_to:
+        stmt = stmt.where(T.date <= filters.date_to)
+    if filters.transaction_type:
+        stmt = stmt.where(T.transaction_type == filters.transaction_type)
+    if filters.category:
+        stmt = stmt.where(T.category == filters.category)
+    if filters.project_id:
+        stmt = stmt.where(T.project_id == filters.project_id)
+    if filters.employee_id:
+        stmt = stmt.where(T.employee_id == filters.employee_id)
+    if filters.tag:
+        stmt = stmt.where(crud.has_tag(T.tags, filters.tag))
+    return stmt
+
+
+def org_transactions_statement(
+    organization_id: Optional[str],
+    filters: Optional[schemas.TransactionFilters] = None,
+    page: Optional[PageParams] = None,
+):
+    """Page of the organization ledger, latest date first: schemas.Transaction columns."""
+    T = models.Transaction
+    stmt = select(*schema_columns(T, schemas.Transaction)).where(T.organization_id == organization_id)
+    return keyset(_filter_transactions(stmt, filters), T.date, T.id, page or PageParams(limit=None))
+
+
+async def list_org_transactions(
+    db: AsyncSession,
+    organization_id: Optional[str],
+    filters: Optional[schemas.TransactionFilters] = None,
+    page: Optional[PageParams] = None,
+) -> tuple[List[Row], Optional[str]]:
+    """Organization ledger, latest date first, as rows of schemas.Transaction columns: (page, next cursor)."""
+    page = page or PageParams(limit=None)
+    result = await db.execute(org_transactions_statement(organization_id, filters, page))
+    return split_page(result.all(), page, lambda tx: (tx.date, tx.id))
+
+
+async def transaction_totals(
+    db: AsyncSession,
+    organization_id: Optional[str],
+    filters: Optional[schemas.TransactionFilters] = None,
+) -> dict:
+    """Count and income/expense sums over the whole filtered set (one aggregate query)."""
+    T = models.Transaction
+    stmt = _filter_transactions(
+        select(
+            func.count(),
+            func.coalesce(func.sum(T.amount).filter(T.transaction_type == "income"), 0.0),
+            func.coalesce(func.sum(T.amount).filter(T.transaction_type == "expense"), 0.0),
+        ).where(T.organization_id == organization_id),
+        filters,
+    )
+    count, income, expense = (await db.execute(stmt)).one()
+    return {"count": count, "income": round(float(income), 2), "expense": round(float(expense), 2)}
+
+
+async def finance_summary_month(db: AsyncSession, organization_id: Optional[str], year: int, month: int) -> dict:
+    """crud.finance_summary_month: income/expense/balance/count of a month from finance_rollups."""
+    return crud.finance_month_totals((await db.execute(crud.finance_month_statement(organization_id, year, month))).all())
+
+
+async def list_employee_stats(
+    db: AsyncSession,
+    organization_id: Optional[str],
+    query: schemas.EmployeeStatsQuery,
+    page: Optional[PageParams] = None,
+    employee_id: Optional[str] = None,
+) -> tuple[List[Row], Optional[str]]:
+    """stats.org_stats_statement rows ordered by `query.sort` desc (keyset-paginated), and the next cursor."""
+    board = stats.org_stats_statement(organization_id, query.date_from, query.date_to, employee_id).subquery()
+    page = page or PageParams(limit=None)
+    sort_col = board.c[query.sort]
+    rows = (await db.execute(keyset(select(board), sort_col, board.c.employee_id, page))).all()
+    return split_page(rows, page, key=lambda r: (getattr(r, query.sort), r.employee_id))
+
+
+async def finance_series(
+    db: AsyncSession,
+    organization_id: Optional[str],
+    bucket: str,
+    group_by: Optional[str],
+    date_from: date,
+    date_to: date,
+) -> tuple[list, str]:
+    """Income/expense/balance per bucket (and group) over [date_from, date_to]: (points, source).
+
+    Month/quarter buckets over whole months, not grouped by employee, are summed
+    from finance_rollups; anything else is one GROUP BY date_trunc over the
+    organization's transactions in the range.
+    """
+    R, T = models.FinanceRollup, models.Transaction
+    whole_months = date_from.day == 1 and (date_to + timedelta(days=1)).day == 1
+    if bucket in ("month", "quarter") and group_by != "employee" and whole_months:
+        source, day, tx_type, count = "rollups", R.month, R.transaction_type, func.sum(R.tx_count)
+        amount = R.amount
+        groups = {"category": R.category, "project": R.project_id}
+        where = (R.organization_id == (organization_id or ""), R.month >= date_from, R.month <= date_to)
+    else:
+        source, day, tx_type, count = "transactions", T.date, T.transaction_type, func.count()
+        amount = T.amount
+        groups = {"category": T.category, "project": T.project_id, "employee": T.employee_id}
+        where = (T.organization_id == organization_id, T.date >= date_from, T.date <= date_to)
+    # bucket is one of the schema's literals; inlined so SELECT and GROUP BY are the same expression
+    period = cast(func.date_trunc(literal_column(f"'{bucket}'"), cast(day, DateTime)), Date)
+    keys = [period] + ([groups[group_by]] if group_by else [])
+    stmt = (
+        select(
+            *keys,
+            func.sum(amount).filter(tx_type == "income"),
+            func.sum(amount).filter(tx_type == "expense"),
+            count,
+        )
+        .where(*where)
+        .group_by(*keys)
+        .order_by(*keys)
+    )
+    points = []
+    for row in (await db.execute(stmt)).all():
+        income, expense, n = float(row[-3] or 0), float(row[-2] or 0), int(row[-1] or 0)
+        if not n:
+            continue  # rollup rows emptied by deletes
+        points.append({
+            "period": row[0],
+            "group": (row[1] or None) if group_by else None,
+            "income": round(income, 2),
+            "expense": round(expense, 2),
+            "balance": round(income - expense, 2),
+            "count": n,
+        })
+    return points, source
+
+
+def _note_visibility(user_id: str, organization_id: Optional[str]) -> list:
+    """WHERE of each disjoint part of a user's feed: own notes, then others' notes shared in the organization."""
+    N, U = models.Note, models.User
+    parts = [N.user_id == user_id]
+    if organization_id:
+        parts.append(and_(N.organization_id == organization_id, N.shared == True, N.user_id.is_distinct_from(user_id)))
+        # notes the note_org_ids backfill has not reached yet: organization of the owner
+        # (ix_notes_legacy_shared_date, empty once the backfill has finished)
+        owners = select(U.id).where(U.organization_id == organization_id, U.id != user_id)
+        parts.append(and_(N.organization_id.is_(None), N.shared == True, N.user_id.in_(owners)))
+    return parts
+
+
+def _filter_notes(stmt, filters: Optional[schemas.NoteFilters]):
+    if filters is None:
+        return stmt
+    N = models.Note
+    if filters.date_from:
+        stmt = stmt.where(N.date >= filters.date_from)
+    if filters.date_to:
+        stmt = stmt.where(N.date <= filters.date_to)
+    if filters.tag:
+        stmt = stmt.where(crud.has_tag(N.tags, filters.tag))
+    return stmt
+
+
+def visible_notes_statement(
+    user_id: str,
+    organization_id: Optional[str],
+    filters: Optional[schemas.NoteFilters] = None,
+    page: Optional[PageParams] = None,
+    fields: Optional[Sequence[str]] = None,
+):
+    """Page of a user's feed, latest date first: schemas.Note (or `fields`) columns.
+
+    Each part is a keyset range of its own partial index (ix_notes_user_date,
+    ix_notes_org_shared_date) cut to the page size; the union of the two
+    short ranges is merged and cut again, so a page costs the same however
+    many notes there are.
+    """
+    page = page or PageParams(limit=None)
+    N = models.Note
+    columns = schema_columns(N, schemas.Note, fields, always=("id", "date"))
+    parts = [
+        keyset(_filter_notes(select(*columns).where(where), filters), N.date, N.id, page)
+        for where in _note_visibility(user_id, organization_id)
+    ]
+    feed = (union_all(*parts) if len(parts) > 1 else parts[0]).subquery()
+    stmt = select(feed).order_by(feed.c.date.desc(), feed.c.id.desc())
+    if page.limit:
+        stmt = stmt.limit(page.limit + 1)
+    return stmt
+
+
+def visible_notes_count_statement(user_id: str, organization_id: Optional[str], filters: Optional[schemas.NoteFilters] = None):
+    """COUNT of the whole filtered feed of visible_notes_statement."""
+    N = models.Note
+    parts = [_filter_notes(select(N.id).where(where), filters) for where in _note_visibility(user_id, organization_id)]
+    feed = (union_all(*parts) if len(parts) > 1 else parts[0]).subquery()
+    return select(func.count()).select_from(feed)
+
+
+async def list_visible_notes(
+    db: AsyncSession,
+    user_id: str,
+    organization_id: Optional[str],
+    filters: Optional[schemas.NoteFilters] = None,
+    page: Optional[PageParams] = None,
+    fields: Optional[Sequence[str]] = None,
+) -> tuple[List[Row], Optional[str]]:
+    """Own notes plus notes shared within the organization, latest date first,
+    as rows of schemas.Note columns: (page, next cursor)."""
+    page = page or PageParams(limit=None)
+    result = await db.execute(visible_notes_statement(user_id, organization_id, filters, page, fields))
+    return split_page(result.all(), page, lambda n: (n.date, n.id))
+
+
+async def count_visible_notes(
+    db: AsyncSession,
+    user_id: str,
+    organization_id: Optional[str],
+    filters: Optional[schemas.NoteFilters] = None,
+) -> int:
+    """Size of the whole filtered feed of list_visible_notes."""
+    return (await db.execute(visible_notes_count_statement(user_id, organization_id, filters))).scalar_one()
+
+
+async def list_goals(db: AsyncSession, user_id: str) -> List[models.Goal]:
+    """Goals owned by the user, newest first."""
+    result = await db.execute(
+        select(models.Goal).where(models.Goal.user_id == user_id).order_by(models.Goal.created_at.desc())
+    )
+    return list(result.scalars().all())
+
+
+async def list_reading_items(
+    db: AsyncSession,
+    user_id: str,
+    filters: Optional[schemas.ReadingFilters] = None,
+    page: Optional[PageParams] = None,
+    fields: Optional[Sequence[str]] = None,
+) -> tuple[List[Row], Optional[str]]:
+    """The user's own reading list (personal for every role), newest first: (page, next cursor)."""
+    page = page or PageParams(limit=None)
+    result = await db.execute(crud.reading_items_statement(user_id, filters, page, fields))
+    return split_page(result.all(), page, lambda r: (r.added_date, r.id))
+
+
+async def count_reading_items(db: AsyncSession, user_id: str, filters: Optional[schemas.ReadingFilters] = None) -> int:
+    return (await db.execute(crud.reading_items_count_statement(user_id, filters))).scalar_one()
@@ -1,6 +1,15 @@
-from sqlalchemy import create_engine
+import threading
+import time
+from typing import Optional
+
+from fastapi import Request
+from sqlalchemy import create_engine, event, exc, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from cache import TTLCache
 from config import settings
 
 # Требуем Postgres (или явный URL). Никакого fallback на SQLite.
@@ -8,9 +17,257 @@ DATABASE_URL = settings.DATABASE_URL or settings.db_url
 if not DATABASE_URL or not DATABASE_URL.startswith("postgresql"):
     raise RuntimeError("DATABASE_URL must be a valid PostgreSQL URL (postgresql+psycopg2://...)")
 
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+# Ожидание свободного соединения дольше этого порога считается "ожиданием" в телеметрии
+_SLOW_CHECKOUT_SECONDS = 0.01
+
+
+class _PoolCounters:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.timeouts = 0
+
+    def record(self, elapsed: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            if elapsed >= _SLOW_CHECKOUT_SECONDS:
+                self.waits += 1
+                self.wait_seconds += elapsed
+                self.max_wait_seconds = max(self.max_wait_seconds, elapsed)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "waits": self.waits,
+                "wait_seconds_total": round(self.wait_seconds, 3),
+                "max_wait_seconds": round(self.max_wait_seconds, 3),
+                "timeouts": self.timeouts,
+            }
+
+
+pool_counters = _PoolCounters()
+async_pool_counters = _PoolCounters()
+
+
+class _CheckoutCounting:
+    """Pool mixin that counts slow checkouts and checkout timeouts (pool exhaustion)."""
+
+    counters: _PoolCounters
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            # exhaustion shows up as counters.timeouts; the TimeoutError itself reaches the caller
+            self.counters.record(time.perf_counter() - start, timed_out=True)
+            raise
+        self.counters.record(time.perf_counter() - start)
+        return conn
+
+
+class InstrumentedQueuePool(_CheckoutCounting, QueuePool):
+    counters = pool_counters
+
+
+class InstrumentedAsyncQueuePool(_CheckoutCounting, AsyncAdaptedQueuePool):
+    counters = async_pool_counters
+
+
+def _connect_args() -> dict:
+    args = {}
+    # В режиме transaction (PgBouncer) параметры запуска не передаются: таймаут ставится SET LOCAL
+    if settings.DB_STATEMENT_TIMEOUT_MS and settings.DB_POOL_MODE != "transaction":
+        args["options"] = f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"
+    return args
+
+
+def _make_engine(url, **kw):
+    return create_engine(
+        url,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=True,
+        connect_args=_connect_args(),
+        **kw,
+    )
+
+
+engine = _make_engine(DATABASE_URL, poolclass=InstrumentedQueuePool)
+
+
+def _async_connect_args() -> dict:
+    args = {}
+    if settings.DB_STATEMENT_TIMEOUT_MS and settings.DB_POOL_MODE != "transaction":
+        args["server_settings"] = {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}
+    if settings.DB_POOL_MODE == "transaction":
+        # asyncpg caches prepared statements per connection; PgBouncer transaction
+        # pooling hands out a different server connection per transaction.
+        args["statement_cache_size"] = 0
+        args["prepared_statement_cache_size"] = 0
+    return args
+
+
+def _make_async_engine(url, **kw):
+    # Тот же URL, но через asyncpg — для async-эндпойнтов
+    return create_async_engine(
+        make_url(url).set(drivername="postgresql+asyncpg"),
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=True,
+        connect_args=_async_connect_args(),
+        **kw,
+    )
+
+
+async_engine = _make_async_engine(DATABASE_URL, poolclass=InstrumentedAsyncQueuePool)
+
+# Read replica (optional): same pool settings, own pools
+replica_engine = _make_engine(settings.DATABASE_REPLICA_URL) if settings.DATABASE_REPLICA_URL else None
+async_replica_engine = _make_async_engine(settings.DATABASE_REPLICA_URL) if settings.DATABASE_REPLICA_URL else None
+
+if settings.DB_POOL_MODE == "transaction" and settings.DB_STATEMENT_TIMEOUT_MS:
+    # PgBouncer transaction pooling: session state does not survive between
+    # transactions, so the timeout is applied to every transaction instead.
+    def _set_local_statement_timeout(conn):
+        conn.exec_driver_sql(f"SET LOCAL statement_timeout = {int(settings.DB_STATEMENT_TIMEOUT_MS)}")
+
+    for _eng in (engine, async_engine.sync_engine, replica_engine, async_replica_engine and async_replica_engine.sync_engine):
+        if _eng is not None:
+            event.listen(_eng, "begin", _set_local_statement_timeout)
+
+
+class _ReplicaMonitor:
+    """Background probe of replica availability and replay lag.
+
+    Request paths only read the last result, so a dead replica never adds latency
+    beyond the first failed probe; reads fall back to the primary until it recovers.
+    """
+
+    # 0 when caught up (idle primary keeps replay timestamp old); 0 on a non-replica too
+    _LAG_SQL = text(
+        "SELECT CASE WHEN NOT pg_is_in_recovery() THEN 0 "
+        "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+        "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+    )
+
+    def __init__(self):
+        self.healthy = False
+        self.lag_seconds: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.checked_at: Optional[float] = None
+        self._started = False
+        self._lock = threading.Lock()
+
+    def probe(self) -> None:
+        try:
+            with replica_engine.connect() as conn:
+                lag = float(conn.execute(self._LAG_SQL).scalar() or 0.0)
+            self.lag_seconds = lag
+            self.healthy = lag <= settings.REPLICA_MAX_LAG_SECONDS
+            self.last_error = None if self.healthy else f"replica lag {lag:.1f}s"
+        except Exception as e:
+            self.healthy = False
+            self.last_error = str(e)[:200]
+        self.checked_at = time.time()
+
+    def start(self) -> None:
+        if replica_engine is None:
+            return
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        self.probe()
+
+        def worker():
+            while True:
+                time.sleep(max(1.0, settings.REPLICA_CHECK_INTERVAL_SECONDS))
+                self.probe()
+
+        threading.Thread(target=worker, name="replica-monitor", daemon=True).start()
+
+    def status(self) -> dict:
+        return {
+            "configured": replica_engine is not None,
+            "healthy": self.healthy,
+            "lag_seconds": self.lag_seconds,
+            "last_error": self.last_error,
+        }
+
+
+replica_monitor = _ReplicaMonitor()
+
+
+def _on_replica_error(ctx) -> None:
+    # lost connection: stop routing reads there right away, the monitor re-enables it
+    if ctx.is_disconnect:
+        replica_monitor.healthy = False
+        replica_monitor.last_error = str(ctx.original_exception)[:200]
+
+
+for _eng in (replica_engine, async_replica_engine and async_replica_engine.sync_engine):
+    if _eng is not None:
+        event.listen(_eng, "handle_error", _on_replica_error)
+
+# Токены, недавно выполнявшие запись: их чтения идут на основную БД (в пределах воркера)
+_recent_writers = TTLCache(maxsize=100000, ttl=settings.READ_YOUR_WRITES_SECONDS)
+
+
+def mark_recent_writer(request: Request) -> None:
+    key = request.headers.get("authorization")
+    if key:
+        _recent_writers.set(key, True)
+
+
+def _use_replica(request: Request) -> bool:
+    if replica_engine is None or not replica_monitor.healthy:
+        return False
+    key = request.headers.get("authorization")
+    return not (key and _recent_writers.get(key))
+
+
+def _pool_info(pool, counters: _PoolCounters) -> dict:
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+        **counters.snapshot(),
+    }
+
+
+def pool_status() -> dict:
+    return {
+        "mode": settings.DB_POOL_MODE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "timeout_seconds": settings.DB_POOL_TIMEOUT,
+        **_pool_info(engine.pool, pool_counters),
+        "async": _pool_info(async_engine.pool, async_pool_counters),
+        "replica": replica_monitor.status(),
+    }
+
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# expire_on_commit=False: в async-режиме ленивые загрузки после commit недоступны
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False, autoflush=False)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine) if replica_engine else SessionLocal
+AsyncReadSessionLocal = (
+    async_sessionmaker(async_replica_engine, expire_on_commit=False, autoflush=False)
+    if async_replica_engine
+    else AsyncSessionLocal
+)
 Base = declarative_base()
 
 def get_db():
@@ -18,4 +275,21 @@ def get_db():
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Только чтение: реплика, если она доступна и клиент недавно ничего не писал; иначе основная БД
+def get_read_db(request: Request):
+    db = ReadSessionLocal() if _use_replica(request) else SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_read_db(request: Request):
+    factory = AsyncReadSessionLocal if _use_replica(request) else AsyncSessionLocal
+    async with factory() as db:
+        yield db
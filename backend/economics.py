@@ -0,0 +1,168 @@
+"""Project economics: billed revenue, cost, margin, hours by member, weekly burn
+and budget remaining, for one project or for every project of an organization.
+
+All figures are grouped SQL over transactions.project_id and tasks.project_id
+(the same aggregates as stats.py). Reports are cached in process memory, keyed
+by the organization's collection versions (collection_versions): every write to
+a task, transaction, project or employee bumps them in its own transaction
+(crud.py), so the first read after a linked task or transaction changes misses
+and recomputes, in every worker. Superseded entries are never read again and
+age out of the LRU.
+"""
+from typing import Optional
+
+from sqlalchemy import Date, DateTime, cast, func, literal_column, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import crud_async
+import models
+import stats
+from cache import TTLCache
+from config import settings
+
+# отчёт зависит от задач и транзакций, бюджета (projects) и имён участников (employees)
+CACHE_COLLECTIONS = ("tasks", "transactions", "projects", "employees")
+
+_cache = TTLCache(maxsize=settings.ECONOMICS_CACHE_MAX_SIZE, ttl=settings.ECONOMICS_CACHE_TTL_SECONDS)
+
+
+def projects_statement(organization_id: Optional[str], project_id: Optional[str] = None):
+    """Revenue, cost and hours of every project of the organization (or just `project_id`), newest first."""
+    P, T, X = models.Project, models.Task, models.Transaction
+    ids = select(P.id).where(P.organization_id == organization_id)
+    if project_id:
+        ids = ids.where(P.id == project_id)
+    money = (
+        select(X.project_id, *stats.transaction_aggregates())
+        .where(X.project_id.in_(ids))
+        .group_by(X.project_id)
+        .subquery()
+    )
+    work = (
+        select(T.project_id, *stats.task_aggregates())
+        .where(T.project_id.in_(ids))
+        .group_by(T.project_id)
+        .subquery()
+    )
+    stmt = (
+        select(
+            P.id.label("project_id"),
+            P.name,
+            P.status,
+            P.budget,
+            func.coalesce(money.c.income, 0.0).label("revenue"),
+            func.coalesce(money.c.expense, 0.0).label("cost"),
+            func.coalesce(work.c.done_hours + work.c.active_hours, 0.0).label("hours"),
+            func.coalesce(work.c.approved_hours, 0.0).label("approved_hours"),
+            func.coalesce(work.c.done_tasks, 0).label("done_tasks"),
+            func.coalesce(work.c.active_tasks, 0).label("active_tasks"),
+        )
+        .outerjoin(money, money.c.project_id == P.id)
+        .outerjoin(work, work.c.project_id == P.id)
+        .where(P.organization_id == organization_id)
+        .order_by(P.created_at.desc(), P.id.desc())
+    )
+    if project_id:
+        stmt = stmt.where(P.id == project_id)
+    return stmt
+
+
+def members_statement(project_id: str):
+    """Task hours of the project per assignee (assigned_to NULL: unassigned tasks)."""
+    T, E = models.Task, models.Employee
+    return (
+        select(T.assigned_to.label("employee_id"), E.name, *stats.task_aggregates())
+        .select_from(T)
+        .outerjoin(E, E.id == T.assigned_to)
+        .where(T.project_id == project_id)
+        .group_by(T.assigned_to, E.name)
+    )
+
+
+def burn_statement(project_id: str):
+    """Income/expense of the project per week (weeks start on Monday)."""
+    X = models.Transaction
+    week = cast(func.date_trunc(literal_column("'week'"), cast(X.date, DateTime)), Date)
+    return (
+        select(week.label("week"), *stats.transaction_aggregates())
+        .where(X.project_id == project_id)
+        .group_by(week)
+        .order_by(week)
+    )
+
+
+def _summary(row) -> dict:
+    revenue, cost = float(row.revenue), float(row.cost)
+    profit = revenue - cost
+    return {
+        "project_id": row.project_id,
+        "name": row.name,
+        "status": row.status,
+        "budget": row.budget,
+        "revenue": round(revenue, 2),
+        "cost": round(cost, 2),
+        "profit": round(profit, 2),
+        "margin": round(profit / revenue * 100, 2) if revenue > 0 else 0,
+        "hours": round(float(row.hours), 2),
+        "approved_hours": round(float(row.approved_hours), 2),
+        "done_tasks": row.done_tasks,
+        "active_tasks": row.active_tasks,
+        "budget_remaining": round(row.budget - cost, 2) if row.budget is not None else None,
+    }
+
+
+async def _cached(key: tuple, db: AsyncSession, organization_id: Optional[str], compute):
+    versions = await crud_async.collection_versions(db, organization_id, *CACHE_COLLECTIONS)
+    if versions is None:
+        # без организации нет версий, по которым сбрасывать кэш
+        return await compute()
+    key = (*key, versions)
+    report = _cache.get(key)
+    if report is None:
+        report = await compute()
+        if report is not None:
+            _cache.set(key, report)
+    return report
+
+
+async def project_economics(db: AsyncSession, organization_id: Optional[str], project_id: str) -> Optional[dict]:
+    """schemas.ProjectEconomics of a project of the organization, or None if there is no such project."""
+
+    async def compute():
+        row = (await db.execute(projects_statement(organization_id, project_id))).first()
+        if row is None:
+            return None
+        report = _summary(row)
+        members = [
+            {
+                "employee_id": m.employee_id,
+                "name": m.name,
+                "hours": round(float(m.done_hours + m.active_hours), 2),
+                "approved_hours": round(float(m.approved_hours), 2),
+                "done_tasks": m.done_tasks,
+                "active_tasks": m.active_tasks,
+            }
+            for m in (await db.execute(members_statement(project_id))).all()
+        ]
+        members.sort(key=lambda m: (-m["hours"], m["name"] or ""))
+        burn, spent = [], 0.0
+        for w in (await db.execute(burn_statement(project_id))).all():
+            spent += float(w.expense)
+            burn.append({
+                "week": w.week,
+                "revenue": round(float(w.income), 2),
+                "cost": round(float(w.expense), 2),
+                "cumulative_cost": round(spent, 2),
+            })
+        return {**report, "members": members, "burn": burn}
+
+    return await _cached(("project", project_id), db, organization_id, compute)
+
+
+async def org_economics(db: AsyncSession, organization_id: Optional[str]) -> list:
+    """schemas.ProjectEconomicsRow of every project of the organization."""
+
+    async def compute():
+        return [_summary(row) for row in (await db.execute(projects_statement(organization_id))).all()]
+
+    return await _cached(("org", organization_id), db, organization_id, compute)
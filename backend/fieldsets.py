@@ -0,0 +1,30 @@
+"""Sparse fieldsets for list endpoints: `?fields=id,content,done`.
+
+The field list narrows both sides of a request: the Core SELECT takes only
+those columns (serialization.schema_columns, plus whatever the query itself
+needs, e.g. the keyset sort key) and serialization.json_rows writes only
+those keys, in schema field order. Without `fields` an endpoint selects and
+returns every field of its schema.
+"""
+from typing import Callable, Optional
+
+from fastapi import HTTPException, Query
+from pydantic import BaseModel
+
+
+def sparse_fields(schema: type[BaseModel]) -> Callable[..., Optional[tuple[str, ...]]]:
+    """Dependency for `?fields=`: validated field names of `schema`, or None for all."""
+    allowed = tuple(schema.model_fields)
+
+    def dependency(
+        fields: Optional[str] = Query(None, description=f"Comma-separated subset of: {', '.join(allowed)}"),
+    ) -> Optional[tuple[str, ...]]:
+        if not fields:
+            return None
+        names = tuple(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+        unknown = [f for f in names if f not in schema.model_fields]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+        return names or None
+
+    return dependency
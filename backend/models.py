@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, Float, Date, DateTime, Text, ForeignKey, JSON, UniqueConstraint
+from sqlalchemy import BigInteger, Column, Integer, String, Boolean, Float, Date, DateTime, Text, ForeignKey, JSON, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
@@ -38,7 +38,7 @@ class Employee(Base):
     # Link to app user (optional, unique per user)
     user_id = Column(String, ForeignKey("users.id"), unique=True, nullable=True)
     # Tenant scoping
-    organization_id = Column(String, ForeignKey("organizations.id"), nullable=True)
+    organization_id = Column(String, ForeignKey("organizations.id"), nullable=True, index=True)
     
     # Relationships
     transactions = relationship("Transaction", back_populates="employee")
@@ -60,10 +60,12 @@ class Project(Base):
     status = Column(String, nullable=False, default="active")  # active, completed, paused, cancelled
     start_date = Column(Date, nullable=True)
     end_date = Column(Date, nullable=True)
+    # planned spend; budget remaining = budget - expenses linked to the project
+    budget = Column(Float, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     # Tenant scoping
-    organization_id = Column(String, ForeignKey("organizations.id"), nullable=True)
+    organization_id = Column(String, ForeignKey("organizations.id"), nullable=True, index=True)
     
     # Relationships
     links = relationship("ProjectLink", back_populates="project", cascade="all, delete-orphan")
@@ -74,7 +76,7 @@ class ProjectLink(Base):
     __tablename__ = "project_links"
     
     id = Column(String, primary_key=True)
-    project_id = Column(String, ForeignKey("projects.id"), nullable=False)
+    project_id = Column(String, ForeignKey("projects.id"), nullable=False, index=True)
     title = Column(String, nullable=False)
     url = Column(String, nullable=False)
     link_type = Column(String, nullable=False)  # repo, docs, design, other
@@ -88,7 +90,7 @@ class ProjectMember(Base):
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     project_id = Column(String, ForeignKey("projects.id"), nullable=False)
-    employee_id = Column(String, ForeignKey("employees.id"), nullable=False)
+    employee_id = Column(String, ForeignKey("employees.id"), nullable=False, index=True)
     joined_at = Column(DateTime(timezone=True), server_default=func.now())
     # Legacy: project-specific hourly rate (treated as BILL rate)
     hourly_rate = Column(Integer, nullable=True)
@@ -114,13 +116,18 @@ class Transaction(Base):
     category = Column(String, nullable=True)
     description = Column(String, nullable=True)
     tags = Column(JSON, default=list)
-    employee_id = Column(String, ForeignKey("employees.id"), nullable=True)
-    project_id = Column(String, ForeignKey("projects.id"), nullable=True)
-    task_id = Column(String, ForeignKey("tasks.id"), nullable=True)
+    employee_id = Column(String, ForeignKey("employees.id"), nullable=True, index=True)
+    project_id = Column(String, ForeignKey("projects.id"), nullable=True, index=True)
+    task_id = Column(String, ForeignKey("tasks.id"), nullable=True, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     # Tenant scoping
     organization_id = Column(String, ForeignKey("organizations.id"), nullable=True)
+
+    # Keyset pagination / date ranges of GET /api/transactions
+    __table_args__ = (
+        Index("ix_transactions_org_date", "organization_id", date.desc(), id.desc()),
+    )
     
     # Relationships
     employee = relationship("Employee", back_populates="transactions")
@@ -134,7 +141,7 @@ class Task(Base):
     due_date = Column(Date, nullable=True)
     done = Column(Boolean, default=False, nullable=False)
     assigned_to = Column(String, ForeignKey("employees.id"), nullable=True)
-    project_id = Column(String, ForeignKey("projects.id"), nullable=True)
+    project_id = Column(String, ForeignKey("projects.id"), nullable=True, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     # New: time tracking and rates
@@ -159,6 +166,15 @@ class Task(Base):
     expense_tx_id = Column(String, nullable=True)
     # Tenant scoping
     organization_id = Column(String, ForeignKey("organizations.id"), nullable=True)
+
+    # Keyset pagination of GET /api/tasks (newest first): org list and an employee's own list
+    __table_args__ = (
+        Index("ix_tasks_org_created", "organization_id", created_at.desc(), id.desc()),
+        Index("ix_tasks_assignee_created", "assigned_to", created_at.desc(), id.desc()),
+        # Open tasks by due date (overdue reminders, ?done=false&due_to=): only not-done rows
+        Index("ix_tasks_org_open_due", "organization_id", "due_date", postgresql_where=(done == False)),
+        Index("ix_tasks_open_due", "due_date", postgresql_where=(done == False)),
+    )
     
     # Relationships
     assigned_employee = relationship("Employee", back_populates="tasks")
@@ -200,6 +216,11 @@ class ReadingItem(Base):
     # Owner user id (scoping)
     user_id = Column(String, ForeignKey("users.id"), nullable=True)
 
+    __table_args__ = (
+        # список чтения пользователя по статусу, новые сверху (keyset по added_date, id)
+        Index("ix_reading_items_user_status_added", "user_id", "status", added_date.desc(), id.desc()),
+    )
+
 class Note(Base):
     __tablename__ = "notes"
     
@@ -214,6 +235,19 @@ class Note(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     # Owner user id (scoping)
     user_id = Column(String, ForeignKey("users.id"), nullable=True)
+    # Organization of the owner: shared notes are visible within it only
+    organization_id = Column(String, ForeignKey("organizations.id"), nullable=True)
+
+    __table_args__ = (
+        # лента: свои заметки и общие заметки организации, по дате (keyset)
+        Index("ix_notes_user_date", "user_id", date.desc(), id.desc(), postgresql_where=(user_id.isnot(None))),
+        Index("ix_notes_org_shared_date", "organization_id", date.desc(), id.desc(), postgresql_where=(shared == True)),
+        # общие заметки, которым бэкфилл note_org_ids ещё не проставил организацию
+        Index(
+            "ix_notes_legacy_shared_date", date.desc(), id.desc(),
+            postgresql_where=(organization_id.is_(None) & (shared == True)),
+        ),
+    )
 
 # --- Auth models ---
 class User(Base):
@@ -228,7 +262,7 @@ class User(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     # Tenant scoping
-    organization_id = Column(String, ForeignKey("organizations.id"), nullable=True)
+    organization_id = Column(String, ForeignKey("organizations.id"), nullable=True, index=True)
 
     profile = relationship("UserProfile", back_populates="user", uselist=False, cascade="all, delete-orphan")
 
@@ -266,8 +300,11 @@ class Session(Base):
     __tablename__ = "sessions"
 
     token = Column(String, primary_key=True)
-    user_id = Column(String, ForeignKey("users.id"), nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now()) 
+    user_id = Column(String, ForeignKey("users.id"), nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Скользящий срок жизни: продлевается при активности (не чаще SESSION_TOUCH_INTERVAL_MINUTES)
+    expires_at = Column(DateTime(timezone=True), nullable=True, index=True)
+    last_seen_at = Column(DateTime(timezone=True), nullable=True)
 
 # Доп: привязка, кто пригласил пользователя (для исторической связи)
 from sqlalchemy import ForeignKey as _FK
@@ -313,4 +350,43 @@ class ChatMessage(Base):
     content = Column(Text, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
-    session = relationship("ChatSession", back_populates="messages") 
\ No newline at end of file
+    session = relationship("ChatSession", back_populates="messages") 
+# --- Data backfills (see backfill.py) ---
+class BackfillProgress(Base):
+    __tablename__ = "backfill_progress"
+
+    name = Column(String, primary_key=True)
+    last_key = Column(String, nullable=True)  # keyset cursor: last processed id
+    rows_scanned = Column(Integer, default=0, server_default="0", nullable=False)
+    rows_updated = Column(Integer, default=0, server_default="0", nullable=False)
+    started_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+# --- Per-organization collection versions (ETag / conditional GET, see crud.py) ---
+class CollectionVersion(Base):
+    __tablename__ = "collection_versions"
+
+    organization_id = Column(String, primary_key=True)
+    collection = Column(String, primary_key=True)  # tasks, projects, employees, transactions
+    version = Column(BigInteger, nullable=False, default=1, server_default="1")
+
+# --- Monthly finance rollups (sums of transactions, maintained in crud.py) ---
+class FinanceRollup(Base):
+    __tablename__ = "finance_rollups"
+
+    # key parts without a value (legacy rows without organization, no category/project) are ''
+    organization_id = Column(String, primary_key=True)
+    month = Column(Date, primary_key=True)  # first day of the month
+    transaction_type = Column(String, primary_key=True)  # income, expense
+    category = Column(String, primary_key=True)
+    project_id = Column(String, primary_key=True)
+    amount = Column(Float, nullable=False, default=0, server_default="0")
+    tx_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+# --- Last run of periodic jobs shared by all workers (session purge, see main.py) ---
+class JobRun(Base):
+    __tablename__ = "job_runs"
+
+    name = Column(String, primary_key=True)
+    last_run_at = Column(DateTime(timezone=True), nullable=False)
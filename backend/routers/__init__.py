@@ -0,0 +1,7 @@
+"""Per-domain APIRouter modules, mounted by main.create_app()."""
+from fastapi import APIRouter
+
+
+def make_router() -> APIRouter:
+    # the response class (ORJSONResponse) is the app's default, applied by include_router
+    return APIRouter()
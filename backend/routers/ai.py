@@ -0,0 +1,45 @@
+"""AI command/chat endpoints.
+
+The assistant module (LLM clients, command engine) is imported inside the
+handlers: it loads on the first AI request, not when the app starts.
+"""
+from typing import Optional
+
+from fastapi import Depends
+from sqlalchemy.orm import Session
+
+import crud
+import schemas
+from auth import Principal, get_optional_principal
+from database import get_db, get_read_db
+from routers import make_router
+
+router = make_router()
+
+
+@router.post("/api/ai/command", response_model=schemas.AIChatResponse)
+def ai_command(
+    payload: schemas.AICommandRequest,
+    db: Session = Depends(get_db),
+    read_db: Session = Depends(get_read_db),
+    principal: Optional[Principal] = Depends(get_optional_principal),
+):
+    import assistant
+    return assistant.run_command(payload, db, read_db, principal)
+
+@router.post("/api/ai/chat", response_model=schemas.MessageResponse)
+def ai_chat(payload: schemas.AICommandRequest, db: Session = Depends(get_db), principal: Optional[Principal] = Depends(get_optional_principal)):
+    """Свободный чат без JSON-команд. Возвращает обычный текстовый ответ модели."""
+    import assistant
+    reply = assistant.llm_call_for_user(payload.query, principal)
+    # persist both user and assistant messages if chat_id provided
+    try:
+        uid = payload.user_id or (principal.id if principal else None)
+        if uid and payload.chat_id:
+            s = crud.get_chat_session(db, uid, payload.chat_id)
+            if s:
+                crud.add_chat_message(db, s.id, "user", payload.query)
+                crud.add_chat_message(db, s.id, "assistant", (reply or "").strip()[:4000])
+    except Exception:
+        pass
+    return {"message": (reply or "").strip()[:4000]}
@@ -0,0 +1,241 @@
+"""Registration, login/logout, profile, invite codes and admin diagnostics."""
+import os
+from typing import List, Optional
+
+from fastapi import Depends, File, Header, HTTPException, UploadFile
+from sqlalchemy import text as _text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+import crud
+import crud_async
+import models
+import schemas
+from auth import Principal, bearer_token, get_principal, get_principal_async, require_admin
+from config import settings
+from database import get_async_db, get_db, pool_status
+from routers import make_router
+
+router = make_router()
+
+AVATAR_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "uploads", "avatars")
+
+
+# --- Auth endpoints ---
+@router.post("/api/auth/register", response_model=schemas.AuthResponse)
+def register(payload: schemas.RegisterRequest, db: Session = Depends(get_db)):
+    # Invite code: treat empty/whitespace as absent
+    raw_code = getattr(payload, "code", None)
+    if isinstance(raw_code, str):
+        raw_code = raw_code.strip()
+    # Treat empty string as None
+    if not raw_code:
+        raw_code = None
+    
+    code = None
+    if raw_code:
+        code = (
+            db.query(models.RegistrationCode)
+            .filter(models.RegistrationCode.code == raw_code, models.RegistrationCode.is_active == True)
+            .first()
+        )
+        if not code:
+            raise HTTPException(status_code=400, detail="Invalid registration code")
+
+    existing = crud.get_user_by_email(db, payload.email)
+    if existing:
+        raise HTTPException(status_code=400, detail="Email already registered")
+
+    # Validate confirm password
+    if getattr(payload, "confirm_password", None) and payload.confirm_password != payload.password:
+        raise HTTPException(status_code=400, detail="Passwords do not match")
+
+    # Compose name from first/last if provided
+    name = None
+    if getattr(payload, "first_name", None) or getattr(payload, "last_name", None):
+        name = f"{payload.first_name or ''} {payload.last_name or ''}".strip()
+
+    # Determine role: if no users exist yet and no code provided -> make this user an owner
+    # If no code -> создаём нового владельца с собственной организацией
+    if not code:
+        init_role = "owner"
+    else:
+        init_role = "user"
+    # Determine organization_id
+    org_id = None
+    if init_role == "owner":
+        # create organization for this owner
+        org_id = crud.generate_id()
+        try:
+            db.execute(_text("INSERT INTO organizations (id, name) VALUES (:id, :name)"), {"id": org_id, "name": name or payload.email})
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise HTTPException(status_code=500, detail="Failed to create organization")
+    else:
+        # get inviter's organization via created_by_user_id
+        inv_org = None
+        if code and getattr(code, "created_by_user_id", None):
+            inv_org = db.execute(_text("SELECT organization_id FROM users WHERE id = :id"), {"id": code.created_by_user_id}).scalar()
+        if not inv_org:
+            raise HTTPException(status_code=400, detail="Invalid invite: missing organization")
+        org_id = inv_org
+
+    user = crud.create_user(db, email=payload.email, password=payload.password, role=init_role, name=name)
+    # set organization for user
+    try:
+        db.execute(_text("UPDATE users SET organization_id = :oid WHERE id = :uid"), {"oid": org_id, "uid": user.id})
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise HTTPException(status_code=500, detail="Failed to assign organization")
+    # Link invited_by_user_id if code has creator
+    try:
+        if code and getattr(code, "created_by_user_id", None):
+            # set invited_by_user_id on user
+            db.execute(_text("UPDATE users SET invited_by_user_id = :by WHERE id = :id"), {"by": code.created_by_user_id, "id": user.id})
+            db.commit()
+    except Exception:
+        db.rollback()
+    # Ensure employee record linked to this user
+    emp = crud.ensure_employee_for_user(db, user, getattr(payload, "first_name", None), getattr(payload, "last_name", None))
+    # set organization for employee
+    try:
+        db.execute(_text("UPDATE employees SET organization_id = :oid WHERE id = :eid"), {"oid": org_id, "eid": emp.id})
+        crud.bump_collection_versions(db, org_id, "employees")
+        db.commit()
+    except Exception:
+        db.rollback()
+
+    return {"user": crud.serialize_user(user), **crud.issue_auth_tokens(db, user)}
+
+# --- Admin diagnostics ---
+@router.get("/api/admin/db-pool")
+def db_pool_info(user: Principal = Depends(require_admin)):
+    # Состояние пула соединений этого воркера: занято/переполнение/ожидания/таймауты
+    return pool_status()
+
+# --- Invite codes management (owner/admin) ---
+@router.get("/api/invites", response_model=List[schemas.InviteCodeOut])
+def list_invites(user: Principal = Depends(require_admin), db: Session = Depends(get_db)):
+    # Получить всех пользователей из той же организации
+    org_users = db.execute(_text("SELECT id FROM users WHERE organization_id = :org_id"), {"org_id": user.organization_id}).fetchall()
+    org_user_ids = [row[0] for row in org_users]
+
+    # Миграция: присвоить текущего пользователя как создателя для старых кодов без владельца
+    try:
+        db.execute(_text("UPDATE registration_codes SET created_by_user_id = :uid WHERE created_by_user_id IS NULL"), {"uid": user.id})
+        db.commit()
+    except Exception:
+        db.rollback()
+    
+    # Фильтровать коды по создателям из той же организации (после миграции)
+    rows = db.query(models.RegistrationCode).filter(
+        models.RegistrationCode.created_by_user_id.in_(org_user_ids)
+    ).order_by(models.RegistrationCode.created_at.desc()).all()
+    return [{"id": r.id, "code": r.code, "is_active": bool(r.is_active), "created_at": r.created_at} for r in rows]
+
+@router.post("/api/invites", response_model=schemas.InviteCodeOut)
+def create_invite(payload: schemas.InviteCodeCreate, user: Principal = Depends(require_admin), db: Session = Depends(get_db)):
+    # If code provided, ensure unique; otherwise generate
+    code = (payload.code or "").strip()
+    if not code:
+        import secrets, string
+        alphabet = string.ascii_uppercase + string.digits
+        code = "".join(secrets.choice(alphabet) for _ in range(8))
+    existing = db.query(models.RegistrationCode).filter(models.RegistrationCode.code == code).first()
+    if existing:
+        raise HTTPException(status_code=400, detail="Code already exists")
+    # Insert with creator set to scope by organization
+    rc = models.RegistrationCode(code=code, is_active=True, created_by_user_id=user.id)
+    db.add(rc)
+    db.commit()
+    db.refresh(rc)
+    return {"id": rc.id, "code": rc.code, "is_active": bool(rc.is_active), "created_at": rc.created_at}
+
+@router.put("/api/invites/{invite_id}/deactivate", response_model=schemas.InviteCodeOut)
+def deactivate_invite(invite_id: int, user: Principal = Depends(require_admin), db: Session = Depends(get_db)):
+    # Получить всех пользователей из той же организации
+    org_users = db.execute(_text("SELECT id FROM users WHERE organization_id = :org_id"), {"org_id": user.organization_id}).fetchall()
+    org_user_ids = [row[0] for row in org_users]
+    
+    # Найти код и проверить, что он принадлежит организации пользователя
+    rc = db.query(models.RegistrationCode).filter(
+        models.RegistrationCode.id == invite_id,
+        models.RegistrationCode.created_by_user_id.in_(org_user_ids)
+    ).first()
+    if not rc:
+        raise HTTPException(status_code=404, detail="Not found")
+    rc.is_active = False
+    db.commit()
+    db.refresh(rc)
+    return {"id": rc.id, "code": rc.code, "is_active": bool(rc.is_active), "created_at": rc.created_at}
+
+@router.post("/api/auth/login", response_model=schemas.AuthResponse)
+def login(payload: schemas.LoginRequest, db: Session = Depends(get_db)):
+    user = crud.get_user_by_email(db, payload.email)
+    if not user or not crud.verify_password(user, payload.password):
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    return {"user": crud.serialize_user(user), **crud.issue_auth_tokens(db, user)}
+
+@router.get("/api/auth/me", response_model=schemas.MeResponse)
+async def me(principal: Principal = Depends(get_principal_async), db: AsyncSession = Depends(get_async_db)):
+    user = await crud_async.get_user(db, principal.id)
+    if not user:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    return crud.serialize_user(user)
+
+@router.put("/api/auth/profile", response_model=schemas.MeResponse)
+def update_profile(payload: schemas.UserUpdate, user: Principal = Depends(get_principal), db: Session = Depends(get_db)):
+    profile_patch = payload.profile.model_dump(exclude_unset=True) if payload.profile else None
+    updated = crud.update_user_profile(db, user.id, payload.name, profile_patch)
+    return crud.serialize_user(updated)
+
+@router.post("/api/auth/avatar", response_model=schemas.MeResponse)
+def upload_avatar(principal: Principal = Depends(get_principal), file: UploadFile = File(...), db: Session = Depends(get_db)):
+    user = principal.user
+
+    # Save file
+    ext = os.path.splitext(file.filename or "")[1].lower() or ".jpg"
+    safe_name = f"{user.id}{ext}"
+    dst_path = os.path.join(AVATAR_DIR, safe_name)
+    with open(dst_path, "wb") as out:
+        out.write(file.file.read())
+
+    # Update profile
+    rel_url = f"/uploads/avatars/{safe_name}"
+    abs_url = f"http://localhost:8000{rel_url}"
+    crud.update_user_profile(db, user.id, None, {"avatar_url": abs_url})
+    user = crud.get_user_by_email(db, user.email)
+    return crud.serialize_user(user)
+
+@router.put("/api/auth/password", response_model=schemas.MessageResponse)
+def change_password(payload: schemas.PasswordChange, user: Principal = Depends(get_principal), db: Session = Depends(get_db)):
+    ok = crud.change_user_password(db, user.id, payload.current_password, payload.new_password)
+    if not ok:
+        raise HTTPException(status_code=400, detail="Invalid current password")
+    return {"message": "Password updated"}
+
+@router.post("/api/auth/refresh", response_model=schemas.TokenResponse)
+def refresh(payload: schemas.RefreshRequest, db: Session = Depends(get_db)):
+    # Новый access-токен по refresh-токену (режим AUTH_MODE=signed)
+    if settings.AUTH_MODE != "signed":
+        raise HTTPException(status_code=400, detail="Token refresh is not enabled")
+    issued = crud.refresh_auth_tokens(db, payload.refresh_token)
+    if not issued:
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+    return issued
+
+@router.post("/api/auth/logout", response_model=schemas.MessageResponse)
+def logout(payload: Optional[schemas.RefreshRequest] = None, authorization: Optional[str] = Header(None), db: Session = Depends(get_db)):
+    # В режиме signed завершается сессия refresh-токена; сам access-токен доживает до exp
+    token = payload.refresh_token if payload else bearer_token(authorization)
+    if token:
+        crud.delete_session(db, token)
+    return {"message": "Logged out"}
+
+@router.post("/api/auth/logout-all", response_model=schemas.MessageResponse)
+def logout_all(user: Principal = Depends(get_principal), db: Session = Depends(get_db)):
+    # Завершить все сессии пользователя (на всех устройствах)
+    crud.delete_user_sessions(db, user.id)
+    return {"message": "Logged out everywhere"}
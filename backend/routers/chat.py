@@ -0,0 +1,47 @@
+"""Chat sessions and their message history."""
+from typing import List
+
+from fastapi import Depends, HTTPException
+from sqlalchemy.orm import Session
+
+import crud
+import schemas
+from auth import Principal, get_principal
+from database import get_db
+from routers import make_router
+
+router = make_router()
+
+
+@router.get("/api/chat/sessions", response_model=List[schemas.ChatSessionOut])
+def list_sessions(user: Principal = Depends(get_principal), db: Session = Depends(get_db)):
+    return crud.list_chat_sessions(db, user.id)
+
+@router.post("/api/chat/sessions", response_model=schemas.ChatSessionOut)
+def create_session(payload: schemas.ChatSessionCreate, user: Principal = Depends(get_principal), db: Session = Depends(get_db)):
+    return crud.create_chat_session(db, user.id, payload.title)
+
+@router.put("/api/chat/sessions/{session_id}", response_model=schemas.ChatSessionOut)
+def rename_session(session_id: str, payload: schemas.ChatSessionUpdate, user: Principal = Depends(get_principal), db: Session = Depends(get_db)):
+    s = crud.rename_chat_session(db, user.id, session_id, (payload.title or None))
+    if not s:
+        raise HTTPException(status_code=404, detail="Not found")
+    return s
+
+@router.delete("/api/chat/sessions/{session_id}", response_model=schemas.MessageResponse)
+def remove_session(session_id: str, user: Principal = Depends(get_principal), db: Session = Depends(get_db)):
+    ok = crud.delete_chat_session(db, user.id, session_id)
+    if not ok:
+        raise HTTPException(status_code=404, detail="Not found")
+    return {"message": "Deleted"}
+
+@router.get("/api/chat/sessions/{session_id}/messages", response_model=List[schemas.ChatMessageOut])
+def list_messages(session_id: str, user: Principal = Depends(get_principal), db: Session = Depends(get_db)):
+    return crud.list_chat_messages(db, user.id, session_id)
+
+@router.delete("/api/chat/sessions/{session_id}/messages", response_model=schemas.MessageResponse)
+def clear_messages(session_id: str, user: Principal = Depends(get_principal), db: Session = Depends(get_db)):
+    ok = crud.clear_chat_messages(db, user.id, session_id)
+    if not ok:
+        raise HTTPException(status_code=404, detail="Not found")
+    return {"message": "Cleared"}
@@ -0,0 +1,149 @@
+"""Dashboard bootstrap: the first-paint state of every enabled module in one response."""
+import asyncio
+from datetime import date, timedelta
+from typing import Optional
+
+from fastapi import Depends, HTTPException, Query, Request
+
+import crud
+import crud_async
+import models
+import schemas
+from auth import Principal, get_principal_async
+from config import settings
+from database import AsyncReadSessionLocal, AsyncSessionLocal, _use_replica
+from pagination import MAX_LIMIT, PageParams
+from routers import make_router
+from serialization import json_body, obj_dicts, row_dicts
+
+router = make_router()
+
+
+def _listing(items: list, count: Optional[int] = None, next_cursor: Optional[str] = None) -> dict:
+    return {"items": items, "count": len(items) if count is None else count, "next_cursor": next_cursor}
+
+
+def _month_bounds(today: date) -> tuple[date, date]:
+    first = today.replace(day=1)
+    return first, (first + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+
+
+# Каждый загрузчик повторяет область видимости своего list-эндпойнта
+# (admin — вся организация, пользователь — своё) и работает в своей сессии.
+async def _me(db, user: Principal, limit: int):
+    u = await crud_async.get_user(db, user.id)
+    return schemas.MeResponse.model_validate(crud.serialize_user(u)).model_dump() if u else None
+
+
+async def _employees(db, user: Principal, limit: int):
+    if user.is_admin:
+        emps = await crud_async.list_org_employees(db, user.organization_id)
+    else:
+        emp = await crud_async.get_employee(db, user.employee_id)
+        emps = [emp] if emp else []
+    return _listing(obj_dicts(await crud_async.attach_avatars(db, emps), schemas.Employee))
+
+
+async def _projects(db, user: Principal, limit: int):
+    if user.is_admin:
+        projects = await crud_async.list_org_projects(db, user.organization_id)
+    else:
+        projects = await crud_async.list_member_projects(db, user.employee_id)
+    return _listing(obj_dicts(projects, schemas.Project))
+
+
+async def _tasks(db, user: Principal, limit: int):
+    T = models.Task
+    page = PageParams(limit=limit)
+    if user.is_admin:
+        rows, next_cursor = await crud_async.list_org_tasks(db, user.organization_id, page=page)
+        count = await crud_async.count_rows(db, T, T.organization_id == user.organization_id)
+    elif user.employee_id:
+        rows, next_cursor = await crud_async.list_employee_tasks(db, user.employee_id, page=page)
+        count = await crud_async.count_rows(db, T, T.assigned_to == user.employee_id)
+    else:
+        return _listing([])
+    return _listing(row_dicts(rows, schemas.Task), count, next_cursor)
+
+
+async def _transactions(db, user: Principal, limit: int):
+    if not user.is_admin:
+        return _listing([])
+    X = models.Transaction
+    rows, next_cursor = await crud_async.list_org_transactions(db, user.organization_id, page=PageParams(limit=limit))
+    count = await crud_async.count_rows(db, X, X.organization_id == user.organization_id)
+    return _listing(row_dicts(rows, schemas.Transaction), count, next_cursor)
+
+
+async def _finance(db, user: Principal, limit: int):
+    # итоги текущего месяца — из помесячных сумм finance_rollups, без чтения транзакций
+    if not user.is_admin:
+        return None
+    date_from, date_to = _month_bounds(date.today())
+    totals = await crud_async.finance_summary_month(db, user.organization_id, date_from.year, date_from.month)
+    return {"month": date_from.strftime("%Y-%m"), "date_from": date_from, "date_to": date_to, **totals}
+
+
+async def _goals(db, user: Principal, limit: int):
+    # only the caller's goals: goals have no organization, and the bootstrap must not list others'
+    return _listing(obj_dicts(await crud_async.list_goals(db, user.id), schemas.Goal))
+
+
+async def _notes(db, user: Principal, limit: int):
+    rows, next_cursor = await crud_async.list_visible_notes(db, user.id, user.organization_id, page=PageParams(limit=limit))
+    count = await crud_async.count_visible_notes(db, user.id, user.organization_id)
+    return _listing(row_dicts(rows, schemas.Note), count, next_cursor)
+
+
+async def _reading(db, user: Principal, limit: int):
+    rows, next_cursor = await crud_async.list_reading_items(db, user.id, page=PageParams(limit=limit))
+    count = await crud_async.count_reading_items(db, user.id)
+    return _listing(row_dicts(rows, schemas.ReadingItem), count, next_cursor)
+
+
+MODULES = {
+    "me": _me,
+    "employees": _employees,
+    "projects": _projects,
+    "tasks": _tasks,
+    "transactions": _transactions,
+    "finance": _finance,
+    "goals": _goals,
+    "notes": _notes,
+    "reading": _reading,
+}
+
+_unknown = [m for m in settings.DASHBOARD_MODULES if m not in MODULES]
+if _unknown:
+    print(f"DASHBOARD_MODULES: unknown modules ignored: {', '.join(_unknown)}")
+ENABLED_MODULES = tuple(m for m in dict.fromkeys(settings.DASHBOARD_MODULES) if m in MODULES)
+
+
+@router.get("/api/dashboard/bootstrap")
+async def bootstrap(
+    request: Request,
+    modules: Optional[str] = Query(None, description=f"Comma-separated subset of: {', '.join(ENABLED_MODULES)}"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_LIMIT),
+    user: Principal = Depends(get_principal_async),
+):
+    # Один запрос вместо отдельных me/employees/projects/tasks/...: модули читаются
+    # параллельно, каждый в своей AsyncSession (одна сессия не выполняет запросы одновременно);
+    # не больше DASHBOARD_CONCURRENCY соединений из пула на запрос.
+    # Постраничные модули (tasks, transactions, notes, reading) отдают первую страницу и next_cursor
+    # для продолжения через свои эндпойнты (?cursor=).
+    names = ENABLED_MODULES
+    if modules:
+        names = tuple(dict.fromkeys(m.strip() for m in modules.split(",") if m.strip()))
+        rejected = [m for m in names if m not in ENABLED_MODULES]
+        if rejected:
+            raise HTTPException(status_code=400, detail=f"Unknown or disabled modules: {', '.join(rejected)}")
+    limit = limit or settings.DASHBOARD_PAGE_SIZE
+    factory = AsyncReadSessionLocal if _use_replica(request) else AsyncSessionLocal
+    slots = asyncio.Semaphore(max(1, settings.DASHBOARD_CONCURRENCY))
+
+    async def load(name: str):
+        async with slots, factory() as db:
+            return await MODULES[name](db, user, limit)
+
+    results = await asyncio.gather(*(load(name) for name in names))
+    return json_body(dict(zip(names, results)))
@@ -0,0 +1,167 @@
+"""Employee cards, per-employee stats and the org-wide stats leaderboard."""
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+import crud
+import crud_async
+import schemas
+import stats
+from auth import Principal, get_optional_principal_async, get_principal, get_principal_async, require_admin
+from conditional import check_collection
+from database import get_async_db, get_async_read_db, get_db, get_read_db
+from pagination import PageParams, set_next_cursor
+from routers import make_router
+from serialization import json_rows
+
+router = make_router()
+
+
+# Employee endpoints
+@router.get("/api/employees", response_model=List[schemas.Employee])
+async def get_employees(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    user: Optional[Principal] = Depends(get_optional_principal_async),
+):
+    if user:
+        cached = await check_collection(db, "employees", request, response, user)
+        if cached:
+            return cached
+        # Owners/admins: вся организация
+        if user.is_admin:
+            emps = await crud_async.list_org_employees(db, user.organization_id)
+            return await crud_async.attach_avatars(db, emps)
+        # Обычный пользователь: только собственная карточка
+        emp = await crud_async.get_employee(db, user.employee_id)
+        return await crud_async.attach_avatars(db, [emp]) if emp else []
+    # Без авторизации: пусто
+    return []
+
+# KPI всех сотрудников организации одним запросом (до /api/employees/{employee_id})
+@router.get("/api/employees/stats", response_model=List[schemas.EmployeeStatsRow])
+async def get_employees_stats(
+    response: Response,
+    query: schemas.EmployeeStatsQuery = Depends(),
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_read_db),
+    user: Principal = Depends(get_principal_async),
+):
+    # Те же показатели, что POST /api/employees/{id}/stats, но сгруппированными запросами
+    # по всей организации, с сортировкой и пагинацией в БД.
+    # Обычный пользователь получает только свою строку.
+    if not user.is_admin and not user.employee_id:
+        return []
+    rows, next_cursor = await crud_async.list_employee_stats(
+        db, user.organization_id, query, page, employee_id=None if user.is_admin else user.employee_id
+    )
+    set_next_cursor(response, next_cursor)
+    return json_rows(rows, schemas.EmployeeStatsRow, response=response)
+
+# Create employee (owner/admin)
+@router.post("/api/employees", response_model=schemas.Employee)
+def create_employee(employee: schemas.EmployeeCreate, db: Session = Depends(get_db), user: Principal = Depends(require_admin)):
+    emp = crud.create_employee(db, employee)
+    # присваиваем организацию создателя
+    from sqlalchemy import text as _t
+    db.execute(_t("UPDATE employees SET organization_id = :oid WHERE id = :id"), {"oid": user.organization_id, "id": emp.id})
+    crud.bump_collection_versions(db, user.organization_id, "employees")
+    db.commit()
+    return emp
+
+# Update employee (owner/admin)
+@router.put("/api/employees/{employee_id}", response_model=schemas.Employee)
+def update_employee(employee_id: str, employee: schemas.EmployeeUpdate, db: Session = Depends(get_db), user: Principal = Depends(require_admin)):
+    emp = crud.update_employee(db, employee_id, employee)
+    if not emp:
+        raise HTTPException(status_code=404, detail="Employee not found")
+    # доп. проверка на принадлежность организации
+    if emp.organization_id and emp.organization_id != user.organization_id:
+        raise HTTPException(status_code=403, detail="Forbidden")
+    return emp
+
+# Update employee status (owner/admin)
+@router.put("/api/employees/{employee_id}/status", response_model=schemas.Employee)
+def update_employee_status(employee_id: str, payload: schemas.EmployeeStatusUpdate, db: Session = Depends(get_db), user: Principal = Depends(require_admin)):
+    emp = crud.update_employee_status(db, employee_id, payload)
+    if not emp:
+        raise HTTPException(status_code=404, detail="Employee not found")
+    return emp
+
+# Delete employee (owner/admin)
+@router.delete("/api/employees/{employee_id}", response_model=schemas.MessageResponse)
+def delete_employee(employee_id: str, db: Session = Depends(get_db), user: Principal = Depends(require_admin)):
+    ok = crud.delete_employee(db, employee_id)
+    if not ok:
+        raise HTTPException(status_code=404, detail="Employee not found")
+    return {"message": "Employee deleted successfully"}
+
+@router.get("/api/employees/{employee_id}", response_model=schemas.Employee)
+def get_employee(employee_id: str, db: Session = Depends(get_db), user: Principal = Depends(get_principal)):
+    employee = crud.get_employee(db, employee_id)
+    if not employee:
+        raise HTTPException(status_code=404, detail="Employee not found")
+    # Admin/owner: может смотреть сотрудников своей организации
+    if user.is_admin:
+        if employee.organization_id != user.organization_id:
+            raise HTTPException(status_code=404, detail="Employee not found")
+        return employee
+    # Обычный пользователь: только себя
+    if user.employee_id != employee.id:
+        raise HTTPException(status_code=404, detail="Employee not found")
+    return employee
+
+@router.post("/api/employees/{employee_id}/stats", response_model=schemas.EmployeeStats)
+def get_employee_stats(
+    employee_id: str, 
+    stats_request: schemas.EmployeeStatsRequest,
+    db: Session = Depends(get_read_db),
+    user: Principal = Depends(get_principal)
+):
+    employee = crud.get_employee(db, employee_id)
+    if not employee:
+        raise HTTPException(status_code=404, detail="Employee not found")
+    
+    # Check permissions
+    if user.is_admin:
+        if employee.organization_id != user.organization_id:
+            raise HTTPException(status_code=404, detail="Employee not found")
+    else:
+        # Regular user: only their own stats
+        if user.employee_id != employee.id:
+            raise HTTPException(status_code=404, detail="Employee not found")
+    
+    # Parse date filters
+    date_from = None
+    date_to = None
+    period_label = "Всё время"
+    
+    if stats_request.date_from:
+        try:
+            date_from = datetime.strptime(stats_request.date_from, "%Y-%m-%d").date()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid date_from format")
+    
+    if stats_request.date_to:
+        try:
+            date_to = datetime.strptime(stats_request.date_to, "%Y-%m-%d").date()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid date_to format")
+    
+    # Handle period presets
+    if stats_request.period_type == "month" and date_from and date_to:
+        period_label = f"{date_from.strftime('%B %Y')}"
+    elif stats_request.period_type == "quarter" and date_from and date_to:
+        quarter = (date_from.month - 1) // 3 + 1
+        period_label = f"Q{quarter} {date_from.year}"
+    elif stats_request.period_type == "custom" and date_from and date_to:
+        period_label = f"{date_from.strftime('%d.%m.%Y')} - {date_to.strftime('%d.%m.%Y')}"
+    elif date_from and date_to:
+        period_label = f"{date_from.strftime('%d.%m.%Y')} - {date_to.strftime('%d.%m.%Y')}"
+    
+    # Все показатели — одним агрегирующим запросом (stats.py, тот же расчёт у ассистента)
+    return stats.employee_stats(db, employee, date_from, date_to, period_label)
@@ -0,0 +1,134 @@
+"""Transactions (income/expense)."""
+import json
+from datetime import date, datetime
+from typing import List, Optional
+
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+import crud
+import crud_async
+import schemas
+from auth import Principal, get_optional_principal_async, require_admin, require_admin_async
+from conditional import check_collection
+from database import get_async_read_db, get_db
+from pagination import TOTALS_HEADER, PageParams, set_next_cursor
+from routers import make_router
+from serialization import json_rows
+
+router = make_router()
+
+
+# Transaction endpoints
+@router.get("/api/transactions", response_model=List[schemas.Transaction])
+async def get_transactions(
+    request: Request,
+    response: Response,
+    filters: schemas.TransactionFilters = Depends(),
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_read_db),
+    user: Optional[Principal] = Depends(get_optional_principal_async),
+):
+    # Фильтры и постраничность (?limit=&cursor=) — в SQL; итоги по всей выборке — в X-Totals
+    if not user or not user.is_admin:
+        return []
+    cached = await check_collection(db, "transactions", request, response, user)
+    if cached:
+        return cached
+    txs, next_cursor = await crud_async.list_org_transactions(db, user.organization_id, filters, page)
+    set_next_cursor(response, next_cursor)
+    if page.limit is None:
+        # вся выборка уже загружена — считаем без второго запроса
+        totals = {
+            "count": len(txs),
+            "income": round(float(sum(tx.amount for tx in txs if tx.transaction_type == "income")), 2),
+            "expense": round(float(sum(tx.amount for tx in txs if tx.transaction_type == "expense")), 2),
+        }
+    elif not page.cursor:
+        totals = await crud_async.transaction_totals(db, user.organization_id, filters)
+    else:
+        totals = None  # те же, что на первой странице
+    if totals is not None:
+        response.headers[TOTALS_HEADER] = json.dumps(totals)
+    return json_rows(txs, schemas.Transaction, response=response)
+
+# Сколько интервалов (дней/недель/...) допускает один запрос ряда
+MAX_SERIES_BUCKETS = 1000
+_BUCKET_DAYS = {"day": 1, "week": 7, "month": 30, "quarter": 91}
+
+@router.get("/api/finance/series", response_model=schemas.FinanceSeries)
+async def get_finance_series(
+    query: schemas.FinanceSeriesQuery = Depends(),
+    db: AsyncSession = Depends(get_async_read_db),
+    user: Principal = Depends(require_admin_async),
+):
+    # Доход/расход/баланс по дням, неделям, месяцам или кварталам (и по category/project/employee):
+    # один GROUP BY в БД вместо расчёта графиков по всему списку транзакций на клиенте
+    date_to = query.date_to or date.today()
+    if query.date_from:
+        date_from = query.date_from
+    else:
+        months = date_to.year * 12 + date_to.month - 1 - 11
+        date_from = date(months // 12, months % 12 + 1, 1)
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="date_from must not be after date_to")
+    if (date_to - date_from).days // _BUCKET_DAYS[query.bucket] >= MAX_SERIES_BUCKETS:
+        raise HTTPException(status_code=400, detail=f"Too many buckets (max {MAX_SERIES_BUCKETS}): use a larger bucket or a shorter range")
+    points, source = await crud_async.finance_series(db, user.organization_id, query.bucket, query.group_by, date_from, date_to)
+    return {
+        "bucket": query.bucket,
+        "group_by": query.group_by,
+        "date_from": date_from,
+        "date_to": date_to,
+        "source": source,
+        "points": points,
+    }
+
+@router.get("/api/transactions/{transaction_id}", response_model=schemas.Transaction)
+def get_transaction(transaction_id: str, db: Session = Depends(get_db), user: Principal = Depends(require_admin)):
+    transaction = crud.get_transaction(db, transaction_id)
+    if not transaction or transaction.organization_id != user.organization_id:
+        raise HTTPException(status_code=404, detail="Transaction not found")
+    return transaction
+
+@router.post("/api/transactions", response_model=schemas.Transaction)
+def create_transaction(transaction: schemas.TransactionCreate, db: Session = Depends(get_db), user: Principal = Depends(require_admin)):
+    # organization is set on insert: the flush updates its ETag version and monthly rollups
+    return crud.create_transaction(db, transaction, organization_id=user.organization_id)
+
+@router.put("/api/transactions/{transaction_id}", response_model=schemas.Transaction)
+def update_transaction(transaction_id: str, transaction: schemas.TransactionUpdate, db: Session = Depends(get_db)):
+    db_transaction = crud.update_transaction(db, transaction_id, transaction)
+    if not db_transaction:
+        raise HTTPException(status_code=404, detail="Transaction not found")
+    return db_transaction
+
+@router.delete("/api/transactions/{transaction_id}", response_model=schemas.MessageResponse)
+def delete_transaction(transaction_id: str, db: Session = Depends(get_db)):
+    if crud.delete_transaction(db, transaction_id):
+        return {"message": "Transaction deleted successfully"}
+    raise HTTPException(status_code=404, detail="Transaction not found")
+
+# Add lightweight endpoint to update only the date (to handle clients that struggle with mixed payload validation)
+@router.put("/api/transactions/{transaction_id}/date", response_model=schemas.Transaction)
+def update_transaction_date(transaction_id: str, request: dict, db: Session = Depends(get_db)):
+    date_value = request.get("date")
+    if not date_value:
+        raise HTTPException(status_code=400, detail="Missing 'date' field in request body")
+    
+    try:
+        # Accept common ISO format YYYY-MM-DD
+        parsed = datetime.fromisoformat(str(date_value)).date()
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+    
+    # Update transaction directly without schema validation
+    db_transaction = crud.get_transaction(db, transaction_id)
+    if not db_transaction:
+        raise HTTPException(status_code=404, detail="Transaction not found")
+    
+    db_transaction.date = parsed
+    db.commit()
+    db.refresh(db_transaction)
+    return db_transaction
@@ -0,0 +1,196 @@
+"""Goals, reading list and notes."""
+from typing import List, Optional
+
+from fastapi import Depends, HTTPException, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+import crud
+import crud_async
+import models
+import schemas
+from auth import Principal, get_optional_principal_async, get_principal, require_member
+from database import get_async_read_db, get_db
+from fieldsets import sparse_fields
+from pagination import PageParams, set_next_cursor
+from routers import make_router
+from serialization import json_rows
+
+router = make_router()
+
+
+# Goal endpoints
+@router.get("/api/goals", response_model=List[schemas.Goal])
+def get_goals(db: Session = Depends(get_db)):
+    return crud.get_goals(db)
+
+@router.get("/api/goals/{goal_id}", response_model=schemas.Goal)
+def get_goal(goal_id: str, db: Session = Depends(get_db)):
+    goal = crud.get_goal(db, goal_id)
+    if not goal:
+        raise HTTPException(status_code=404, detail="Goal not found")
+    return goal
+
+@router.post("/api/goals", response_model=schemas.Goal)
+def create_goal(goal: schemas.GoalCreate, db: Session = Depends(get_db)):
+    return crud.create_goal(db, goal)
+
+@router.put("/api/goals/{goal_id}", response_model=schemas.Goal)
+def update_goal(goal_id: str, goal: schemas.GoalUpdate, db: Session = Depends(get_db)):
+    db_goal = crud.update_goal(db, goal_id, goal)
+    if not db_goal:
+        raise HTTPException(status_code=404, detail="Goal not found")
+    return db_goal
+
+@router.put("/api/goals/{goal_id}/progress")
+def update_goal_progress(goal_id: str, progress: int, db: Session = Depends(get_db)):
+    db_goal = crud.update_goal_progress(db, goal_id, progress)
+    if not db_goal:
+        raise HTTPException(status_code=404, detail="Goal not found")
+    return db_goal
+
+@router.delete("/api/goals/{goal_id}", response_model=schemas.MessageResponse)
+def delete_goal(goal_id: str, db: Session = Depends(get_db)):
+    if crud.delete_goal(db, goal_id):
+        return {"message": "Goal deleted successfully"}
+    raise HTTPException(status_code=404, detail="Goal not found")
+
+# Reading Item endpoints
+@router.get("/api/reading", response_model=List[schemas.ReadingItem])
+async def get_reading_items(
+    response: Response,
+    filters: schemas.ReadingFilters = Depends(),
+    page: PageParams = Depends(),
+    fields: Optional[tuple] = Depends(sparse_fields(schemas.ReadingItem)),
+    db: AsyncSession = Depends(get_async_read_db),
+    user: Optional[Principal] = Depends(get_optional_principal_async),
+):
+    # Reading list is strictly personal for any role.
+    # ?status=&item_type=&priority=&tag=&search= и постраничность (?limit=&cursor=) — в SQL;
+    # ?fields=id,title,status — без тел content/notes
+    if not user:
+        return []
+    items, next_cursor = await crud_async.list_reading_items(db, user.id, filters, page, fields)
+    set_next_cursor(response, next_cursor)
+    return json_rows(items, schemas.ReadingItem, fields, response)
+
+@router.get("/api/reading/{item_id}", response_model=schemas.ReadingItem)
+def get_reading_item(item_id: str, db: Session = Depends(get_db), user: Principal = Depends(get_principal)):
+    # Only owner can fetch
+    item = crud.get_reading_item(db, item_id)
+    if not item or item.user_id != user.id:
+        raise HTTPException(status_code=404, detail="Reading item not found")
+    return item
+
+@router.post("/api/reading", response_model=schemas.ReadingItem)
+def create_reading_item(item: schemas.ReadingItemCreate, db: Session = Depends(get_db), user: Principal = Depends(get_principal)):
+    return crud.create_reading_item(db, item, user_id=user.id)
+
+@router.put("/api/reading/{item_id}", response_model=schemas.ReadingItem)
+def update_reading_item(item_id: str, item: schemas.ReadingItemUpdate, db: Session = Depends(get_db), user: Principal = Depends(get_principal)):
+    # Only owner can update
+    existing = crud.get_reading_item(db, item_id)
+    if not existing or existing.user_id != user.id:
+        raise HTTPException(status_code=404, detail="Reading item not found")
+    db_item = crud.update_reading_item(db, item_id, item)
+    return db_item
+
+@router.put("/api/reading/{item_id}/reading", response_model=schemas.ReadingItem)
+def mark_as_reading(item_id: str, db: Session = Depends(get_db), user: Principal = Depends(get_principal)):
+    existing = crud.get_reading_item(db, item_id)
+    if not existing or existing.user_id != user.id:
+        raise HTTPException(status_code=404, detail="Reading item not found")
+    db_item = crud.mark_reading_item_as_reading(db, item_id)
+    return db_item
+
+@router.put("/api/reading/{item_id}/completed", response_model=schemas.ReadingItem)
+def mark_as_completed(item_id: str, notes: str = None, db: Session = Depends(get_db), user: Principal = Depends(get_principal)):
+    existing = crud.get_reading_item(db, item_id)
+    if not existing or existing.user_id != user.id:
+        raise HTTPException(status_code=404, detail="Reading item not found")
+    db_item = crud.mark_reading_item_as_completed(db, item_id, notes)
+    return db_item
+
+@router.delete("/api/reading/{item_id}", response_model=schemas.MessageResponse)
+def delete_reading_item(item_id: str, db: Session = Depends(get_db), user: Principal = Depends(get_principal)):
+    existing = crud.get_reading_item(db, item_id)
+    if not existing or existing.user_id != user.id:
+        raise HTTPException(status_code=404, detail="Reading item not found")
+    if crud.delete_reading_item(db, item_id):
+        return {"message": "Reading item deleted successfully"}
+    raise HTTPException(status_code=404, detail="Reading item not found")
+
+# Note endpoints
+@router.get("/api/notes", response_model=List[schemas.Note])
+async def get_notes(
+    response: Response,
+    filters: schemas.NoteFilters = Depends(),
+    page: PageParams = Depends(),
+    fields: Optional[tuple] = Depends(sparse_fields(schemas.Note)),
+    db: AsyncSession = Depends(get_async_read_db),
+    user: Optional[Principal] = Depends(get_optional_principal_async),
+):
+    # Auth required; own notes + notes shared within the user's organization (for any role).
+    # ?date_from=&date_to=&tag= и постраничность (?limit=&cursor=) — в SQL, курсор в X-Next-Cursor
+    if not user:
+        return []
+    notes, next_cursor = await crud_async.list_visible_notes(db, user.id, user.organization_id, filters, page, fields)
+    set_next_cursor(response, next_cursor)
+    return json_rows(notes, schemas.Note, fields, response)
+
+@router.get("/api/notes/count", response_model=schemas.CountResponse)
+async def count_notes(
+    filters: schemas.NoteFilters = Depends(),
+    db: AsyncSession = Depends(get_async_read_db),
+    user: Optional[Principal] = Depends(get_optional_principal_async),
+):
+    # Размер той же ленты, что GET /api/notes с теми же фильтрами
+    if not user:
+        return {"count": 0}
+    return {"count": await crud_async.count_visible_notes(db, user.id, user.organization_id, filters)}
+
+@router.get("/api/notes/{note_id}", response_model=schemas.Note)
+def get_note(note_id: str, db: Session = Depends(get_db)):
+    note = crud.get_note(db, note_id)
+    if not note:
+        raise HTTPException(status_code=404, detail="Note not found")
+    return note
+
+@router.post("/api/notes", response_model=schemas.Note)
+def create_note(note: schemas.NoteCreate, db: Session = Depends(get_db), user: Principal = Depends(require_member)):
+    # Для обычных пользователей: требуется карточка сотрудника; shared принудительно False
+    if not user.is_admin:
+        data = note.model_dump()
+        data["shared"] = False
+        note = schemas.NoteCreate(**data)
+
+    return crud.create_note(db, note, user_id=user.id, organization_id=user.organization_id)
+
+@router.put("/api/notes/{note_id}", response_model=schemas.Note)
+def update_note(note_id: str, note: schemas.NoteUpdate, db: Session = Depends(get_db), user: Principal = Depends(get_principal)):
+    # Auth required; only owner can update; admin/owner can change 'shared'
+    n = db.query(models.Note).filter(models.Note.id == note_id).first()
+    if not n:
+        raise HTTPException(status_code=404, detail="Note not found")
+    if not user.is_admin:
+        if n.user_id != user.id:
+            raise HTTPException(status_code=403, detail="Forbidden")
+        # Non-admin cannot change shared flag
+        if getattr(note, 'shared', None) is not None:
+            raise HTTPException(status_code=403, detail="Only admin can change share state")
+    db_note = crud.update_note(db, note_id, note)
+    if not db_note:
+        raise HTTPException(status_code=404, detail="Note not found")
+    return db_note
+
+@router.delete("/api/notes/{note_id}", response_model=schemas.MessageResponse)
+def delete_note(note_id: str, db: Session = Depends(get_db), user: Principal = Depends(get_principal)):
+    # Auth required; only owner or admin can delete
+    n = db.query(models.Note).filter(models.Note.id == note_id).first()
+    if not n:
+        raise HTTPException(status_code=404, detail="Note not found")
+    if not user.is_admin and n.user_id != user.id:
+        raise HTTPException(status_code=403, detail="Forbidden")
+    if crud.delete_note(db, note_id):
+        return {"message": "Note deleted successfully"}
+    raise HTTPException(status_code=404, detail="Note not found")
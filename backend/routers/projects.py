@@ -0,0 +1,147 @@
+"""Projects, project members/rates and links, project economics."""
+from typing import List, Optional
+
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+import crud
+import crud_async
+import economics
+import schemas
+from auth import Principal, get_optional_principal, get_optional_principal_async, get_principal, require_admin, require_admin_async
+from conditional import check_collection
+from database import get_async_db, get_async_read_db, get_db
+from routers import make_router
+
+router = make_router()
+
+
+# Экономика проектов — до /api/projects/{project_id}; только owner/admin (финансы)
+@router.get("/api/projects/economics", response_model=List[schemas.ProjectEconomicsRow])
+async def get_projects_economics(db: AsyncSession = Depends(get_async_read_db), user: Principal = Depends(require_admin_async)):
+    # выручка/затраты/маржа/часы/остаток бюджета всех проектов организации: два GROUP BY вместо
+    # выгрузки всех транзакций и задач на клиент; результат кэшируется до следующей записи
+    return await economics.org_economics(db, user.organization_id)
+
+@router.get("/api/projects/{project_id}/economics", response_model=schemas.ProjectEconomics)
+async def get_project_economics(project_id: str, db: AsyncSession = Depends(get_async_read_db), user: Principal = Depends(require_admin_async)):
+    report = await economics.project_economics(db, user.organization_id, project_id)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return report
+
+
+@router.get("/api/projects/{project_id}", response_model=schemas.Project)
+def get_project(project_id: str, db: Session = Depends(get_db), user: Principal = Depends(get_principal)):
+    project = crud.get_project(db, project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    if user.is_admin:
+        if project.organization_id != user.organization_id:
+            raise HTTPException(status_code=404, detail="Project not found")
+        return project
+    # Regular user: must be a member and same org
+    emp = user.employee
+    if not emp:
+        raise HTTPException(status_code=404, detail="Project not found")
+    if project.organization_id != emp.organization_id:
+        raise HTTPException(status_code=404, detail="Project not found")
+    is_member = any(m.employee_id == emp.id for m in project.members)
+    if not is_member:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return project
+
+@router.post("/api/projects", response_model=schemas.Project)
+def create_project(project: schemas.ProjectCreate, db: Session = Depends(get_db), user: Principal = Depends(require_admin)):
+    # Only admin/owner can create projects
+    pr = crud.create_project(db, project)
+    # assign org
+    from sqlalchemy import text as _t
+    db.execute(_t("UPDATE projects SET organization_id = :oid WHERE id = :id"), {"oid": user.organization_id, "id": pr.id})
+    crud.bump_collection_versions(db, user.organization_id, "projects")
+    db.commit()
+    return pr
+
+@router.put("/api/projects/{project_id}", response_model=schemas.Project)
+def update_project(project_id: str, project: schemas.ProjectUpdate, db: Session = Depends(get_db), user: Optional[Principal] = Depends(get_optional_principal)):
+    # Only admin/owner can update projects
+    if user and not user.is_admin:
+        raise HTTPException(status_code=403, detail="Forbidden")
+    db_project = crud.update_project(db, project_id, project)
+    if not db_project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return db_project
+
+@router.delete("/api/projects/{project_id}", response_model=schemas.MessageResponse)
+def delete_project(project_id: str, db: Session = Depends(get_db), user: Optional[Principal] = Depends(get_optional_principal)):
+    # Only admin/owner can delete projects
+    if user and not user.is_admin:
+        raise HTTPException(status_code=403, detail="Forbidden")
+    if crud.delete_project(db, project_id):
+        return {"message": "Project deleted successfully"}
+    raise HTTPException(status_code=404, detail="Project not found")
+
+@router.get("/api/projects", response_model=List[schemas.Project])
+async def get_projects(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    user: Optional[Principal] = Depends(get_optional_principal_async),
+):
+    # Возвращает список проектов в пределах организации для owner/admin,
+    # или проекты, где пользователь является участником, для обычных пользователей.
+    if user:
+        cached = await check_collection(db, "projects", request, response, user)
+        if cached:
+            return cached
+        if user.is_admin:
+            return await crud_async.list_org_projects(db, user.organization_id)
+        # Обычный пользователь
+        return await crud_async.list_member_projects(db, user.employee_id)
+    # Без авторизации вернём пустой список, как и другие list-эндпойнты
+    return []
+
+@router.post("/api/projects/{project_id}/members", response_model=schemas.MessageResponse)
+def add_project_member(project_id: str, member: schemas.ProjectMemberAdd, db: Session = Depends(get_db), user: Optional[Principal] = Depends(get_optional_principal)):
+    # Only admin/owner can manage project members
+    if user and not user.is_admin:
+        raise HTTPException(status_code=403, detail="Forbidden")
+    if crud.add_project_member(db, project_id, member.employee_id):
+        return {"message": "Member added successfully"}
+    raise HTTPException(status_code=400, detail="Member already exists or invalid data")
+
+@router.put("/api/projects/{project_id}/members/{employee_id}/rate", response_model=schemas.MessageResponse)
+def set_project_member_rate(project_id: str, employee_id: str, hourly_rate: int | None = None, db: Session = Depends(get_db), user: Optional[Principal] = Depends(get_optional_principal)):
+    # Only admin/owner can change member rates
+    if user and not user.is_admin:
+        raise HTTPException(status_code=403, detail="Forbidden")
+    crud.set_project_member_rate(db, project_id, employee_id, hourly_rate)
+    return {"message": "Rate updated"}
+
+@router.put("/api/projects/{project_id}/members/{employee_id}/rates", response_model=schemas.MessageResponse)
+def set_project_member_rates(project_id: str, employee_id: str, cost_hourly_rate: int | None = None, bill_hourly_rate: int | None = None, db: Session = Depends(get_db), user: Optional[Principal] = Depends(get_optional_principal)):
+    # Only admin/owner can change member rates
+    if user and not user.is_admin:
+        raise HTTPException(status_code=403, detail="Forbidden")
+    crud.set_project_member_rates(db, project_id, employee_id, cost_hourly_rate, bill_hourly_rate)
+    return {"message": "Rates updated"}
+
+@router.delete("/api/projects/{project_id}/members/{employee_id}", response_model=schemas.MessageResponse)
+def remove_project_member(project_id: str, employee_id: str, db: Session = Depends(get_db), user: Optional[Principal] = Depends(get_optional_principal)):
+    # Only admin/owner can manage project members
+    if user and not user.is_admin:
+        raise HTTPException(status_code=403, detail="Forbidden")
+    if crud.remove_project_member(db, project_id, employee_id):
+        return {"message": "Member removed successfully"}
+    raise HTTPException(status_code=404, detail="Member not found")
+
+@router.post("/api/projects/{project_id}/links", response_model=schemas.ProjectLink)
+def add_project_link(project_id: str, link: schemas.ProjectLinkAdd, db: Session = Depends(get_db)):
+    return crud.add_project_link(db, project_id, link)
+
+@router.delete("/api/projects/{project_id}/links/{link_id}", response_model=schemas.MessageResponse)
+def remove_project_link(project_id: str, link_id: str, db: Session = Depends(get_db)):
+    if crud.remove_project_link(db, project_id, link_id):
+        return {"message": "Link removed successfully"}
+    raise HTTPException(status_code=404, detail="Link not found")
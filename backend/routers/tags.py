@@ -0,0 +1,48 @@
+"""Per-user tag dictionary with autocomplete."""
+from typing import Optional
+
+from fastapi import Depends, HTTPException
+from sqlalchemy.orm import Session
+
+import crud
+import schemas
+from auth import Principal, get_principal
+from database import get_db
+from routers import make_router
+
+router = make_router()
+
+
+@router.get("/api/user-tags", response_model=schemas.UserTagsResponse)
+def get_user_tags(tag_type: Optional[str] = None, user: Principal = Depends(get_principal), db: Session = Depends(get_db)):
+    """Получить теги пользователя, опционально отфильтрованные по типу"""
+    tags = crud.get_user_tags(db, user.id, tag_type)
+    return {"tags": tags}
+
+@router.get("/api/user-tags/suggestions")
+def get_tag_suggestions(tag_type: str, search: str = "", user: Principal = Depends(get_principal), db: Session = Depends(get_db)):
+    """Получить предложения тегов для автодополнения"""
+    suggestions = crud.get_user_tag_suggestions(db, user.id, tag_type, search)
+    return {"suggestions": suggestions}
+
+@router.post("/api/user-tags", response_model=schemas.UserTag)
+def create_user_tag(tag_data: schemas.UserTagCreate, user: Principal = Depends(get_principal), db: Session = Depends(get_db)):
+    """Создать новый тег или увеличить счетчик использования существующего"""
+    tag = crud.create_or_increment_user_tag(db, user.id, tag_data.tag_value, tag_data.tag_type)
+    return tag
+
+@router.put("/api/user-tags/{tag_id}", response_model=schemas.UserTag)
+def update_user_tag(tag_id: str, tag_update: schemas.UserTagUpdate, user: Principal = Depends(get_principal), db: Session = Depends(get_db)):
+    """Обновить тег пользователя"""
+    tag = crud.update_user_tag(db, user.id, tag_id, tag_update)
+    if not tag:
+        raise HTTPException(status_code=404, detail="Tag not found")
+    return tag
+
+@router.delete("/api/user-tags/{tag_id}", response_model=schemas.MessageResponse)
+def delete_user_tag(tag_id: str, user: Principal = Depends(get_principal), db: Session = Depends(get_db)):
+    """Удалить тег пользователя"""
+    success = crud.delete_user_tag(db, user.id, tag_id)
+    if not success:
+        raise HTTPException(status_code=404, detail="Tag not found")
+    return {"message": "Tag deleted"}
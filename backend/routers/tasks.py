@@ -0,0 +1,241 @@
+"""Tasks: CRUD, approval flow and the finance records it drives."""
+from typing import List, Optional
+
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy import text as _text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+import crud
+import crud_async
+import models
+import schemas
+from auth import Principal, get_optional_principal, get_optional_principal_async, get_principal
+from conditional import check_collection
+from database import engine, get_async_read_db, get_db
+from fieldsets import sparse_fields
+from pagination import PageParams, set_next_cursor
+from routers import make_router
+from serialization import json_rows
+from telegram_notifier import send_message
+
+router = make_router()
+
+
+# Task endpoints
+@router.get("/api/tasks", response_model=List[schemas.Task])
+async def get_tasks(
+    request: Request,
+    response: Response,
+    filters: schemas.TaskFilters = Depends(),
+    page: PageParams = Depends(),
+    fields: Optional[tuple] = Depends(sparse_fields(schemas.Task)),
+    db: AsyncSession = Depends(get_async_read_db),
+    user: Optional[Principal] = Depends(get_optional_principal_async),
+):
+    # Фильтры и постраничность (?limit=&cursor=) выполняются в SQL; следующий курсор — в X-Next-Cursor.
+    # ?fields=id,content,done сужает и SELECT, и тело ответа
+    if not user:
+        return []
+    # If-None-Match с текущим ETag — 304 без чтения задач
+    cached = await check_collection(db, "tasks", request, response, user)
+    if cached:
+        return cached
+    if user.is_admin:
+        tasks, next_cursor = await crud_async.list_org_tasks(db, user.organization_id, filters, page, fields)
+    else:
+        tasks, next_cursor = await crud_async.list_employee_tasks(db, user.employee_id, filters, page, fields)
+    set_next_cursor(response, next_cursor)
+    # строки (не ORM-объекты) уходят прямо в orjson, без повторной валидации response_model
+    return json_rows(tasks, schemas.Task, fields, response)
+
+@router.get("/api/tasks/{task_id}", response_model=schemas.Task)
+def get_task(task_id: str, db: Session = Depends(get_db), user: Principal = Depends(get_principal)):
+    task = crud.get_task(db, task_id)
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    if user.is_admin:
+        if task.organization_id != user.organization_id:
+            raise HTTPException(status_code=404, detail="Task not found")
+        return task
+    # regular user: must be assigned to them
+    if not user.employee_id or task.assigned_to != user.employee_id:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return task
+
+@router.post("/api/tasks", response_model=schemas.Task)
+def create_task(task: schemas.TaskCreate, db: Session = Depends(get_db), user: Optional[Principal] = Depends(get_optional_principal)):
+    # Only admin/owner can create tasks
+    if user and not user.is_admin:
+        raise HTTPException(status_code=403, detail="Forbidden")
+    created = crud.create_task(db, task)
+    # assign organization
+    from sqlalchemy import text as _t
+    if user:
+        db.execute(_t("UPDATE tasks SET organization_id = :oid WHERE id = :id"), {"oid": user.organization_id, "id": created.id})
+        crud.bump_collection_versions(db, user.organization_id, "tasks")
+        db.commit()
+    # Notify assignee via Telegram if chat linked
+    try:
+        if created.assigned_to:
+            emp = db.query(models.Employee).filter(models.Employee.id == created.assigned_to).first()
+            if emp and getattr(emp, 'telegram_chat_id', None):
+                parts = []
+                parts.append(f"Новая задача: <b>{created.content}</b>")
+                if created.due_date:
+                    parts.append(f"Срок: {created.due_date.isoformat()}")
+                if created.priority:
+                    parts.append(f"Приоритет: {created.priority}")
+                if created.project_id:
+                    proj = db.query(models.Project).filter(models.Project.id == created.project_id).first()
+                    if proj:
+                        parts.append(f"Проект: {proj.name}")
+                text = "\n".join(parts)
+                send_message(emp.telegram_chat_id, text)
+    except Exception:
+        pass
+    return created
+
+@router.put("/api/tasks/{task_id}", response_model=schemas.Task)
+def update_task(task_id: str, task: schemas.TaskUpdate, db: Session = Depends(get_db), user: Optional[Principal] = Depends(get_optional_principal)):
+    # Non-admins may only update their own task hours_spent and done flag; everything else is forbidden
+    if user and not user.is_admin:
+        # Fetch task and check ownership via employee mapping
+        t = crud.get_task(db, task_id)
+        if not t:
+            raise HTTPException(status_code=404, detail="Task not found")
+        if not user.employee_id or t.assigned_to != user.employee_id:
+            raise HTTPException(status_code=403, detail="Forbidden")
+        # restrict fields: allow assigned employee to update hours_spent, done, and work_status (for Kanban moves)
+        allowed = schemas.TaskUpdate(
+            hours_spent=task.hours_spent,
+            done=task.done,
+            work_status=task.work_status,
+        )
+        task = allowed
+    # Apply update
+    db_task = crud.update_task(db, task_id, task)
+    if not db_task:
+        raise HTTPException(status_code=404, detail="Task not found")
+    # Handle approval semantics after update
+    try:
+        # Determine actor role and whether approved was explicitly provided
+        is_admin = bool(user and user.is_admin)
+        has_approved_explicit = False
+        approved_value = None
+        try:
+            payload = task.model_dump(exclude_unset=True)
+            if "approved" in payload:
+                has_approved_explicit = True
+                approved_value = payload.get("approved")
+        except Exception:
+            has_approved_explicit = False
+
+        # Apply approval logic based on done status and explicit approved setting
+        from sqlalchemy import text as _text
+        if has_approved_explicit:
+            # Approved was explicitly set in request - respect it
+            if is_admin and approved_value is True:
+                # Admin explicitly marked approved
+                with engine.begin() as conn:
+                    conn.execute(_text("UPDATE tasks SET approved = TRUE, approved_at = CURRENT_TIMESTAMP WHERE id = :id"), {"id": task_id})
+                    crud.bump_collection_versions(conn, db_task.organization_id, "tasks")
+            elif approved_value is False:
+                # Explicitly set to false (moving to open/awaiting)
+                with engine.begin() as conn:
+                    conn.execute(_text("UPDATE tasks SET approved = FALSE, approved_at = NULL WHERE id = :id"), {"id": task_id})
+                    crud.bump_collection_versions(conn, db_task.organization_id, "tasks")
+        elif getattr(db_task, "done", False) and not has_approved_explicit:
+            # Done=true but approved not explicitly set - apply default logic
+            if not is_admin:
+                # Non-admin completion -> awaiting approval
+                with engine.begin() as conn:
+                    conn.execute(_text("UPDATE tasks SET approved = FALSE, approved_at = NULL WHERE id = :id"), {"id": task_id})
+                    crud.bump_collection_versions(conn, db_task.organization_id, "tasks")
+        
+        # Refresh task after any approval changes
+        if has_approved_explicit or (getattr(db_task, "done", False) and not has_approved_explicit):
+            db_task = crud.get_task(db, task_id)
+    except Exception:
+        pass
+
+    # Rollback finance when leaving approved/done state
+    try:
+        if not getattr(db_task, "done", False):
+            crud.rollback_task_finance_if_any(db, task_id)
+        else:
+            # if explicitly unapproved or currently not approved -> rollback as well
+            if (has_approved_explicit and approved_value is False) or not bool(getattr(db_task, "approved", False)):
+                crud.rollback_task_finance_if_any(db, task_id)
+    except Exception:
+        pass
+
+    # If task is done and approved -> ensure finance records are generated (idempotent)
+    try:
+        if getattr(db_task, "done", False) and bool(getattr(db_task, "approved", False)):
+            crud.generate_task_finance_if_needed(db, task_id)
+            # refresh once more to return updated links
+            db_task = crud.get_task(db, task_id)
+    except Exception:
+        pass
+    return db_task
+
+@router.put("/api/tasks/{task_id}/toggle", response_model=schemas.Task)
+def toggle_task(task_id: str, db: Session = Depends(get_db), user: Optional[Principal] = Depends(get_optional_principal)):
+    # Role-aware toggle: employee marks done -> awaiting; admin click on awaiting -> approve; admin toggling sets approval with done
+    current = crud.get_task(db, task_id)
+    if not current:
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    is_admin = bool(user and user.is_admin)
+
+    # If admin clicks on awaiting (done=true, approved=false) -> approve and generate finance; do not flip done
+    if is_admin and current.done and not (getattr(current, "approved", False) or False):
+        try:
+            with engine.begin() as conn:
+                # NOW() for postgres; CURRENT_TIMESTAMP works both
+                conn.execute(_text("UPDATE tasks SET approved = TRUE, approved_at = CURRENT_TIMESTAMP WHERE id = :id"), {"id": task_id})
+                crud.bump_collection_versions(conn, current.organization_id, "tasks")
+            # generate finance on approval
+            approved = crud.generate_task_finance_if_needed(db, task_id)
+            return approved or crud.get_task(db, task_id)
+        except Exception:
+            pass
+
+    # Otherwise perform normal toggle
+    db_task = crud.toggle_task(db, task_id)
+    if not db_task:
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    # Set approval flags based on actor
+    try:
+        if db_task.done:
+            if is_admin:
+                with engine.begin() as conn:
+                    conn.execute(_text("UPDATE tasks SET approved = TRUE, approved_at = CURRENT_TIMESTAMP WHERE id = :id"), {"id": task_id})
+                    crud.bump_collection_versions(conn, current.organization_id, "tasks")
+                # generate finance immediately for admin self-completion
+                crud.generate_task_finance_if_needed(db, task_id)
+            else:
+                with engine.begin() as conn:
+                    conn.execute(_text("UPDATE tasks SET approved = FALSE, approved_at = NULL WHERE id = :id"), {"id": task_id})
+                    crud.bump_collection_versions(conn, current.organization_id, "tasks")
+        else:
+            with engine.begin() as conn:
+                conn.execute(_text("UPDATE tasks SET approved = FALSE, approved_at = NULL WHERE id = :id"), {"id": task_id})
+                crud.bump_collection_versions(conn, current.organization_id, "tasks")
+            # rollback finance when reopening
+            crud.rollback_task_finance_if_any(db, task_id)
+    except Exception:
+        pass
+
+    return crud.get_task(db, task_id)
+
+@router.delete("/api/tasks/{task_id}", response_model=schemas.MessageResponse)
+def delete_task(task_id: str, db: Session = Depends(get_db), user: Optional[Principal] = Depends(get_optional_principal)):
+    # Only admin/owner can delete tasks
+    if user and not user.is_admin:
+        raise HTTPException(status_code=403, detail="Forbidden")
+    if crud.delete_task(db, task_id):
+        return {"message": "Task deleted successfully"}
+    raise HTTPException(status_code=404, detail="Task not found")
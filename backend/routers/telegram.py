@@ -0,0 +1,195 @@
+"""Telegram bot: webhook, long-polling fallback and diagnostics."""
+from datetime import datetime
+from typing import Optional
+
+from fastapi import Depends, Header
+from sqlalchemy import text as _text
+from sqlalchemy.orm import Session
+
+import crud
+import models
+from config import settings
+from database import engine, get_db
+from routers import make_router
+from telegram_notifier import delete_message, delete_webhook, get_updates, get_webhook_info, send_message, set_webhook
+
+router = make_router()
+
+# Pending Telegram link state per chat: { chat_id: {"email": str, "ts": datetime.utcnow()} }
+_PENDING_LINKS: dict[str, dict] = {}
+
+# --- Telegram webhook (optional) ---
+@router.post("/api/telegram/webhook")
+async def telegram_webhook(update: dict, x_telegram_bot_api_secret_token: Optional[str] = Header(None), db: Session = Depends(get_db)):
+    """Incoming Telegram updates. Minimal handler to allow users to link their chat with employee.
+    Security: require configured secret token header to match settings.TELEGRAM_WEBHOOK_SECRET.
+    Commands:
+      /start – greeting
+      /link <email> – link this chat to employee by email
+    """
+    if settings.TELEGRAM_WEBHOOK_SECRET and (x_telegram_bot_api_secret_token or "") != settings.TELEGRAM_WEBHOOK_SECRET:
+        # ignore silently to avoid probing
+        return {"ok": True}
+    try:
+        msg = (update.get("message") or update.get("edited_message") or {})
+        chat = msg.get("chat") or {}
+        chat_id = str(chat.get("id")) if chat.get("id") is not None else None
+        text = (msg.get("text") or "").strip()
+        if not chat_id:
+            return {"ok": True}
+        if text.startswith("/start"):
+            send_message(chat_id, "Привет! Отправьте <b>/link email@example.com</b>, затем введите пароль от аккаунта — и бот свяжет чат. Пароль будет скрыт.")
+            return {"ok": True}
+        if text.startswith("/link"):
+            parts = text.split()
+            if len(parts) >= 2:
+                email = parts[1].strip()
+                user = crud.get_user_by_email(db, email)
+                emp = db.query(models.Employee).filter(models.Employee.email == email).first()
+                if not user or not emp:
+                    send_message(chat_id, "Пользователь или сотрудник с таким email не найден. Обратитесь к администратору.")
+                    return {"ok": True}
+                _PENDING_LINKS[chat_id] = {"email": email, "ts": datetime.utcnow()}
+                send_message(chat_id, "Введите пароль от аккаунта. Мы попытаемся скрыть это сообщение.")
+                return {"ok": True}
+            else:
+                send_message(chat_id, "Использование: /link email@example.com")
+                return {"ok": True}
+        # Password step
+        if chat_id in _PENDING_LINKS and text:
+            pending = _PENDING_LINKS.pop(chat_id, None)
+            if pending and (datetime.utcnow() - pending.get("ts", datetime.utcnow())).total_seconds() < 600:
+                email = pending["email"]
+                user = crud.get_user_by_email(db, email)
+                if user and crud.verify_password(user, text):
+                    emp = db.query(models.Employee).filter(models.Employee.email == email).first()
+                    if emp:
+                        try:
+                            with engine.begin() as conn:
+                                conn.execute(_text("UPDATE employees SET telegram_chat_id = :cid WHERE id = :id"), {"cid": chat_id, "id": emp.id})
+                                crud.bump_collection_versions(conn, emp.organization_id, "employees")
+                            mid = msg.get("message_id")
+                            if mid is not None:
+                                try:
+                                    delete_message(chat_id, int(mid))
+                                except Exception:
+                                    pass
+                            send_message(chat_id, f"Чат привязан к сотруднику: <b>{emp.name}</b>.")
+                        except Exception:
+                            pass
+                else:
+                    send_message(chat_id, "Неверный пароль. Повторите /link email и попробуйте снова.")
+            return {"ok": True}
+        return {"ok": True}
+    except Exception:
+        return {"ok": True}
+
+
+# --- Long polling fallback (no webhook) ---
+def _handle_update_dict(update: dict, db: Session):
+    try:
+        msg = (update.get("message") or update.get("edited_message") or {})
+        chat = msg.get("chat") or {}
+        chat_id = str(chat.get("id")) if chat.get("id") is not None else None
+        text = (msg.get("text") or "").strip()
+        if not chat_id:
+            return
+        if text.startswith("/start"):
+            send_message(chat_id, "Привет! Отправьте <b>/link email@example.com</b>, затем введите пароль от аккаунта — и бот свяжет чат. Пароль будет скрыт.")
+            return
+        if text.startswith("/link"):
+            parts = text.split()
+            if len(parts) >= 2:
+                email = parts[1].strip()
+                user = crud.get_user_by_email(db, email)
+                emp = db.query(models.Employee).filter(models.Employee.email == email).first()
+                if not user or not emp:
+                    send_message(chat_id, "Пользователь или сотрудник с таким email не найден. Обратитесь к администратору.")
+                    return
+                _PENDING_LINKS[chat_id] = {"email": email, "ts": datetime.utcnow()}
+                send_message(chat_id, "Введите пароль от аккаунта. Мы попытаемся скрыть это сообщение.")
+                return
+            else:
+                send_message(chat_id, "Использование: /link email@example.com")
+                return
+        # Password step for long polling
+        if chat_id in _PENDING_LINKS and text:
+            pending = _PENDING_LINKS.pop(chat_id, None)
+            if pending and (datetime.utcnow() - pending.get("ts", datetime.utcnow())).total_seconds() < 600:
+                email = pending["email"]
+                user = crud.get_user_by_email(db, email)
+                if user and crud.verify_password(user, text):
+                    emp = db.query(models.Employee).filter(models.Employee.email == email).first()
+                    with engine.begin() as conn:
+                        conn.execute(_text("UPDATE employees SET telegram_chat_id = :cid WHERE id = :id"), {"cid": chat_id, "id": emp.id})
+                        crud.bump_collection_versions(conn, emp.organization_id, "employees")
+                    mid = msg.get("message_id")
+                    if mid is not None:
+                        try:
+                            delete_message(chat_id, int(mid))
+                        except Exception:
+                            pass
+                    send_message(chat_id, f"Чат привязан к сотруднику: <b>{emp.name}</b>.")
+                else:
+                    send_message(chat_id, "Неверный пароль. Повторите /link email и попробуйте снова.")
+            return
+    except Exception:
+        pass
+
+
+def _start_telegram_long_polling():
+    import threading
+    import time
+    stop_flag = {"stop": False}
+
+    def worker():
+        last_update_id = None
+        while not stop_flag["stop"]:
+            try:
+                updates = get_updates(offset=(last_update_id + 1) if last_update_id else None, timeout=25)
+                if updates:
+                    db = next(get_db())
+                    try:
+                        for u in updates:
+                            uid = u.get("update_id")
+                            if isinstance(uid, int):
+                                last_update_id = uid
+                            _handle_update_dict(u, db)
+                    finally:
+                        db.close()
+                else:
+                    time.sleep(1)
+            except Exception:
+                time.sleep(3)
+
+    t = threading.Thread(target=worker, name="tg-long-poll", daemon=True)
+    t.start()
+
+def start_bot():
+    """Called at startup: set the webhook if configured, else poll for updates."""
+    if settings.TELEGRAM_WEBHOOK_URL:
+        set_webhook()
+    elif settings.TELEGRAM_BOT_TOKEN:
+        # без токена get_updates всегда пуст — не держим лишний поток
+        _start_telegram_long_polling()
+
+# --- Telegram diagnostics (safe, no auth for simplicity in dev) ---
+@router.get("/api/telegram/webhook-info")
+def telegram_webhook_info():
+    info = get_webhook_info()
+    return info or {"ok": False}
+
+@router.post("/api/telegram/set-webhook")
+def telegram_set_webhook():
+    ok = set_webhook()
+    return {"ok": bool(ok)}
+
+@router.post("/api/telegram/delete-webhook")
+def telegram_delete_webhook(drop_pending_updates: bool = True):
+    ok = delete_webhook(drop_pending_updates)
+    return {"ok": bool(ok)}
+
+@router.post("/api/telegram/test-message")
+def telegram_test_message(chat_id: str, text: str = "Проверка связи от бота"):
+    ok = send_message(chat_id, text)
+    return {"ok": bool(ok)}
@@ -0,0 +1,92 @@
+"""Schema version check and migrations at startup.
+
+A worker boot reads one row (alembic_version) and compares it with the head
+revision of alembic/versions; DDL only runs when they differ, under a
+Postgres advisory lock so concurrently starting workers migrate once.
+Each migration commits on its own; index builds run CONCURRENTLY outside
+any transaction (create_index_concurrently), so they do not block writes.
+alembic itself is imported lazily: `import main` (tests, tooling) does not
+need it, only the startup check does.
+"""
+import os
+import time
+
+from sqlalchemy import text
+
+from database import engine
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Arbitrary app-wide key for pg_advisory_lock
+_MIGRATION_LOCK_KEY = 724_511_083
+
+
+def _alembic_config():
+    from alembic.config import Config
+
+    cfg = Config(os.path.join(BASE_DIR, "alembic.ini"))
+    cfg.set_main_option("script_location", os.path.join(BASE_DIR, "alembic"))
+    return cfg
+
+
+def head_revision() -> str:
+    from alembic.script import ScriptDirectory
+
+    return ScriptDirectory.from_config(_alembic_config()).get_current_head()
+
+
+def current_revision(conn) -> str | None:
+    from alembic.runtime.migration import MigrationContext
+
+    return MigrationContext.configure(conn).get_current_revision()
+
+
+def ensure_schema() -> bool:
+    """Upgrade the database to head if needed. Returns True when migrations were applied."""
+    head = head_revision()
+    with engine.connect() as conn:
+        if current_revision(conn) == head:
+            return False
+    with engine.connect() as conn:
+        # session-level lock, polled outside a transaction: CREATE INDEX CONCURRENTLY waits
+        # for every open transaction, including those of workers queued for this lock
+        while True:
+            got = conn.execute(text("SELECT pg_try_advisory_lock(:k)"), {"k": _MIGRATION_LOCK_KEY}).scalar()
+            conn.commit()
+            if got:
+                break
+            time.sleep(1.0)
+        try:
+            # another worker may have finished while we waited for the lock
+            applied = current_revision(conn) != head
+            conn.commit()
+            if applied:
+                from alembic import command
+
+                cfg = _alembic_config()
+                cfg.attributes["connection"] = conn
+                command.upgrade(cfg, "head")
+        finally:
+            conn.rollback()
+            conn.execute(text("SELECT pg_advisory_unlock(:k)"), {"k": _MIGRATION_LOCK_KEY})
+            conn.commit()
+    return applied
+
+
+def create_index_concurrently(op, name: str, definition: str) -> None:
+    """CREATE INDEX CONCURRENTLY (for migrations): builds without blocking writes to the table.
+
+    Runs in alembic's autocommit block, outside the migration transaction. A
+    build that failed midway leaves an INVALID index that IF NOT EXISTS would
+    keep, so it is dropped first.
+    """
+    with op.get_context().autocommit_block():
+        invalid = op.get_bind().execute(
+            text(
+                "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                "WHERE c.relname = :name AND NOT i.indisvalid"
+            ),
+            {"name": name},
+        ).first()
+        if invalid:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+        op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {definition}")
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, EmailStr, field_validator
-from typing import Optional, List
+from typing import Literal, Optional, List
 from datetime import date, datetime
 
 # Employee schemas
@@ -63,6 +63,31 @@ class EmployeeStats(BaseModel):
     profit_margin: float
     period_label: str
 
+class EmployeeStatsQuery(BaseModel):
+    """GET /api/employees/stats query parameters."""
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    # по убыванию; при равенстве — по employee_id
+    sort: Literal[
+        "profit_margin", "profit", "total_revenue", "total_salary_cost", "total_hours",
+        "revenue_per_hour", "actual_hourly_rate", "active_projects_count", "completed_tasks", "in_progress_tasks",
+    ] = "profit_margin"
+
+class EmployeeStatsRow(BaseModel):
+    employee_id: str
+    name: str
+    position: str
+    total_hours: float
+    total_revenue: float
+    total_salary_cost: float
+    profit: float
+    profit_margin: float
+    actual_hourly_rate: float
+    revenue_per_hour: float
+    active_projects_count: int
+    completed_tasks: int
+    in_progress_tasks: int
+
 class EmployeeStatsRequest(BaseModel):
     date_from: Optional[str] = None  # YYYY-MM-DD format
     date_to: Optional[str] = None    # YYYY-MM-DD format
@@ -92,6 +117,7 @@ class ProjectBase(BaseModel):
     status: str = "active"
     start_date: Optional[date] = None
     end_date: Optional[date] = None
+    budget: Optional[float] = None
 
 class ProjectCreate(ProjectBase):
     pass
@@ -103,6 +129,7 @@ class ProjectUpdate(BaseModel):
     status: Optional[str] = None
     start_date: Optional[date] = None
     end_date: Optional[date] = None
+    budget: Optional[float] = None
 
 class Project(ProjectBase):
     id: str
@@ -118,6 +145,39 @@ class Project(ProjectBase):
     class Config:
         from_attributes = True
 
+class ProjectEconomicsRow(BaseModel):
+    project_id: str
+    name: str
+    status: str
+    budget: Optional[float] = None
+    revenue: float  # income transactions linked to the project
+    cost: float  # expense transactions linked to the project
+    profit: float
+    margin: float  # profit / revenue * 100, 0 without revenue
+    hours: float
+    approved_hours: float
+    done_tasks: int
+    active_tasks: int
+    budget_remaining: Optional[float] = None  # budget - cost, when a budget is set
+
+class ProjectMemberHours(BaseModel):
+    employee_id: Optional[str] = None  # None: unassigned tasks
+    name: Optional[str] = None
+    hours: float
+    approved_hours: float
+    done_tasks: int
+    active_tasks: int
+
+class ProjectBurnWeek(BaseModel):
+    week: date  # Monday
+    revenue: float
+    cost: float
+    cumulative_cost: float
+
+class ProjectEconomics(ProjectEconomicsRow):
+    members: List[ProjectMemberHours]
+    burn: List[ProjectBurnWeek]
+
 # Transaction schemas
 class TransactionBase(BaseModel):
     transaction_type: str  # income, expense
@@ -151,6 +211,39 @@ class Transaction(TransactionBase):
     class Config:
         from_attributes = True
 
+class TransactionFilters(BaseModel):
+    """GET /api/transactions query filters (all optional, combined with AND)."""
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    transaction_type: Optional[str] = None  # income, expense
+    category: Optional[str] = None
+    project_id: Optional[str] = None
+    employee_id: Optional[str] = None
+    tag: Optional[str] = None
+
+class FinanceSeriesQuery(BaseModel):
+    """GET /api/finance/series query parameters."""
+    date_from: Optional[date] = None  # default: start of the month 11 months before date_to
+    date_to: Optional[date] = None  # default: today
+    bucket: Literal["day", "week", "month", "quarter"] = "month"
+    group_by: Optional[Literal["category", "project", "employee"]] = None
+
+class FinanceSeriesPoint(BaseModel):
+    period: date  # first day of the bucket (weeks start on Monday)
+    group: Optional[str] = None  # category / project_id / employee_id when grouped
+    income: float
+    expense: float
+    balance: float
+    count: int
+
+class FinanceSeries(BaseModel):
+    bucket: str
+    group_by: Optional[str] = None
+    date_from: date
+    date_to: date
+    source: str  # rollups (finance_rollups) or transactions
+    points: List[FinanceSeriesPoint]
+
 # Task schemas
 class TaskBase(BaseModel):
     content: str
@@ -200,6 +293,17 @@ class Task(TaskBase):
     class Config:
         from_attributes = True
 
+class TaskFilters(BaseModel):
+    """GET /api/tasks query filters (all optional, combined with AND)."""
+    project_id: Optional[str] = None
+    assigned_to: Optional[str] = None
+    done: Optional[bool] = None
+    approved: Optional[bool] = None
+    work_status: Optional[str] = None
+    due_from: Optional[date] = None
+    due_to: Optional[date] = None
+    search: Optional[str] = None  # substring of content, case-insensitive
+
 # Goal schemas
 class GoalBase(BaseModel):
     title: str
@@ -245,6 +349,14 @@ class ReadingItemBase(BaseModel):
     completed_date: Optional[date] = None
     notes: Optional[str] = None
 
+class ReadingFilters(BaseModel):
+    """GET /api/reading query filters (all optional, combined with AND)."""
+    status: Optional[str] = None  # to_read, reading, completed, archived
+    item_type: Optional[str] = None
+    priority: Optional[str] = None  # L, M, H
+    tag: Optional[str] = None
+    search: Optional[str] = None  # substring of title or notes, case-insensitive
+
 class ReadingItemCreate(ReadingItemBase):
     pass
 
@@ -279,6 +391,12 @@ class NoteBase(BaseModel):
 class NoteCreate(NoteBase):
     pass
 
+class NoteFilters(BaseModel):
+    """GET /api/notes query filters (all optional, combined with AND)."""
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    tag: Optional[str] = None
+
 class NoteUpdate(BaseModel):
     date: Optional[date] = None
     title: Optional[str] = None
@@ -298,6 +416,9 @@ class Note(NoteBase):
 class MessageResponse(BaseModel):
     message: str
 
+class CountResponse(BaseModel):
+    count: int
+
 class ProjectMemberAdd(BaseModel):
     employee_id: str
 
@@ -357,6 +478,17 @@ class UserOut(BaseModel):
 class AuthResponse(BaseModel):
     user: UserOut
     token: str
+    # Только в режиме AUTH_MODE=signed
+    refresh_token: Optional[str] = None
+    expires_in: Optional[int] = None
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+class TokenResponse(BaseModel):
+    token: str
+    refresh_token: Optional[str] = None
+    expires_in: Optional[int] = None
 
 class MeResponse(UserOut):
     pass
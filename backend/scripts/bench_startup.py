@@ -0,0 +1,89 @@
+"""Cold-start benchmark: `import main`, app startup and first-request latency.
+
+Every run is a fresh interpreter (nothing cached in sys.modules), so the
+numbers are what a new uvicorn worker or a test process pays. Needs the same
+DATABASE_URL as the app; --startup additionally runs the startup hooks
+(schema check, seeding), which talk to the database.
+
+    python scripts/bench_startup.py [--runs 5] [--startup] [--json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that should only load on first use; reported if `import main` pulls them in
+LAZY_MODULES = ("assistant", "requests", "alembic")
+
+CHILD = r"""
+import contextlib, json, sys, time
+t0 = time.perf_counter()
+import main
+t_import = time.perf_counter() - t0
+eager = [m for m in LAZY if m in sys.modules]
+from fastapi.testclient import TestClient
+client = TestClient(main.app)
+t_startup = None
+timings = {}
+with contextlib.ExitStack() as stack:
+    if STARTUP:
+        t0 = time.perf_counter()
+        stack.enter_context(client)
+        t_startup = time.perf_counter() - t0
+    for name, path in (("health", "/health"), ("employees", "/api/employees")):
+        t0 = time.perf_counter()
+        r = client.get(path)
+        timings[name] = time.perf_counter() - t0
+        assert r.status_code == 200, (path, r.status_code)
+print(json.dumps({
+    "import": t_import,
+    "startup": t_startup,
+    "first_health": timings["health"],
+    "first_employees": timings["employees"],
+    "modules": len(sys.modules),
+    "eager": eager,
+}))
+"""
+
+
+def run_once(startup: bool) -> dict:
+    code = f"LAZY = {LAZY_MODULES!r}\nSTARTUP = {startup!r}\n" + CHILD
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    # the app may print during startup; the result is the last line
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Cold import / first request benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--startup", action="store_true", help="also run startup hooks (needs the database)")
+    parser.add_argument("--json", action="store_true", help="print the per-run results as JSON")
+    args = parser.parse_args(argv)
+
+    runs = [run_once(args.startup) for _ in range(args.runs)]
+    if args.json:
+        print(json.dumps(runs, indent=1))
+        return
+
+    keys = ["import", "startup", "first_health", "first_employees"]
+    for key in keys:
+        values = [r[key] for r in runs if r[key] is not None]
+        if values:
+            print(f"{key:<16} median {statistics.median(values) * 1000:8.1f} ms   min {min(values) * 1000:8.1f} ms")
+    print(f"{'modules':<16} {runs[0]['modules']}")
+    eager = sorted({m for r in runs for m in r["eager"]})
+    print(f"{'eager (lazy)':<16} {', '.join(eager) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""Plan-regression check: hot list queries must not fall back to sequential scans.
+
+Seeds a large synthetic dataset (many organizations, ~100k tasks,
+transactions and notes) inside one transaction, ANALYZEs it, EXPLAINs the
+queries the list endpoints run and rolls everything back, so it is safe to
+point at any database that is migrated to head. Exits with status 1 if any of the checked
+tables is read with a Seq Scan, or if a project list runs more statements for
+many projects than for one (an N+1 in the eager loading).
+
+    python scripts/check_query_plans.py [--scale 1.0] [--verbose]
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import date, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from sqlalchemy import event, select, text  # noqa: E402
+from sqlalchemy.dialects import postgresql  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+import crud  # noqa: E402
+import crud_async  # noqa: E402
+import economics  # noqa: E402
+import models  # noqa: E402
+import schemas  # noqa: E402
+import stats  # noqa: E402
+from database import engine  # noqa: E402
+from pagination import PageParams, keyset  # noqa: E402
+
+PREFIX = "plancheck-"
+# tables that must be reached through an index in every checked plan
+CHECKED_TABLES = {
+    "tasks", "transactions", "projects", "project_members", "project_links", "employees", "notes", "reading_items", "users",
+}
+
+SEED_SQL = """
+INSERT INTO organizations (id, name)
+    SELECT :p || 'org-' || g, 'Org ' || g FROM generate_series(1, :orgs) g;
+INSERT INTO employees (id, name, position, current_status, status_date, organization_id)
+    SELECT :p || 'emp-' || g, 'Emp ' || g, 'dev', 'active', CURRENT_DATE, :p || 'org-' || (g % :orgs + 1)
+    FROM generate_series(1, :employees) g;
+INSERT INTO projects (id, name, status, organization_id)
+    SELECT :p || 'prj-' || g, 'Project ' || g, 'active', :p || 'org-' || (g % :orgs + 1)
+    FROM generate_series(1, :projects) g;
+INSERT INTO project_members (project_id, employee_id)
+    SELECT :p || 'prj-' || g, :p || 'emp-' || ((g + k) % :employees + 1)
+    FROM generate_series(1, :projects) g CROSS JOIN generate_series(0, 2) k;
+INSERT INTO project_links (id, project_id, title, url, link_type)
+    SELECT :p || 'lnk-' || g, :p || 'prj-' || g, 'repo', 'https://example.com', 'repo'
+    FROM generate_series(1, :projects) g;
+INSERT INTO tasks (id, content, priority, due_date, done, assigned_to, project_id, created_at,
+                   hours_spent, billable, approved, organization_id)
+    SELECT :p || 'tsk-' || g, 'Task ' || g, 'M', CURRENT_DATE + (g % 120 - 60),
+           g % 10 <> 0, :p || 'emp-' || (g % :employees + 1), :p || 'prj-' || (g % :projects + 1),
+           NOW() - make_interval(mins => g), 0, TRUE, g % 10 <> 0, :p || 'org-' || (g % :orgs + 1)
+    FROM generate_series(1, :tasks) g;
+INSERT INTO transactions (id, transaction_type, amount, date, category, employee_id, project_id,
+                          task_id, organization_id)
+    SELECT :p || 'trx-' || g, CASE WHEN g % 3 = 0 THEN 'income' ELSE 'expense' END, g % 1000,
+           CURRENT_DATE - (g % 730), 'misc', :p || 'emp-' || (g % :employees + 1),
+           :p || 'prj-' || (g % :projects + 1), :p || 'tsk-' || (g % :tasks + 1), :p || 'org-' || (g % :orgs + 1)
+    FROM generate_series(1, :transactions) g;
+INSERT INTO users (id, email, role, password_salt, password_hash, organization_id)
+    SELECT :p || 'usr-' || g, :p || g || '@example.com', 'user', 's', 'h', :p || 'org-' || (g % :orgs + 1)
+    FROM generate_series(1, :employees) g;
+INSERT INTO notes (id, date, content, tags, shared, user_id, organization_id)
+    SELECT :p || 'note-' || g, CURRENT_DATE - (g % 730), 'Note ' || g, '[]', g % 20 = 0,
+           :p || 'usr-' || (g % :employees + 1),
+           CASE WHEN g % 100 <> 0 THEN :p || 'org-' || ((g % :employees + 1) % :orgs + 1) END  -- 1%: not backfilled yet
+    FROM generate_series(1, :notes) g;
+INSERT INTO reading_items (id, title, item_type, status, priority, tags, added_date, user_id)
+    SELECT :p || 'read-' || g, 'Item ' || g, 'article',
+           (ARRAY['to_read', 'reading', 'completed', 'archived'])[g % 4 + 1], 'M', '[]',
+           CURRENT_DATE - (g % 730), :p || 'usr-' || (g % :employees + 1)
+    FROM generate_series(1, :notes) g;
+INSERT INTO organizations (id, name) VALUES (:p || 'org-solo', 'Solo');
+INSERT INTO employees (id, name, position, current_status, status_date, organization_id)
+    VALUES (:p || 'emp-solo', 'Solo', 'dev', 'active', CURRENT_DATE, :p || 'org-solo');
+INSERT INTO projects (id, name, status, organization_id) VALUES (:p || 'prj-solo', 'Solo', 'active', :p || 'org-solo');
+INSERT INTO project_members (project_id, employee_id)
+    SELECT :p || 'prj-solo', e FROM unnest(ARRAY[:p || 'emp-solo', :p || 'emp-1', :p || 'emp-2']) e;
+INSERT INTO project_links (id, project_id, title, url, link_type)
+    VALUES (:p || 'lnk-solo', :p || 'prj-solo', 'repo', 'https://example.com', 'repo');
+"""
+
+
+def hot_queries() -> dict:
+    """name -> statement, from the same builders the endpoints execute.
+
+    The "by ..." entries are the foreign-key lookups of deletes and
+    selectin loads (crud.delete_*, ProjectLink eager loading).
+    """
+    T, X = models.Task, models.Transaction
+    org, emp, prj, tsk = f"{PREFIX}org-7", f"{PREFIX}emp-7", f"{PREFIX}prj-7", f"{PREFIX}tsk-7"
+    usr = f"{PREFIX}usr-7"
+    today = date.today()
+    page = PageParams(cursor=None, limit=100)
+    # crud_async.list_employee_stats: grouped KPIs of the organization, sorted by margin
+    board = stats.org_stats_statement(org, today - timedelta(days=90), today).subquery()
+    return {
+        "tasks: org page": crud_async.task_page_statement(T.organization_id == org, page=page),
+        "tasks: assignee page": crud_async.task_page_statement(T.assigned_to == emp, page=page),
+        "tasks: org open, due soon": crud_async.task_page_statement(
+            T.organization_id == org, schemas.TaskFilters(done=False, due_to=today + timedelta(days=7)), page
+        ),
+        "tasks: overdue": crud.overdue_tasks_statement(),
+        "tasks: by project": select(T).where(T.project_id == prj),
+        "transactions: org page": crud_async.org_transactions_statement(org, page=page),
+        "transactions: org date range": crud_async.org_transactions_statement(
+            org, schemas.TransactionFilters(date_from=today - timedelta(days=30), date_to=today), page
+        ),
+        "transactions: by employee": select(X).where(X.employee_id == emp),
+        "transactions: by project": select(X).where(X.project_id == prj),
+        "transactions: by task": select(X).where(X.task_id == tsk),
+        "projects: org": crud_async.org_projects_statement(org),
+        "projects: member": crud_async.member_projects_statement(emp),
+        "project_links: selectin": select(models.ProjectLink).where(
+            models.ProjectLink.project_id.in_([prj, f"{PREFIX}prj-8"])
+        ),
+        "employees: org": crud_async.org_employees_statement(org),
+        "employees: org stats page": keyset(select(board), board.c.profit_margin, board.c.employee_id, page),
+        "projects: org economics": economics.projects_statement(org),
+        "projects: economics": economics.projects_statement(org, prj),
+        "projects: member hours": economics.members_statement(prj),
+        "projects: weekly burn": economics.burn_statement(prj),
+        "notes: feed page": crud_async.visible_notes_statement(usr, org, page=page),
+        "notes: feed count": crud_async.visible_notes_count_statement(usr, org),
+        "reading: by status page": crud.reading_items_statement(usr, schemas.ReadingFilters(status="reading"), page),
+    }
+
+
+def statement_lists() -> dict:
+    """name -> (list with one project, list with many): the statements the project list endpoints run."""
+    org, emp = f"{PREFIX}org-7", f"{PREFIX}emp-7"
+    return {
+        "projects: org list": (
+            crud_async.org_projects_statement(f"{PREFIX}org-solo"), crud_async.org_projects_statement(org),
+        ),
+        "projects: member list": (
+            crud_async.member_projects_statement(f"{PREFIX}emp-solo"), crud_async.member_projects_statement(emp),
+        ),
+    }
+
+
+def _count_statements(conn, stmt) -> tuple[int, int]:
+    """(SQL statements run, projects) for loading `stmt` and its member maps like the endpoints do."""
+    executed = []
+
+    def count(*args):
+        executed.append(args[2])
+
+    event.listen(conn, "before_cursor_execute", count)
+    try:
+        with Session(bind=conn) as db:
+            projects = crud.fill_member_maps(list(db.execute(stmt).scalars().all()))
+            # touch what schemas.Project serializes; lazy loads would show up here
+            for p in projects:
+                len(p.links), len(p.members)
+    finally:
+        event.remove(conn, "before_cursor_execute", count)
+    return len(executed), len(projects)
+
+
+def _index_names(node: dict) -> list:
+    # a Bitmap Heap Scan names its indexes on the Bitmap Index Scan children
+    names = [node["Index Name"]] if "Index Name" in node else []
+    for child in node.get("Plans", []):
+        if "Relation Name" not in child:
+            names += _index_names(child)
+    return names
+
+
+def _scans(node: dict, out: list) -> list:
+    """(node type, table, index names) of every table access in a plan."""
+    if "Relation Name" in node:
+        out.append((node["Node Type"], node["Relation Name"], "+".join(_index_names(node))))
+    for child in node.get("Plans", []):
+        _scans(child, out)
+    return out
+
+
+def check(scale: float = 1.0, verbose: bool = False) -> int:
+    sizes = {
+        "orgs": max(10, int(200 * scale)),
+        "employees": max(100, int(5_000 * scale)),
+        "projects": max(100, int(10_000 * scale)),
+        "tasks": max(1_000, int(100_000 * scale)),
+        "transactions": max(1_000, int(100_000 * scale)),
+        "notes": max(1_000, int(100_000 * scale)),
+    }
+    dialect = postgresql.dialect()
+    failures = 0
+    with engine.connect() as conn:
+        trans = conn.begin()
+        try:
+            for stmt in SEED_SQL.strip().split(";\n"):
+                conn.execute(text(stmt), {"p": PREFIX, **sizes})
+            for table in sorted(CHECKED_TABLES):
+                conn.execute(text(f"ANALYZE {table}"))
+            for name, stmt in hot_queries().items():
+                sql = str(stmt.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+                plan = conn.execute(text("EXPLAIN (FORMAT JSON) " + sql)).scalar()
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                scans = _scans(plan[0]["Plan"], [])
+                bad = [s for s in scans if s[0] == "Seq Scan" and s[1] in CHECKED_TABLES]
+                failures += bool(bad)
+                shown = ", ".join(f"{t}: {n}{' (' + i + ')' if i else ''}" for n, t, i in scans)
+                print(f"{'FAIL' if bad else 'ok  '} {name:<32} {shown}")
+                if verbose:
+                    print(json.dumps(plan[0]["Plan"], indent=1))
+            for name, (one, many) in statement_lists().items():
+                (n_one, p_one), (n_many, p_many) = _count_statements(conn, one), _count_statements(conn, many)
+                bad = n_many != n_one or p_many <= p_one
+                failures += bad
+                print(f"{'FAIL' if bad else 'ok  '} {name:<32} {n_one} statements for {p_one} project(s), {n_many} for {p_many}")
+        finally:
+            trans.rollback()
+    print(f"{failures} regression(s)" if failures else "all hot queries use indexes, project lists have no N+1")
+    return 1 if failures else 0
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Fail if hot list queries plan sequential scans")
+    parser.add_argument("--scale", type=float, default=1.0, help="dataset size multiplier")
+    parser.add_argument("--verbose", action="store_true", help="print full plans")
+    args = parser.parse_args(argv)
+    sys.exit(check(args.scale, args.verbose))
+
+
+if __name__ == "__main__":
+    main()
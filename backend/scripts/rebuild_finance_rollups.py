@@ -0,0 +1,55 @@
+"""Rebuild finance_rollups (monthly transaction sums) from transactions.
+
+The application keeps the rollups in step with every ORM write; this repairs
+drift after raw SQL or bulk updates that bypass it (e.g. the
+transaction_org_ids backfill) or after a manual data fix. One transaction;
+writers of transactions wait for it at their rollup update.
+
+    python scripts/rebuild_finance_rollups.py [--org ORGANIZATION_ID] [--check]
+"""
+import argparse
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from sqlalchemy import text  # noqa: E402
+
+import crud  # noqa: E402
+from database import SessionLocal  # noqa: E402
+
+_SNAPSHOT_SQL = text(
+    "SELECT organization_id, month, transaction_type, category, project_id, ROUND(amount::numeric, 2), tx_count "
+    "FROM finance_rollups WHERE (CAST(:org AS TEXT) IS NULL OR organization_id = :org) AND tx_count <> 0"
+)
+
+
+def rebuild(organization_id=None, check: bool = False) -> int:
+    db = SessionLocal()
+    try:
+        params = {"org": organization_id}
+        before = set(db.execute(_SNAPSHOT_SQL, params).all())
+        rows = crud.rebuild_finance_rollups(db, organization_id)
+        after = set(db.execute(_SNAPSHOT_SQL, params).all())
+        drift = len(before ^ after)
+        print(f"{rows} rollup row(s), {drift} differed from the maintained ones")
+        if check:
+            db.rollback()
+            return 1 if drift else 0
+        db.commit()
+        return 0
+    finally:
+        db.close()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Recompute finance_rollups from transactions")
+    parser.add_argument("--org", help="only this organization ('' for transactions without one)")
+    parser.add_argument("--check", action="store_true", help="report drift and roll back; exit 1 if any")
+    args = parser.parse_args(argv)
+    sys.exit(rebuild(args.org, args.check))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Fast JSON for large list responses.
+
+Every response is rendered with orjson (ORJSONResponse is the app's default
+response class). The big read-only lists go further and skip response_model:
+
+- json_rows(): plain Core rows selected with schema_columns() (no ORM
+  instances, no identity map) go straight to orjson. They are not validated
+  again: the columns already have the schema's types, and orjson renders them
+  byte-for-byte as pydantic would (dates ISO, UTC as "Z").
+- json_list(): ORM objects through a TypeAdapter of the response schema,
+  built once per (schema, fields), serialized by pydantic-core in one call.
+- json_body(): composite payloads (the dashboard bootstrap) assembled from
+  row_dicts()/obj_dicts() and rendered by orjson in one pass.
+"""
+from functools import lru_cache
+from operator import itemgetter
+from typing import Any, List, Optional, Sequence
+
+import orjson
+from fastapi import Response
+from pydantic import BaseModel, ConfigDict, TypeAdapter, create_model
+
+
+@lru_cache(maxsize=256)
+def list_adapter(schema: type[BaseModel], fields: Optional[tuple[str, ...]] = None) -> TypeAdapter:
+    """TypeAdapter for List[schema], or for a copy of schema narrowed to `fields`."""
+    if fields:
+        schema = create_model(
+            f"{schema.__name__}Fields",
+            __config__=ConfigDict(from_attributes=True),
+            **{f: (schema.model_fields[f].annotation, schema.model_fields[f]) for f in fields},
+        )
+    return TypeAdapter(List[schema])
+
+
+def schema_columns(model, schema: type[BaseModel], fields: Optional[Sequence[str]] = None, always: Sequence[str] = ()) -> list:
+    """Table columns of `model` to select for `schema` (or only for `fields`, plus `always`)."""
+    table = model.__table__
+    names = fields or list(schema.model_fields)
+    return [table.c[n] for n in dict.fromkeys((*names, *always)) if n in table.c]
+
+
+def _json_response(body: bytes, response: Optional[Response]) -> Response:
+    # keep headers already set on the injected `response` (next cursor, ETag, ...)
+    headers = dict(response.headers) if response is not None else None
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def row_dicts(rows: Sequence[Any], schema: type[BaseModel], fields: Optional[tuple[str, ...]] = None) -> list:
+    """Core rows (every field of `schema` is a selected column) as dicts in schema field order."""
+    names = list(fields or schema.model_fields)
+    if not rows:
+        return []
+    getter = itemgetter(*(rows[0]._fields.index(n) for n in names))
+    if len(names) == 1:
+        return [{names[0]: getter(r)} for r in rows]
+    return [dict(zip(names, getter(r))) for r in rows]
+
+
+def obj_dicts(objs: Sequence[Any], schema: type[BaseModel], fields: Optional[tuple[str, ...]] = None) -> list:
+    """ORM objects as dicts of `schema` (or only its `fields`), values left for orjson."""
+    adapter = list_adapter(schema, fields or None)
+    return adapter.dump_python(adapter.validate_python(list(objs), from_attributes=True))
+
+
+def json_body(payload: Any, response: Optional[Response] = None) -> Response:
+    """Any payload of plain values, dicts and lists (e.g. row_dicts/obj_dicts output) as JSON."""
+    return _json_response(orjson.dumps(payload, option=orjson.OPT_UTC_Z), response)
+
+
+def json_list(objs: Sequence[Any], schema: type[BaseModel], fields: Optional[tuple[str, ...]] = None, response: Optional[Response] = None) -> Response:
+    """JSON array of ORM objects as `schema` (or only its `fields`)."""
+    adapter = list_adapter(schema, fields or None)
+    return _json_response(adapter.dump_json(adapter.validate_python(list(objs), from_attributes=True)), response)
+
+
+def json_rows(rows: Sequence[Any], schema: type[BaseModel], fields: Optional[tuple[str, ...]] = None, response: Optional[Response] = None) -> Response:
+    """JSON array of Core rows (every field of `schema` is a selected column), in schema field order."""
+    return json_body(row_dicts(rows, schema, fields), response)
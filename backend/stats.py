@@ -0,0 +1,189 @@
+"""Employee statistics, shared by POST /api/employees/{id}/stats, the
+GET /api/employees/stats leaderboard and the assistant.
+
+All figures come from aggregate queries: FILTERed aggregates over tasks and
+over transactions plus the count of active projects, either for one employee
+(cross-joined into a single row) or grouped per employee of an organization.
+Nothing is loaded into Python.
+"""
+from datetime import date, timedelta
+from typing import Optional
+
+from sqlalchemy import Float, Integer, case, func, select, true, type_coerce
+from sqlalchemy.orm import Session
+
+import models
+
+
+def _task_where(date_from: Optional[date], date_to: Optional[date]) -> list:
+    # tasks count in the range they were created in
+    T = models.Task
+    where = []
+    if date_from:
+        where.append(T.created_at >= date_from)
+    if date_to:
+        where.append(T.created_at <= date_to + timedelta(days=1))
+    return where
+
+
+def _transaction_where(date_from: Optional[date], date_to: Optional[date]) -> list:
+    X = models.Transaction
+    where = []
+    if date_from:
+        where.append(X.date >= date_from)
+    if date_to:
+        where.append(X.date <= date_to)
+    return where
+
+
+def task_aggregates() -> list:
+    """Labelled aggregates over a set of tasks (also used by economics.py)."""
+    T = models.Task
+    hours = func.coalesce(T.hours_spent, 0.0)
+    done, open_ = T.done == True, T.done.is_not(True)
+    return [
+        func.count().filter(done).label("done_tasks"),
+        func.count().filter(open_).label("active_tasks"),
+        func.coalesce(func.sum(hours).filter(done), 0.0).label("done_hours"),
+        func.coalesce(func.sum(hours).filter(open_), 0.0).label("active_hours"),
+        # в статистику часов идут только принятые (approved) выполненные задачи
+        func.coalesce(func.sum(hours).filter(done, T.approved == True), 0.0).label("approved_hours"),
+    ]
+
+
+def transaction_aggregates() -> list:
+    """income/expense sums over a set of transactions (also used by economics.py)."""
+    X = models.Transaction
+    return [
+        func.coalesce(func.sum(X.amount).filter(X.transaction_type == "income"), 0.0).label("income"),
+        func.coalesce(func.sum(X.amount).filter(X.transaction_type == "expense"), 0.0).label("expense"),
+    ]
+
+
+def _active_projects(organization_id: Optional[str]):
+    P, M = models.Project, models.ProjectMember
+    return (
+        select(func.count().label("active_projects"))
+        .select_from(P)
+        .join(M, M.project_id == P.id)
+        .where(P.status == "active", P.organization_id == organization_id)
+    )
+
+
+def totals_statement(
+    employee_id: str,
+    organization_id: Optional[str],
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+):
+    """One row: task counts/hours (tasks created in the range), income/expense
+    (transactions dated in the range) and active projects of the employee."""
+    T, X, M = models.Task, models.Transaction, models.ProjectMember
+    tasks = select(*task_aggregates()).where(T.assigned_to == employee_id, *_task_where(date_from, date_to)).subquery()
+    transactions = (
+        select(*transaction_aggregates())
+        .where(X.employee_id == employee_id, *_transaction_where(date_from, date_to))
+        .subquery()
+    )
+    projects = _active_projects(organization_id).where(M.employee_id == employee_id).subquery()
+    return select(tasks, transactions, projects).select_from(
+        tasks.join(transactions, true()).join(projects, true())
+    )
+
+
+def org_stats_statement(
+    organization_id: Optional[str],
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    employee_id: Optional[str] = None,
+):
+    """EmployeeStats figures (plus profit) for every employee of the organization
+    (or just `employee_id`): one grouped aggregate per source, left-joined to
+    employees, derived ratios computed in SQL so they can be sorted on."""
+    E, T, X, M = models.Employee, models.Task, models.Transaction, models.ProjectMember
+    staff = select(E.id).where(E.organization_id == organization_id)
+    if employee_id:
+        staff = staff.where(E.id == employee_id)
+    tasks = (
+        select(T.assigned_to.label("employee_id"), *task_aggregates())
+        .where(T.assigned_to.in_(staff), *_task_where(date_from, date_to))
+        .group_by(T.assigned_to)
+        .subquery()
+    )
+    transactions = (
+        select(X.employee_id.label("employee_id"), *transaction_aggregates())
+        .where(X.employee_id.in_(staff), *_transaction_where(date_from, date_to))
+        .group_by(X.employee_id)
+        .subquery()
+    )
+    # already scoped by the projects' organization: members of the org's active projects
+    projects = _active_projects(organization_id).add_columns(M.employee_id.label("employee_id"))
+    if employee_id:
+        projects = projects.where(M.employee_id == employee_id)
+    projects = projects.group_by(M.employee_id).subquery()
+    hours = func.coalesce(tasks.c.approved_hours, 0.0)
+    revenue = func.coalesce(transactions.c.income, 0.0)
+    cost = func.coalesce(transactions.c.expense, 0.0)
+    stmt = (
+        select(
+            E.id.label("employee_id"),
+            E.name,
+            E.position,
+            type_coerce(hours, Float).label("total_hours"),
+            type_coerce(revenue, Float).label("total_revenue"),
+            type_coerce(cost, Float).label("total_salary_cost"),
+            type_coerce(revenue - cost, Float).label("profit"),
+            type_coerce(case((hours > 0, cost / hours), else_=0.0), Float).label("actual_hourly_rate"),
+            type_coerce(case((hours > 0, revenue / hours), else_=0.0), Float).label("revenue_per_hour"),
+            type_coerce(case((revenue > 0, (revenue - cost) / revenue * 100), else_=0.0), Float).label("profit_margin"),
+            type_coerce(func.coalesce(projects.c.active_projects, 0), Integer).label("active_projects_count"),
+            type_coerce(func.coalesce(tasks.c.done_tasks, 0), Integer).label("completed_tasks"),
+            type_coerce(func.coalesce(tasks.c.active_tasks, 0), Integer).label("in_progress_tasks"),
+        )
+        .select_from(E)
+        .outerjoin(tasks, tasks.c.employee_id == E.id)
+        .outerjoin(transactions, transactions.c.employee_id == E.id)
+        .outerjoin(projects, projects.c.employee_id == E.id)
+        .where(E.organization_id == organization_id)
+    )
+    if employee_id:
+        stmt = stmt.where(E.id == employee_id)
+    return stmt
+
+
+def employee_totals(
+    db: Session,
+    employee: models.Employee,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+) -> dict:
+    """done_tasks, active_tasks, done_hours, active_hours, approved_hours, income, expense, active_projects."""
+    row = db.execute(totals_statement(employee.id, employee.organization_id, date_from, date_to)).one()
+    totals = dict(row._mapping)
+    for key in ("done_hours", "active_hours", "approved_hours", "income", "expense"):
+        totals[key] = float(totals[key])
+    return totals
+
+
+def employee_stats(
+    db: Session,
+    employee: models.Employee,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    period_label: str = "Всё время",
+) -> dict:
+    """Fields of schemas.EmployeeStats."""
+    t = employee_totals(db, employee, date_from, date_to)
+    hours, revenue, cost = t["approved_hours"], t["income"], t["expense"]
+    return {
+        "total_hours": hours,
+        "total_revenue": revenue,
+        "total_salary_cost": cost,
+        "active_projects_count": t["active_projects"],
+        "completed_tasks": t["done_tasks"],
+        "in_progress_tasks": t["active_tasks"],
+        "actual_hourly_rate": cost / hours if hours > 0 else 0,
+        "revenue_per_hour": revenue / hours if hours > 0 else 0,
+        "profit_margin": (revenue - cost) / revenue * 100 if revenue > 0 else 0,
+        "period_label": period_label,
+    }
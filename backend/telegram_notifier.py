@@ -1,5 +1,4 @@
 import os
-import requests
 from typing import Optional
 
 from config import settings
@@ -8,6 +7,12 @@ from config import settings
 API_BASE = "https://api.telegram.org/bot"
 
 
+def _http():
+    # requests грузится при первом обращении к Bot API, а не при старте приложения
+    import requests
+    return requests
+
+
 def _bot_token() -> Optional[str]:
     return settings.TELEGRAM_BOT_TOKEN
 
@@ -19,7 +24,7 @@ def send_message(chat_id: str, text: str) -> bool:
         return False
     try:
         url = f"{API_BASE}{token}/sendMessage"
-        r = requests.post(url, json={
+        r = _http().post(url, json={
             "chat_id": chat_id,
             "text": text,
             "parse_mode": "HTML",
@@ -38,7 +43,7 @@ def set_webhook() -> bool:
         return False
     try:
         url = f"{API_BASE}{token}/setWebhook"
-        r = requests.post(url, json={
+        r = _http().post(url, json={
             "url": webhook,
             # pass secret token to verify updates
             "secret_token": settings.TELEGRAM_WEBHOOK_SECRET,
@@ -56,7 +61,7 @@ def get_webhook_info() -> Optional[dict]:
         return None
     try:
         url = f"{API_BASE}{token}/getWebhookInfo"
-        r = requests.get(url, timeout=10)
+        r = _http().get(url, timeout=10)
         if not r.ok:
             return None
         return r.json()
@@ -71,7 +76,7 @@ def delete_webhook(drop_pending_updates: bool = True) -> bool:
         return False
     try:
         url = f"{API_BASE}{token}/deleteWebhook"
-        r = requests.post(url, json={"drop_pending_updates": bool(drop_pending_updates)}, timeout=10)
+        r = _http().post(url, json={"drop_pending_updates": bool(drop_pending_updates)}, timeout=10)
         return bool(r.ok)
     except Exception:
         return False
@@ -87,7 +92,7 @@ def get_updates(offset: Optional[int] = None, timeout: int = 25) -> list:
         params = {"timeout": int(timeout), "allowed_updates": ["message"]}
         if offset is not None:
             params["offset"] = int(offset)
-        r = requests.get(url, json=params, timeout=timeout + 5)
+        r = _http().get(url, json=params, timeout=timeout + 5)
         if not r.ok:
             return []
         data = r.json() or {}
@@ -109,7 +114,7 @@ def delete_message(chat_id: str, message_id: int) -> bool:
         return False
     try:
         url = f"{API_BASE}{token}/deleteMessage"
-        r = requests.post(url, json={
+        r = _http().post(url, json={
             "chat_id": chat_id,
             "message_id": int(message_id),
         }, timeout=10)
@@ -0,0 +1,42 @@
+import base64
+import hashlib
+import hmac
+import json
+import time
+from typing import Optional
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def is_signed_token(token: str) -> bool:
+    # Session tokens are plain hex; signed tokens are "<payload>.<signature>"
+    return "." in token
+
+
+def sign_token(claims: dict, secret: str, ttl_seconds: float) -> str:
+    """HMAC-SHA256 signed, base64url-encoded claims with an `exp` (unix seconds)."""
+    payload = dict(claims, exp=int(time.time() + ttl_seconds))
+    body = _b64encode(json.dumps(payload, separators=(",", ":"), sort_keys=True).encode("utf-8"))
+    sig = hmac.new(secret.encode("utf-8"), body.encode("ascii"), hashlib.sha256).digest()
+    return f"{body}.{_b64encode(sig)}"
+
+
+def verify_token(token: str, secret: str) -> Optional[dict]:
+    """Claims of a valid, unexpired token; None for anything else."""
+    try:
+        body, sig = token.split(".", 1)
+        expected = hmac.new(secret.encode("utf-8"), body.encode("ascii"), hashlib.sha256).digest()
+        if not hmac.compare_digest(expected, _b64decode(sig)):
+            return None
+        claims = json.loads(_b64decode(body))
+    except (ValueError, UnicodeError):
+        return None
+    if not isinstance(claims, dict) or int(claims.get("exp") or 0) <= time.time():
+        return None
+    return claims